@@ -0,0 +1,3 @@
+"""Offline benchmarks for nba_bot: synthetic upstream payloads shaped like
+the real Odds API / balldontlie / ESPN / RotoWire responses, and scripts
+that time each pipeline stage against them."""
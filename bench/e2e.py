@@ -0,0 +1,78 @@
+"""End-to-end run() throughput and tail latency against the local stand-in.
+
+Starts bench/upstream.py in-process, points nba_bot at it (NBA_UPSTREAM,
+throwaway cache and site directories, an official run so the history gist
+is written too) and times repeated full runs: fetch, score, gist save,
+site export and Discord send. Reports runs per minute, p50/p95/p99/max
+wall time, and the requests each upstream saw by status.
+
+    python -m bench.e2e --runs 20 --games 15 --books 40
+    python -m bench.e2e --runs 20 --latency 60 --error-rate 0.02 --throttle-rate 0.02 --retry-after 0
+
+Same seed, same slates and the same fault sequence for a given request
+order; thread scheduling can still reorder concurrent requests.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import nba_bot
+from bench import upstream
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs first")
+    parser.add_argument("--sims", type=int, default=nba_bot.SIMS)
+    parser.add_argument("--regions", default="us", help="comma-separated Odds API regions to fetch")
+    parser.add_argument("--props", default="", help="comma-separated player prop markets to fetch")
+    upstream.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    up = upstream.from_args(args)
+    server, base = upstream.serve(up)
+
+    os.environ["GITHUB_EVENT_NAME"] = "schedule"
+    nba_bot.log.setLevel("ERROR")
+    nba_bot.UPSTREAM_URL    = base
+    nba_bot.ODDS_API_KEY    = "stand-in"
+    nba_bot.BALLDONTLIE_KEY = "stand-in"
+    nba_bot.GITHUB_TOKEN    = "stand-in"
+    nba_bot.WEBHOOK         = "https://discord.com/api/webhooks/0/stand-in"
+    nba_bot.CACHE_DIR       = tempfile.mkdtemp(prefix="nba_e2e_cache_")
+    nba_bot.SITE_DATA_DIR   = tempfile.mkdtemp(prefix="nba_e2e_site_")
+    nba_bot.SIMS            = args.sims
+    nba_bot.ODDS_REGIONS    = args.regions.split(",")
+    nba_bot.PROP_MARKETS    = [m for m in args.props.split(",") if m]
+
+    times = []
+    for i in range(args.warmup + args.runs):
+        nba_bot._HISTORY_GIST.clear()
+        t0 = time.perf_counter()
+        nba_bot.run()
+        if i >= args.warmup:
+            times.append(time.perf_counter() - t0)
+    server.shutdown()
+
+    print("runs=%d games=%d books=%d season=%d latency=%.0fms errors=%.1f%% 429s=%.1f%%" % (
+        args.runs, args.games, args.books, args.season, args.latency,
+        args.error_rate * 100, args.throttle_rate * 100))
+    print("throughput %.1f runs/min" % (60 * len(times) / sum(times)))
+    print("wall ms    p50 %.0f  p95 %.0f  p99 %.0f  max %.0f" % tuple(
+        percentile(times, q) * 1000 for q in (0.5, 0.95, 0.99, 1.0)))
+    print("discord    %d messages" % len(up.discord_messages))
+    for (host, status), n in sorted(up.stats.items()):
+        print("  %-28s %3d  %6d" % (host, status, n))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Before/after measurement for streamed ingestion (safe_stream).
+
+For each recorded payload, parses it two ways in a fresh subprocess so peak
+RSS isn't polluted by the other run:
+
+  full    -- the old path: json.loads on the whole body, then project
+  stream  -- iter_json_array over 64 KB chunks, projecting as it goes
+
+and reports parse time, peak traced Python allocation and peak RSS growth.
+
+    python -m bench.ingest [--games 1230] [--slate 15] [--books 40]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import nba_bot
+from bench import payloads
+
+CASES = {
+    # fixture name -> (array key, projection)
+    "bdl_season.json":     ("data", nba_bot.project_bdl_game),
+    "odds_slate.json":     (None, nba_bot.Game.from_odds),
+    "espn_scoreboard.json": ("events", nba_bot.project_espn_event),
+}
+
+
+def _chunks(path):
+    with open(path, encoding="utf-8") as f:
+        while True:
+            chunk = f.read(nba_bot.STREAM_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+
+def measure(path, mode):
+    array_key, project = CASES[os.path.basename(path)]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    if mode == "full":
+        with open(path, encoding="utf-8") as f:
+            doc = json.loads(f.read())
+        items = doc[array_key] if array_key else doc
+        records = [r for r in map(project, items) if r is not None]
+        del doc, items
+    else:
+        records = [r for r in map(project, nba_bot.iter_json_array(_chunks(path), array_key, {}))
+                   if r is not None]
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"records": len(records), "seconds": elapsed, "peak_bytes": peak,
+            "rss_kb": max(0, rss_after - rss_before)}
+
+
+def record_fixtures(args):
+    rows = payloads.season_games(args.games)
+    # One response body holding the season, so the comparison isn't
+    # dominated by per-page overhead -- the pagination loop just repeats it.
+    return [
+        payloads.write_fixture("bdl_season.json", {"data": rows, "meta": {"per_page": len(rows)}}),
+        payloads.write_fixture("odds_slate.json", payloads.odds_slate(args.slate, args.books)),
+        payloads.write_fixture("espn_scoreboard.json", payloads.espn_scoreboard(args.events)),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1230)
+    parser.add_argument("--slate", type=int, default=15)
+    parser.add_argument("--books", type=int, default=40)
+    parser.add_argument("--events", type=int, default=60)
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(*args.child)))
+        return 0
+
+    print("%-22s %8s %6s %9s %12s %10s" % ("payload", "size", "mode", "ms", "peak alloc", "rss +KB"))
+    for path in record_fixtures(args):
+        size = os.path.getsize(path)
+        for mode in ("full", "stream"):
+            out = subprocess.run(
+                [sys.executable, "-m", "bench.ingest", "--child", path, mode],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            r = json.loads(out.strip().splitlines()[-1])
+            print("%-22s %7.1fK %6s %9.1f %11.1fK %10d" % (
+                os.path.basename(path), size / 1024, mode, r["seconds"] * 1000,
+                r["peak_bytes"] / 1024, r["rss_kb"],
+            ))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""Deterministic synthetic upstream payloads.
+
+Shaped field-for-field like the live responses the bot parses (including
+the fields it ignores, since those are most of what a parser has to wade
+through), so stages can be timed offline at any slate size. Same seed, same
+bytes.
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+import nba_bot
+
+TEAMS = sorted(nba_bot.TEAM_CN)
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+BOOKS = [
+    "DraftKings", "FanDuel", "BetMGM", "Caesars", "BetRivers", "PointsBet",
+    "Bovada", "BetOnline.ag", "MyBookie.ag", "LowVig.ag", "BetUS", "Unibet",
+    "WynnBET", "SuperBook", "Barstool", "Fanatics", "ESPN BET", "Hard Rock",
+    "bet365", "William Hill", "Ladbrokes", "Paddy Power", "Betfair", "Pinnacle",
+    "Marathon Bet", "1xBet", "Betsson", "Coolbet", "Matchbook", "Smarkets",
+    "Sport888", "Virgin Bet", "Casumo", "LeoVegas", "Nordic Bet", "Sportsbet",
+    "TAB", "Neds", "Ladbrokes AU", "PlayUp",
+]
+
+
+def _team(name, idx):
+    city, _, nick = name.rpartition(" ")
+    return {
+        "id": idx + 1, "conference": "East" if idx % 2 else "West", "division": "Atlantic",
+        "city": city, "name": nick, "full_name": name, "abbreviation": nick[:3].upper(),
+    }
+
+
+def odds_slate(n_games=10, n_books=8, start=None, seed=0, markets=("h2h", "spreads", "totals"),
+               book_offset=0):
+    """An Odds API /v4/sports/{key}/odds response: n_games upcoming games,
+    each quoted by n_books books with lines scattered around one market
+    number (so consensus, line shopping and the edge filter all see a
+    realistic spread of prices). `book_offset` starts the book names
+    further down BOOKS: the same events and lines under other books, as
+    another region's board would quote them."""
+    rnd   = random.Random(seed)
+    start = start or datetime.utcnow() + timedelta(hours=2)
+    games = []
+    for i in range(n_games):
+        home, away = rnd.sample(TEAMS, 2)
+        commence   = (start + timedelta(minutes=30 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        spread     = rnd.choice([-11.5, -8.5, -6.5, -4.5, -3.5, 3.5, 4.5, 6.5])
+        total      = rnd.choice([216.5, 221.5, 225.5, 229.5, 234.5])
+        bookmakers = []
+        for b in range(n_books):
+            n     = b + book_offset
+            title = BOOKS[n % len(BOOKS)] + ("" if n < len(BOOKS) else " %d" % (n // len(BOOKS)))
+            pt    = spread + rnd.choice([-1.0, -0.5, 0.0, 0.0, 0.5, 1.0])
+            tt    = total + rnd.choice([-1.0, -0.5, 0.0, 0.5, 1.0])
+            fav   = 1.35 + min(abs(pt), 12) * 0.03 if pt < 0 else 2.6 + pt * 0.12
+            dog   = 1 / max(0.05, 1.045 - 1 / fav)
+            stamp = commence
+            mk    = {
+                "h2h":     [{"name": home, "price": round(fav + rnd.uniform(-.05, .05), 2)},
+                            {"name": away, "price": round(dog + rnd.uniform(-.05, .05), 2)}],
+                "spreads": [{"name": home, "price": round(rnd.uniform(1.83, 2.08), 2), "point": pt},
+                            {"name": away, "price": round(rnd.uniform(1.83, 2.08), 2), "point": -pt}],
+                "totals":  [{"name": "Over", "price": round(rnd.uniform(1.83, 2.05), 2), "point": tt},
+                            {"name": "Under", "price": round(rnd.uniform(1.83, 2.05), 2), "point": tt}],
+            }
+            bookmakers.append({
+                "key":         title.lower().replace(" ", "_"),
+                "title":       title,
+                "last_update": stamp,
+                "markets":     [{"key": m, "last_update": stamp, "outcomes": mk[m]} for m in markets if m in mk],
+            })
+        games.append({
+            "id":            "%032x" % rnd.getrandbits(128),
+            "sport_key":     "basketball_nba",
+            "sport_title":   "NBA",
+            "commence_time": commence,
+            "home_team":     home,
+            "away_team":     away,
+            "bookmakers":    bookmakers,
+        })
+    return games
+
+
+def season_games(n_games=1230, season=None, seed=0, final_ratio=1.0, start=None):
+    """Every game of a season as balldontlie /v1/games rows (unpaginated)."""
+    rnd    = random.Random(seed)
+    season = season or nba_bot.SEASON_YEAR
+    start  = start or datetime(season, 10, 21)
+    teams  = {t: _team(t, i) for i, t in enumerate(TEAMS)}
+    strength = {t: rnd.gauss(0, 5) for t in TEAMS}
+    rows = []
+    per_day = max(1, n_games // 170)
+    for i in range(n_games):
+        home, away = rnd.sample(TEAMS, 2)
+        day   = start + timedelta(days=i // per_day)
+        final = i < n_games * final_ratio
+        margin = strength[home] - strength[away] + 2.5 + rnd.gauss(0, 12)
+        hs = int(round(113 + margin / 2)) if final else 0
+        vs = int(round(113 - margin / 2)) if final else 0
+        if hs == vs:
+            hs += 1
+        rows.append({
+            "id":                 20000 + i,
+            "date":               day.strftime("%Y-%m-%d"),
+            "season":             season,
+            "status":             "Final" if final else day.strftime("%Y-%m-%dT23:00:00Z"),
+            "period":             4 if final else 0,
+            "time":               "Final" if final else "",
+            "postseason":         False,
+            "home_team_score":    hs,
+            "visitor_team_score": vs,
+            "datetime":           day.strftime("%Y-%m-%dT23:00:00.000Z"),
+            "home_team":          teams[home],
+            "visitor_team":       teams[away],
+        })
+    return rows
+
+
+def bdl_pages(rows, per_page=100):
+    """Split season_games rows into cursor-paginated /v1/games responses."""
+    pages = []
+    for i in range(0, len(rows), per_page):
+        nxt = rows[i + per_page]["id"] if i + per_page < len(rows) else None
+        meta = {"per_page": per_page}
+        if nxt is not None:
+            meta["next_cursor"] = nxt
+        pages.append({"data": rows[i:i + per_page], "meta": meta})
+    return pages
+
+
+def box_scores(games, roster=13, seed=0):
+    """balldontlie /v1/stats rows for every final game in season_games rows:
+    each team's roster, a few players sitting any given night, per-player
+    lines scaled by a fixed minutes role."""
+    rnd    = random.Random(seed)
+    teams  = {}
+    rows   = []
+    for g in games:
+        if g["status"] != "Final":
+            continue
+        game = {k: g[k] for k in ("id", "date", "season", "status", "period", "time", "postseason",
+                                  "home_team_score", "visitor_team_score")}
+        game["home_team_id"]    = g["home_team"]["id"]
+        game["visitor_team_id"] = g["visitor_team"]["id"]
+        for team in (g["home_team"], g["visitor_team"]):
+            players = teams.setdefault(team["id"], [
+                {"id": team["id"] * 100 + j, "first_name": "P%d" % j, "last_name": team["name"],
+                 "position": "G", "height": "6-6", "weight": "210", "jersey_number": str(j),
+                 "college": "", "country": "USA", "draft_year": 2020, "draft_round": 1,
+                 "draft_number": j, "team_id": team["id"]}
+                for j in range(roster)
+            ])
+            for j, player in enumerate(players):
+                if rnd.random() < 0.08:
+                    continue
+                minutes = max(4, int(36 - j * 2.6 + rnd.gauss(0, 3)))
+                pts  = max(0, int(minutes * (0.75 - j * 0.03) + rnd.gauss(0, 4)))
+                fga  = max(pts // 2, 1)
+                clock = "%d:%02d" % (minutes, rnd.randint(0, 59))
+                oreb = rnd.randint(0, 3)
+                dreb = rnd.randint(0, 8)
+                rows.append({
+                    "id": len(rows) + 1, "min": clock,
+                    "fgm": pts // 2 - pts // 8, "fga": fga, "fg3m": pts // 10, "fg3a": pts // 5,
+                    "ftm": pts // 8, "fta": pts // 7, "oreb": oreb, "dreb": dreb,
+                    "reb": oreb + dreb, "ast": rnd.randint(0, 9), "stl": rnd.randint(0, 2), "blk": rnd.randint(0, 2),
+                    "turnover": rnd.randint(0, 4), "pf": rnd.randint(0, 5), "pts": pts,
+                    "player": player, "team": team, "game": game,
+                })
+    return rows
+
+
+def prop_odds(event, n_books=8, roster=13, seed=0,
+              markets=("player_points", "player_rebounds", "player_assists")):
+    """An Odds API /v4/sports/{key}/events/{id}/odds response with player
+    props for one odds_slate event: every rostered player of both teams
+    (named as box_scores names them) quoted over/under by n_books books at
+    his box_scores role's number, one quote in a hundred a point off it."""
+    rnd = random.Random("%s:%s" % (seed, event["id"]))
+    lines = []
+    for team in (event["home_team"], event["away_team"]):
+        nick = team.rpartition(" ")[2]
+        for j in range(roster):
+            minutes = max(4, 36 - j * 2.6)
+            role = {"player_points": minutes * (0.75 - j * 0.03), "player_rebounds": 5.5, "player_assists": 4.5}
+            lines.append(("P%d %s" % (j, nick), {m: int(role[m]) + 0.5 for m in markets}))
+    bookmakers = []
+    for b in range(n_books):
+        title = BOOKS[b % len(BOOKS)] + ("" if b < len(BOOKS) else " %d" % (b // len(BOOKS)))
+        mk = {m: [] for m in markets}
+        for name, points in lines:
+            for m, point in points.items():
+                pt = point + (rnd.choice([-1.0, 1.0]) if rnd.random() < 0.01 else 0.0)
+                mk[m].append({"name": "Over", "description": name, "price": round(rnd.uniform(1.8, 1.95), 2), "point": pt})
+                mk[m].append({"name": "Under", "description": name, "price": round(rnd.uniform(1.8, 1.95), 2), "point": pt})
+        bookmakers.append({
+            "key":         title.lower().replace(" ", "_"),
+            "title":       title,
+            "last_update": event["commence_time"],
+            "markets":     [{"key": m, "last_update": event["commence_time"], "outcomes": mk[m]} for m in markets],
+        })
+    resp = {k: event[k] for k in ("id", "sport_key", "sport_title", "commence_time", "home_team", "away_team")}
+    resp["bookmakers"] = bookmakers
+    return resp
+
+
+def espn_scoreboard(n_events=12, seed=0, start=None, completed_ratio=0.7, teams=None):
+    """An ESPN site-API scoreboard response."""
+    rnd   = random.Random(seed)
+    start = start or datetime.utcnow() - timedelta(days=1)
+    teams = teams or TEAMS
+    events = []
+    for i in range(n_events):
+        home, away = rnd.sample(teams, 2)
+        done = i < n_events * completed_ratio
+        hs, vs = (rnd.randint(75, 110), rnd.randint(75, 110)) if done else (0, 0)
+        if done and hs == vs:
+            hs += 1
+        when = (start + timedelta(hours=2 * i)).strftime("%Y-%m-%dT%H:%MZ")
+        status = {
+            "clock": 0.0, "displayClock": "0:00", "period": 4 if done else 0,
+            "type": {"id": "3" if done else "1", "name": "STATUS_FINAL" if done else "STATUS_SCHEDULED",
+                     "state": "post" if done else "pre", "completed": done,
+                     "description": "Final" if done else "Scheduled",
+                     "detail": "Final" if done else when, "shortDetail": "Final" if done else when},
+        }
+        competitors = []
+        for side, name, score in (("home", home, hs), ("away", away, vs)):
+            competitors.append({
+                "id": str(TEAMS.index(name) + 1), "type": "team", "order": 0 if side == "home" else 1,
+                "homeAway": side, "winner": done and score == max(hs, vs),
+                "team": {"id": str(TEAMS.index(name) + 1), "location": name.rpartition(" ")[0],
+                         "name": name.rpartition(" ")[2], "abbreviation": name[:3].upper(),
+                         "displayName": name, "shortDisplayName": name.rpartition(" ")[2],
+                         "color": "000000", "alternateColor": "ffffff", "isActive": True,
+                         "logo": "https://a.espncdn.com/i/teamlogos/nba/500/%s.png" % name[:3].lower()},
+                "score": str(score),
+                "linescores": [{"value": score / 4.0} for _ in range(4)] if done else [],
+                "statistics": [{"name": n, "abbreviation": n[:3].upper(), "displayValue": str(rnd.randint(1, 50))}
+                               for n in ("rebounds", "assists", "fieldGoalsAttempted", "fieldGoalsMade",
+                                         "freeThrowPct", "threePointFieldGoalPct")],
+                "records": [{"name": "overall", "type": "total", "summary": "%d-%d" % (rnd.randint(0, 5), rnd.randint(0, 5))}],
+            })
+        events.append({
+            "id": str(401700000 + i), "uid": "s:40~l:59~e:%d" % i, "date": when,
+            "name": "%s at %s" % (away, home), "shortName": "%s @ %s" % (away[:3].upper(), home[:3].upper()),
+            "season": {"year": start.year, "type": 1, "slug": "summer"},
+            "competitions": [{
+                "id": str(401700000 + i), "date": when, "attendance": rnd.randint(2000, 12000),
+                "venue": {"id": "1", "fullName": "Thomas & Mack Center", "address": {"city": "Las Vegas", "state": "NV"}},
+                "competitors": competitors, "status": status,
+                "broadcasts": [{"market": "national", "names": ["NBA TV"]}],
+            }],
+            "status": status,
+            "links": [{"href": "https://www.espn.com/nba/game/_/gameId/%d" % (401700000 + i), "text": "Gamecast"}],
+        })
+    return {
+        "leagues": [{"id": "59", "name": "NBA Summer League", "abbreviation": "NBA SL",
+                     "calendar": [(start + timedelta(days=d)).strftime("%Y-%m-%dT07:00Z") for d in range(12)]}],
+        "season": {"type": 1, "year": start.year},
+        "day": {"date": start.strftime("%Y-%m-%d")},
+        "events": events,
+    }
+
+
+def rotowire_html(n_rows=120, seed=0, out_share=0.25):
+    """A RotoWire injury-report page: boilerplate around one row per
+    player, with a share of IMPACT_PLAYERS mixed in as ruled out."""
+    rnd  = random.Random(seed)
+    rows = []
+    impact = [(t, p) for t, ps in nba_bot.IMPACT_PLAYERS.items() for p in ps]
+    for i in range(n_rows):
+        if i % 3 == 0 and impact:
+            team, player = impact[(i // 3) % len(impact)]
+        else:
+            team, player = rnd.choice(TEAMS), "player%d" % i
+        status = "is out (knee) and has been ruled out" if rnd.random() < out_share else "questionable (ankle)"
+        rows.append(
+            '<div class="injury-report__row"><div class="team">%s</div>'
+            '<a class="player">%s %s</a><div class="status">%s</div>'
+            '<div class="news">%s %s %s for Friday.</div></div>'
+            % (team.split()[-1], "First", player.title(), status, player.title(), status, team)
+        )
+    nav = "".join('<a href="/basketball/team/%s">%s</a>' % (t.split()[-1].lower(), t) for t in TEAMS)
+    return "<html><head><title>NBA Injury Report</title></head><body><nav>%s</nav>%s%s</body></html>" % (
+        nav, "<div class='ad'>" + "x" * 2000 + "</div>", "".join(rows))
+
+
+def write_fixture(name, payload):
+    """Record a payload under bench/data/ (gitignored) and return its path."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, name)
+    with open(path, "w", encoding="utf-8") as f:
+        if isinstance(payload, str):
+            f.write(payload)
+        else:
+            json.dump(payload, f, ensure_ascii=False)
+    return path
@@ -0,0 +1,308 @@
+"""Per-stage benchmark suite.
+
+Replays recorded payloads (bench/payloads.py, written to bench/data/) through
+each pipeline stage offline -- no network, no Discord, no Gist -- over a
+grid of synthetic slate sizes, and reports wall time and peak traced memory
+per stage. Each stage's time is divided by a fixed pure-Python calibration
+loop timed between its repeats, so bench/baseline.json records
+machine-independent units rather than milliseconds and a busy or throttled
+machine slows both sides alike; any stage whose units exceed its baseline by
+more than --tolerance, and by more than NOISE_FLOOR_UNITS, fails the run
+(exit 1) -- after a second, longer measurement confirms it.
+
+    python -m bench.suite                     # compare against baseline
+    python -m bench.suite --update-baseline   # re-record after an intended change
+    python -m bench.suite --stage score --games 100 --books 40
+
+The calibration loop only cancels out the machine's overall speed, not
+differences in how it runs one kind of work against another; keep the
+tolerance generous enough for that and for CI noise. Re-record when a
+change is meant to move a stage, not when the suite moves to new hardware.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import nba_bot
+from bench import payloads
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# The median of fewer repeats than this is mostly noise on a shared runner.
+MIN_REPEAT = 5
+# Slowdowns under a quarter of a calibration pass (a few ms) are timer and
+# scheduler noise whatever the ratio; never fail on them.
+NOISE_FLOOR_UNITS = 0.25
+
+GAMES_GRID = (1, 15, 100)
+BOOKS_GRID = (1, 10, 40)
+
+
+def _odds(n_games, n_books):
+    path = payloads.write_fixture("odds_%dx%d.json" % (n_games, n_books),
+                                  payloads.odds_slate(n_games, n_books, start=_NOW + timedelta(hours=2)))
+    with open(path, encoding="utf-8") as f:
+        return [g for g in map(nba_bot.Game.from_odds, json.load(f)) if g]
+
+
+_NOW = datetime(2026, 1, 15, 12, 0)
+
+
+def _summer_power():
+    ev = payloads.espn_scoreboard(40, start=_NOW - timedelta(days=3))["events"]
+    return {nba_bot.zh_team_name(e.home): float(e.home_score - e.away_score)
+            for e in map(nba_bot.project_espn_event, ev) if e and e.completed}
+
+
+def _live(n_games, n_books):
+    """(scores, games, pregame) for one live-mode tick with every game in progress."""
+    games = _odds(n_games, n_books)
+    rnd = random.Random(0)
+    scores = [nba_bot.LiveScore(g.home, g.away, rnd.randint(20, 90), rnd.randint(20, 90),
+                                rnd.randint(1, 4), rnd.uniform(0, 720), "in") for g in games]
+    return scores, games, {g.id: rnd.uniform(-8, 8) for g in games}
+
+
+def _report(n_games, n_books):
+    """A realistically sized report string for the chunking stage."""
+    daily = nba_bot.score_games(_odds(n_games, n_books), {}, {}, _NOW)
+    out = "".join(nba_bot.format_pick_msg(p) for d in daily.values() for p in d.values())
+    report = nba_bot.shop_lines(_odds(n_games, n_books), now_utc=_NOW)
+    return out + nba_bot.format_line_shopping_section(report)
+
+
+def stage_cases():
+    """name -> list of (size label, setup() -> state, fn(state))."""
+    cases = {}
+
+    def add(stage, label, setup, fn):
+        cases.setdefault(stage, []).append((label, setup, fn))
+
+    for n in (100, 1230):
+        def setup(n=n):
+            path = payloads.write_fixture("bdl_%d.json" % n, {"data": payloads.season_games(n), "meta": {}})
+            with open(path, encoding="utf-8") as f:
+                return [nba_bot.project_bdl_game(g) for g in json.load(f)["data"]]
+        add("team_stats", "games=%d" % n, setup, nba_bot.ratings_from_games)
+
+    # A repeat poll against a long-lived solver: nothing new to fold in,
+    # and CG starts from the converged solution.
+    def setup_poll():
+        games  = [nba_bot.project_bdl_game(g) for g in payloads.season_games(1230)]
+        solver = nba_bot.RatingSolver()
+        nba_bot.ratings_from_games(games, solver)
+        return games, solver
+    add("team_stats", "games=1230 poll", setup_poll, lambda st: nba_bot.ratings_from_games(*st))
+    add("team_stats", "schedule games=1230",
+        lambda: [nba_bot.project_bdl_game(g) for g in payloads.season_games(1230)], nba_bot.ScheduleIndex)
+
+    # The player store folding a season of box scores (the first-run
+    # backfill), and the lineup table built from the full store.
+    def setup_box():
+        path = payloads.write_fixture("bdl_stats_1230.json", {"data": payloads.box_scores(payloads.season_games(1230))})
+        with open(path, encoding="utf-8") as f:
+            return [r for r in map(nba_bot.project_bdl_stat, json.load(f)["data"]) if r]
+    add("team_stats", "box fold games=1230", setup_box, lambda rows: nba_bot.fold_box_scores({}, rows))
+
+    def setup_store():
+        store = {}
+        nba_bot.fold_box_scores(store, setup_box())
+        return store
+    add("team_stats", "impacts games=1230", setup_store, nba_bot.build_player_impacts)
+
+    for rows in (50, 400):
+        def setup(rows=rows):
+            path = payloads.write_fixture("rotowire_%d.html" % rows, payloads.rotowire_html(rows))
+            with open(path, encoding="utf-8") as f:
+                return f.read()
+        add("injuries", "rows=%d" % rows, setup, nba_bot.parse_injury_report)
+
+    for g in GAMES_GRID:
+        for b in BOOKS_GRID:
+            label = "games=%d books=%d" % (g, b)
+            add("score", label, lambda g=g, b=b: _odds(g, b),
+                lambda games: [nba_bot.allocate_portfolio(list(d.values()), 1000.0)
+                               for d in nba_bot.score_games(games, {}, {}, _NOW).values()])
+            add("line_shop", label, lambda g=g, b=b: _odds(g, b),
+                lambda games: nba_bot.shop_lines(games, now_utc=_NOW))
+
+    # Three regions' boards merged (parsing included), and scoring the
+    # tripled book universe that comes out of it.
+    for g in (15, 100):
+        def setup(g=g):
+            return [(r, payloads.odds_slate(g, 40, start=_NOW + timedelta(hours=2), book_offset=40 * i))
+                    for i, r in enumerate(("us", "uk", "eu"))]
+        add("regions", "games=%d books=3x40" % g, setup,
+            lambda boards: nba_bot.merge_boards([[nba_bot.Game.from_odds(e, r) for e in b] for r, b in boards]))
+        add("score", "games=%d books=120" % g, lambda g=g: _odds(g, 120),
+            lambda games: [nba_bot.allocate_portfolio(list(d.values()), 1000.0)
+                           for d in nba_bot.score_games(games, {}, {}, _NOW).values()])
+
+    # Prop profiles from a full season's store, and scoring every prop line
+    # of the slate (three markets, 26 players a game) against them.
+    add("props", "profiles games=1230", setup_store, nba_bot.build_prop_profiles)
+    for g in (15, 100):
+        def setup(g=g):
+            games = _odds(g, 10)
+            for game, event in zip(games, payloads.odds_slate(g, 10, start=_NOW + timedelta(hours=2))):
+                game.add_outcomes(nba_bot.parse_bookmakers(payloads.prop_odds(event, 10)["bookmakers"]))
+            return games, nba_bot.build_prop_profiles(setup_store())
+        add("props", "games=%d books=10" % g, setup,
+            lambda st: nba_bot.score_props(nba_bot.PROPS, st[0], st[1], {}, _NOW))
+
+    for g in (1, 15, 100):
+        add("summer", "games=%d books=10" % g, lambda g=g: (_odds(g, 10), _summer_power()),
+            lambda st: nba_bot.summer_recommendations(st[0], st[1], now_utc=_NOW))
+
+    for g in (15, 100):
+        add("live", "games=%d books=40" % g, lambda g=g: _live(g, 40),
+            lambda st: nba_bot.evaluate_live(*st))
+
+    for g in (15, 100):
+        add("chunking", "games=%d books=40" % g, lambda g=g: _report(g, 40), nba_bot.chunk_message)
+
+    for g in (15, 100):
+        def setup(g=g):
+            daily = nba_bot.score_games(_odds(g, 40), {}, {}, _NOW)
+            history = {
+                "h%d" % i: {"date": "2026-01-%02d" % (1 + i % 28), "bet": "x +3.5", "book": "b",
+                            "price": 1.91, "prob": 0.6, "edge": 0.1, "kelly_stake": 20.0,
+                            "result": ("win", "loss", "pending")[i % 3]}
+                for i in range(500)
+            }
+            return daily, history
+        add("export", "games=%d books=40" % g, setup, _export)
+    return cases
+
+
+def _export(state):
+    daily, history = state
+    nba_bot.export_site_data(
+        now_tw=_NOW, data_source="bench", is_official_run=False, daily_picks=daily,
+        today_s=_NOW.strftime("%Y-%m-%d"), total_rec=0, wins=0, win_rate=0.0, profit=0.0,
+        summer_league={"available": False}, history=history,
+    )
+
+
+def _calibration_loop():
+    """Fixed dict/float/sort work, the same mix as the stages."""
+    acc = {}
+    for i in range(40000):
+        k = i % 997
+        acc[k] = acc.get(k, 0.0) + math.sqrt(i) * 0.5
+    return sorted(acc.values())
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - t0
+
+
+def warm_up(seconds=2.0):
+    """Spin the calibration loop until the machine settles; the first
+    seconds of a run time it up to 3x slower (clock ramp-up)."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        _calibration_loop()
+
+
+def measure(setup, fn, repeat):
+    """(median seconds, units, peak traced bytes), over at least MIN_REPEAT
+    repeats. Units are the median time over the median calibration pass,
+    one pass run before and after every repeat; a best-of ratio lets one
+    lucky calibration pass fail a stage that didn't move."""
+    repeat = max(repeat, MIN_REPEAT)
+    state  = setup()
+    fn(state)                      # warm caches (team names)
+    gc.collect()
+    gc.disable()
+    try:
+        units = [_timed(_calibration_loop)]
+        times = []
+        for _ in range(repeat):
+            times.append(_timed(fn, state))
+            units.append(_timed(_calibration_loop))
+    finally:
+        gc.enable()
+    tracemalloc.start()
+    fn(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    mid = statistics.median(times)
+    return mid, mid / statistics.median(units), peak
+
+
+def regressed(units, base, tolerance):
+    return units > base * (1 + tolerance) and units - base > NOISE_FLOOR_UNITS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stage", action="append", help="only run these stages")
+    parser.add_argument("--repeat", type=int, default=MIN_REPEAT,
+                        help="timed repeats per stage (at least %d)" % MIN_REPEAT)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown vs baseline, as a fraction (default 0.5 = +50%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    nba_bot.log.setLevel("WARNING")
+    tmp = tempfile.mkdtemp(prefix="nba_bench_")
+    nba_bot.SITE_DATA_DIR = tmp
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    warm_up()
+    results, failures = {}, []
+    print("%-11s %-22s %10s %10s %12s %10s" % ("stage", "size", "ms", "units", "peak alloc", "vs base"))
+    for stage, runs in stage_cases().items():
+        if args.stage and stage not in args.stage:
+            continue
+        for label, setup, fn in runs:
+            seconds, units, peak = measure(setup, fn, args.repeat)
+            key   = "%s | %s" % (stage, label)
+            base  = baseline.get(key, {}).get("units")
+            if base and regressed(units, base, args.tolerance) and not args.update_baseline:
+                # A regression has to reproduce: measure again at twice
+                # the repeats and keep the lower of the two.
+                again = measure(setup, fn, args.repeat * 2)
+                seconds, units = min(seconds, again[0]), min(units, again[1])
+            ratio = (units / base) if base else None
+            results[key] = {"units": round(units, 6), "seconds": round(seconds, 6), "peak_bytes": peak}
+            if base and regressed(units, base, args.tolerance):
+                failures.append(key)
+            print("%-11s %-22s %10.2f %10.4f %11.1fK %10s%s" % (
+                stage, label, seconds * 1000, units, peak / 1024,
+                ("%.2fx" % ratio) if ratio else "-",
+                "  REGRESSION" if key in failures else "",
+            ))
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Baseline written: %s" % args.baseline)
+        return 0
+    if failures:
+        print("%d stage(s) regressed beyond +%d%%: %s" % (len(failures), args.tolerance * 100, ", ".join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Local stand-in for every upstream the bot talks to.
+
+One threaded HTTP server answering, under /<real host>/<real path>, the
+Odds API (odds per region, per-event player props, scores, sports list),
+balldontlie (/v1/games and /v1/stats with cursor pagination), the ESPN scoreboard, the RotoWire injury page,
+the GitHub gist API (the history gist kept in memory) and Discord
+webhooks. nba_bot is pointed at it with NBA_UPSTREAM (see http_session),
+which rewrites https://<host>/<path> to <NBA_UPSTREAM>/<host>/<path>.
+
+Every response can be delayed (--latency ms, exponential around the mean)
+and replaced by a 500 (--error-rate) or a 429 with Retry-After
+(--throttle-rate); faults come from one seeded RNG, so a run's fault
+sequence is reproducible for a given request order. Bodies are built once
+from bench/payloads.py at any slate size.
+
+    python -m bench.upstream --port 8765 --games 15 --books 40 --latency 40
+    NBA_UPSTREAM=http://127.0.0.1:8765 ODDS_API_KEY=x DISCORD_WEBHOOK=https://discord.com/api/webhooks/1/x \\
+        python nba_bot.py
+
+bench/e2e.py drives run() against it and reports throughput and tail latency.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import nba_bot
+from bench import payloads
+
+GIST_ID = "standin"
+
+
+class Upstream:
+    """Canned upstream state and fault settings, shared by the handler threads."""
+
+    def __init__(self, games=15, books=40, season=1230, final_ratio=0.6, injury_rows=120,
+                 espn_events=12, latency_ms=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, seed=0, now=None):
+        now = now or datetime.utcnow()
+        self.latency_ms    = latency_ms
+        self.error_rate    = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after   = retry_after
+        self.rnd   = random.Random(seed)
+        self.lock  = threading.Lock()
+        self.stats = Counter()
+        self.discord_messages = []
+        self.gist_files = {"history.json": "{}", "analytics.json": "{}"}
+
+        # Every region quotes the same events under its own `books` books.
+        self.odds = {
+            region: _dump(payloads.odds_slate(games, books, start=now + timedelta(hours=2), seed=seed,
+                                              book_offset=i * books))
+            for i, region in enumerate(nba_bot.ODDS_REGION_CHOICES)
+        }
+        self.props = {
+            e["id"]: _dump(payloads.prop_odds(e, books, seed=seed))
+            for e in json.loads(self.odds["us"])
+        }
+        season_rows = payloads.season_games(season, final_ratio=final_ratio, seed=seed,
+                                            start=now - timedelta(days=int(season * final_ratio) // 7 + 1))
+        self.bdl_pages = [_dump(p) for p in payloads.bdl_pages(season_rows)]
+        self.bdl_cursor = {
+            page["meta"]["next_cursor"]: i + 1
+            for i, page in enumerate(payloads.bdl_pages(season_rows)) if "next_cursor" in page["meta"]
+        }
+        self.stats_by_date = {}
+        for row in payloads.box_scores(season_rows, seed=seed):
+            self.stats_by_date.setdefault(row["game"]["date"], []).append(row)
+        self.rotowire = payloads.rotowire_html(injury_rows, seed=seed).encode("utf-8")
+        self.espn     = _dump(payloads.espn_scoreboard(espn_events, seed=seed))
+
+    def fault(self):
+        """None, or the (status, headers) to answer with instead."""
+        with self.lock:
+            roll = self.rnd.random()
+            delay = self.rnd.expovariate(1.0 / self.latency_ms) / 1000.0 if self.latency_ms else 0.0
+        if delay:
+            time.sleep(delay)
+        if roll < self.throttle_rate:
+            return 429, {"Retry-After": str(self.retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {}
+        return None
+
+    def route(self, method, host, path, query, body):
+        """(status, content type, body bytes) for one request."""
+        if host == "api.the-odds-api.com":
+            if path.endswith("/odds/") or path.endswith("/odds"):
+                if "/events/" in path:
+                    # Player props per event; period markets aren't served.
+                    if query.get("markets", [""])[0].startswith("player_"):
+                        event = path.split("/events/", 1)[1].split("/", 1)[0]
+                        return 200, "application/json", self.props.get(event, b"{}")
+                    return 200, "application/json", b"{}"
+                region = query.get("regions", ["us"])[0].split(",")[0]
+                return 200, "application/json", self.odds.get(region, self.odds["us"])
+            if path.endswith("/scores/"):
+                return 200, "application/json", b"[]"
+            return 200, "application/json", _dump([
+                {"key": "basketball_nba", "group": "Basketball", "title": "NBA", "active": True},
+            ])
+        if host == "api.balldontlie.io":
+            if path == "/v1/games":
+                cursor = query.get("cursor", [None])[0]
+                page = self.bdl_cursor.get(int(cursor), len(self.bdl_pages)) if cursor else 0
+                return 200, "application/json", self.bdl_pages[page] if page < len(self.bdl_pages) else b'{"data":[],"meta":{}}'
+            if path == "/v1/stats":
+                rows  = [r for d in query.get("dates[]", []) for r in self.stats_by_date.get(d, [])]
+                start = int(query.get("cursor", ["0"])[0])
+                per   = int(query.get("per_page", ["25"])[0])
+                meta  = {"per_page": per}
+                if start + per < len(rows):
+                    meta["next_cursor"] = start + per
+                return 200, "application/json", _dump({"data": rows[start:start + per], "meta": meta})
+        if host == "www.rotowire.com":
+            return 200, "text/html; charset=utf-8", self.rotowire
+        if host == "site.api.espn.com":
+            return 200, "application/json", self.espn
+        if host == "api.github.com":
+            if method == "GET" and path == "/gists":
+                return 200, "application/json", _dump([self._gist()])
+            if method in ("PATCH", "POST"):
+                for name, f in (json.loads(body or b"{}").get("files") or {}).items():
+                    with self.lock:
+                        self.gist_files[name] = f.get("content", "")
+                return 200, "application/json", _dump(self._gist())
+        if host == "gist.githubusercontent.com":
+            return 200, "application/json", self.gist_files.get(path.rsplit("/", 1)[-1], "{}").encode("utf-8")
+        if host in ("discord.com", "discordapp.com") and method == "POST":
+            with self.lock:
+                self.discord_messages.append(json.loads(body or b"{}").get("content", ""))
+            return 204, "application/json", b""
+        return 404, "application/json", b'{"message":"not found"}'
+
+    def _gist(self):
+        return {
+            "id": GIST_ID, "description": "nba_bot_history",
+            "files": {
+                name: {"filename": name, "raw_url": "https://gist.githubusercontent.com/%s/raw/%s" % (GIST_ID, name)}
+                for name in self.gist_files
+            },
+        }
+
+
+def _dump(obj):
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, every
+    # keep-alive response would stall on the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def _serve(self):
+        up    = self.server.upstream
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip("/").partition("/")
+        body  = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        fault = up.fault()
+        if fault:
+            status, headers = fault
+            ctype, payload = "application/json", b'{"message":"stand-in fault"}'
+        else:
+            headers = {}
+            status, ctype, payload = up.route(self.command, host, "/" + path, parse_qs(parts.query), body)
+        with up.lock:
+            up.stats[(host, status)] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PATCH = _serve
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(upstream, host="127.0.0.1", port=0):
+    """Start the stand-in on a daemon thread; returns (server, base URL)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.upstream = upstream
+    threading.Thread(target=server.serve_forever, name="upstream", daemon=True).start()
+    return server, "http://%s:%d" % server.server_address[:2]
+
+
+def add_arguments(parser):
+    parser.add_argument("--games", type=int, default=15, help="games on the odds board")
+    parser.add_argument("--books", type=int, default=40, help="books quoting each game")
+    parser.add_argument("--season", type=int, default=1230, help="games in the balldontlie season")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean added latency per request, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds on a 429")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def from_args(args):
+    return Upstream(games=args.games, books=args.books, season=args.season, latency_ms=args.latency,
+                    error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+                    retry_after=args.retry_after, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    server, base = serve(from_args(args), args.host, args.port)
+    print("Upstream stand-in on %s (Ctrl-C to stop)" % base)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
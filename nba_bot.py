@@ -1,8 +1,19 @@
-import requests
 import os
 import random
+import sys
+import bisect
+import copy
 import logging
 import json
+import time
+import gzip
+import base64
+import hashlib
+import math
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import namedtuple
 from datetime import datetime, timedelta
 
 logging.basicConfig(level=logging.INFO)
@@ -15,7 +26,30 @@ WEBHOOK         = os.getenv("DISCORD_WEBHOOK", "")
 GITHUB_TOKEN    = os.getenv("GH_TOKEN", "")
 BALLDONTLIE_KEY = os.getenv("BALLDONTLIE_KEY", "")
 
-SITE_DATA_PATH = os.getenv("SITE_DATA_PATH", "docs/data/latest.json")
+# Dashboard data: manifest.json plus content-hashed shards/ (see
+# write_site_data).
+SITE_DATA_DIR = os.getenv("SITE_DATA_DIR", "docs/data")
+
+# Extra notification destinations next to DISCORD_WEBHOOK (see notify()).
+NOTIFY_SINKS = os.getenv("NOTIFY_SINKS", "")
+
+# Small JSON state carried between runs (discovered slugs, fetched results).
+# The workflow restores/saves this directory with actions/cache; losing it
+# only costs a rediscovery or refetch.
+CACHE_DIR = os.getenv("NBA_CACHE_DIR", ".cache")
+
+# NBA_UPSTREAM=http://127.0.0.1:8765 sends every request to a local
+# stand-in (bench/upstream.py) as <NBA_UPSTREAM>/<host>/<path> instead of
+# the real APIs, for load and failure testing.
+UPSTREAM_URL = os.getenv("NBA_UPSTREAM", "")
+
+# Run instrumentation (see span()/count()). Off by default; NBA_METRICS=1
+# writes run_report.json into SITE_DATA_DIR, NBA_OPENMETRICS_PATH adds
+# an OpenMetrics text copy, NBA_PROFILE_STAGE=<span name> cProfiles that one
+# span (works with or without NBA_METRICS).
+METRICS_ENABLED  = os.getenv("NBA_METRICS", "") not in ("", "0")
+OPENMETRICS_PATH = os.getenv("NBA_OPENMETRICS_PATH", "")
+PROFILE_STAGE    = os.getenv("NBA_PROFILE_STAGE", "")
 
 
 def current_season_year(now=None):
@@ -39,8 +73,21 @@ SUMMER_LEAGUE_ESPN_SLUGS = [
     "nba-summer-sacramento",
     "nba-summer-california",
 ]
+# Late June (California Classic / Salt Lake) into early August (Las Vegas
+# finals run long some years), as (month, day) bounds.
+SUMMER_LEAGUE_WINDOW      = ((6, 25), (8, 5))
+SUMMER_SLUG_CACHE         = "summer_slug.json"
+SUMMER_SLUG_TTL_DAYS      = 7
+SUMMER_SLUG_PROBE_TIMEOUT = 6
+SUMMER_RESULTS_CACHE      = "summer_results_%d.json"
+SUMMER_BACKFILL_WORKERS   = 6
+SUMMER_DEAD_STATUSES      = ("postponed", "canceled", "cancelled")
 
 SIMS             = 50000
+# Simulation run seed (random per run unless set) and worker processes;
+# see the Simulation section.
+SIM_SEED         = os.getenv("NBA_SIM_SEED", "")
+SIM_WORKERS      = int(os.getenv("NBA_SIM_WORKERS", "1"))
 EDGE_THRESHOLD   = 0.06
 MODEL_WEIGHT     = 0.35
 MARKET_WEIGHT    = 0.65
@@ -51,8 +98,61 @@ MIN_SPREAD       = 3.0
 MIN_PRICE        = 1.75
 MAX_PRICE        = 2.15
 DISCORD_CHAR_LIMIT = 1900
-BANKROLL         = 1000.0
+
+# Margin rating solver (RatingSolver). Ridge pulls every team's offense /
+# defense term toward league average by RATING_RIDGE games' worth of
+# evidence, which keeps October ratings sane. RATING_HALF_LIFE_DAYS > 0
+# down-weights older games exponentially; 0 weights the season evenly.
+RATING_RIDGE          = 5.0
+RATING_HALF_LIFE_DAYS = float(os.getenv("RATING_HALF_LIFE_DAYS", "0"))
+
+# Schedule context (ScheduleIndex), in points of margin. balldontlie dates
+# are US dates; shifting an Odds API UTC tip-off back 6 hours lands every
+# NBA start time (noon to 10:30pm ET) on the right one.
+B2B_PENALTY           = 1.5
+THREE_IN_FOUR_PENALTY = 0.8
+EXTRA_REST_BONUS      = 0.5
+ROAD_TRIP_PENALTY     = 0.4
+ROAD_TRIP_MAX_PENALTY = 1.2
+US_DATE_OFFSET_HOURS  = 6
+
+# h2h/spreads/totals all come back in the one bulk /odds request per run.
+# Period markets (e.g. "spreads_h1,h2h_h1") need a per-event request each,
+# so they're opt-in -- see fetch_period_odds.
+ODDS_MARKETS        = "h2h,spreads,totals"
+ODDS_PERIOD_MARKETS = [m for m in os.getenv("ODDS_PERIOD_MARKETS", "").split(",") if m]
+
+# Odds API regions to pull books from, e.g. ODDS_REGIONS=us,uk,eu. Each
+# region is its own request (fetched concurrently, see fetch_board) and
+# costs its own share of the monthly quota.
+ODDS_REGION_CHOICES = ("us", "us2", "uk", "eu", "au")
+ODDS_REGIONS = [
+    r.strip() for r in os.getenv("ODDS_REGIONS", "us").split(",") if r.strip() in ODDS_REGION_CHOICES
+] or ["us"]
+
+# Sharp-book weighting for Game.consensus (CONSENSUS_SHARP=1): books that
+# take big limits and move first count this many times an ordinary book.
+CONSENSUS_SHARP = os.getenv("CONSENSUS_SHARP", "") not in ("", "0")
+SHARP_BOOKS = {
+    "Pinnacle":     3.0,
+    "Circa Sports": 2.0,
+    "Betfair":      2.0,
+    "Matchbook":    2.0,
+    "BetOnline.ag": 1.5,
+    "LowVig.ag":    1.5,
+}
+
+# Share of a full game each period market covers. Margin mean (and the home
+# edge inside it) scales linearly with playing time; its spread with the
+# square root, as for a sum of independent possessions.
+MARKET_PERIODS = {"": 1.0, "_h1": 0.5, "_q1": 0.25}
+PERIOD_ZH      = {"": "", "_h1": "上半場", "_q1": "第一節"}
+# Markets the scoring engine scores by default; a moneyline is a 0-point spread.
+SCORED_MARKETS = ("spreads", "h2h")
+BANKROLL         = 1000.0   # starting bankroll; current_bankroll() adds settled P&L on top
 KELLY_FRACTION   = 0.20
+PORTFOLIO_GAME_CAP     = 0.05   # max fraction of bankroll on any single pick (one per game id)
+PORTFOLIO_MAX_EXPOSURE = 0.15   # max fraction of bankroll across one day's slate
 
 # Below this many settled picks, a win-rate swings wildly on pure variance
 # (e.g. 2/3 vs 1/3 look like a 33-point spread but are both just "one game
@@ -127,6 +227,21 @@ SUPERSTAR_PENALTY = 11.5
 STAR_PENALTY      = 8.0
 LIMITED_PENALTY   = 5.0
 
+# Data-driven player impacts (build_player_impacts), which replace the flat
+# penalties above for every team the box-score store covers. Values are
+# points of margin a team loses without the player.
+PLAYER_STATS_CACHE         = "player_stats_%d.json"
+PLAYER_STATS_WORKERS       = 4
+PLAYER_STATS_DATES_PER_RUN = 40     # backfill budget per run; a fresh season catches up over a few runs
+PLAYER_ONOFF_PRIOR_GAMES   = 10.0   # games missed at which on/off and the box-score prior weigh equally
+PLAYER_REPLACEMENT_GMSC48  = 10.0   # game score per 48 minutes of a replacement-level player
+PLAYER_BOX_SCALE           = 0.35   # game score per 48 above replacement -> margin points per 48
+PLAYER_BOX_OFF_SHARE       = 0.6    # the prior's offense/defense split (as the flat penalties used)
+PLAYER_MIN_GAMES           = 5
+PLAYER_STALE_DAYS          = 30     # unseen this long before his team's latest game: dropped
+PLAYER_MAX_IMPACT          = 9.0
+PLAYER_IMPACT_TOP          = 8      # players per team kept in the lineup table
+
 FALLBACK_RATINGS = {
     "Los Angeles Lakers":     {"off": 120.0, "def": 111.0},
     "Boston Celtics":         {"off": 117.5, "def": 111.5},
@@ -189,33 +304,773 @@ TEAM_ALIASES = {
 }
 
 
+_NORMALIZED_TEAMS = {}
+
+
 def normalize_team(name):
     if not name:
         return name
+    # Every outcome of every book goes through here, so the substring scan
+    # over TEAM_CN is memoized -- the set of distinct names is tiny.
+    cached = _NORMALIZED_TEAMS.get(name)
+    if cached is not None:
+        return cached
     n = name.lower()
     n = TEAM_ALIASES.get(n, n)
+    result = name
     for full in TEAM_CN:
         if n in full.lower() or full.lower() in n:
-            return full
-    return name
+            result = full
+            break
+    _NORMALIZED_TEAMS[name] = result
+    return result
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+_SPAN_STACK = []
+_SPAN_ROOTS = []
+_COUNTERS   = {}
+
+
+class _Span:
+    __slots__ = ("name", "start", "seconds", "children", "profiler")
+
+    def __init__(self, name):
+        self.name     = name
+        self.start    = 0.0
+        self.seconds  = 0.0
+        self.children = []
+        self.profiler = None
+
+    def __enter__(self):
+        (_SPAN_STACK[-1].children if _SPAN_STACK else _SPAN_ROOTS).append(self)
+        _SPAN_STACK.append(self)
+        if self.name == PROFILE_STAGE:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.start
+        _SPAN_STACK.pop()
+        if self.profiler is not None:
+            self.profiler.disable()
+            _dump_profile(self)
+        return False
+
+    def to_dict(self):
+        d = {"name": self.name, "seconds": round(self.seconds, 4)}
+        if self.children:
+            d["children"] = [c.to_dict() for c in self.children]
+        return d
+
+
+def span(name):
+    """Time a pipeline stage: `with span("fetch_odds"): ...`. Spans nest, so
+    the report shows e.g. run > analyze_summer_league > summer_scores. When
+    metrics are off (and this isn't the profiled stage) this hands back a
+    shared no-op context manager -- one global check, no allocation."""
+    if not METRICS_ENABLED and name != PROFILE_STAGE:
+        return _NULL_SPAN
+    if threading.current_thread() is not threading.main_thread():
+        # The span stack is per run, not per thread; worker-thread stages
+        # are covered by the span around the pool on the main thread.
+        return _NULL_SPAN
+    return _Span(name)
+
+
+# Fetches fan out to worker threads (see discover_summer_slug), so counter
+# updates are serialized. Spans are only ever opened on the main thread.
+_COUNTER_LOCK = threading.Lock()
+
+
+def count(name, n=1, **labels):
+    """Bump a run counter (HTTP requests by host, simulated outcomes, ...)."""
+    if not METRICS_ENABLED:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _COUNTER_LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + n
+
+
+def _dump_profile(sp):
+    import io
+    import pstats
+    path = os.path.join(SITE_DATA_DIR, "profile_%s.prof" % sp.name)
+    try:
+        sp.profiler.dump_stats(path)
+    except OSError as e:
+        log.error("Failed to write profile: %s", e)
+    out = io.StringIO()
+    pstats.Stats(sp.profiler, stream=out).sort_stats("cumulative").print_stats(20)
+    log.info("Profile of stage '%s' (%.3fs), full stats in %s:\n%s", sp.name, sp.seconds, path, out.getvalue())
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:   # not available on Windows
+        return None
+    # ru_maxrss is KB on Linux, bytes on macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if os.uname().sysname == "Darwin" else rss * 1024
+
+
+def build_run_report():
+    counters = {}
+    for (name, labels), n in sorted(_COUNTERS.items()):
+        counters.setdefault(name, []).append({"labels": dict(labels), "value": n})
+    return {
+        "version":        VERSION,
+        "generated_at":   datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "spans":          [sp.to_dict() for sp in _SPAN_ROOTS],
+        "counters":       counters,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def format_openmetrics(report):
+    lines  = ["# TYPE nba_bot_stage_seconds gauge", "# UNIT nba_bot_stage_seconds seconds"]
+    stages = {}
+
+    # Repeated spans under one parent (one allocate_portfolio per slate day)
+    # are summed -- OpenMetrics allows only one sample per label set.
+    def walk(spans, prefix):
+        for sp in spans:
+            path = prefix + sp["name"]
+            stages[path] = stages.get(path, 0.0) + sp["seconds"]
+            walk(sp.get("children", []), path + "/")
+    walk(report["spans"], "")
+    for path, seconds in stages.items():
+        lines.append('nba_bot_stage_seconds{stage="%s"} %s' % (path, round(seconds, 4)))
+
+    for name, series in report["counters"].items():
+        lines.append("# TYPE nba_bot_%s counter" % name)
+        for s in series:
+            labels = ",".join('%s="%s"' % kv for kv in sorted(s["labels"].items()))
+            lines.append("nba_bot_%s_total%s %s" % (name, "{%s}" % labels if labels else "", s["value"]))
+    if report["peak_rss_bytes"] is not None:
+        lines.append("# TYPE nba_bot_peak_rss_bytes gauge")
+        lines.append("nba_bot_peak_rss_bytes %d" % report["peak_rss_bytes"])
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def write_run_report():
+    report = build_run_report()
+    path   = os.path.join(SITE_DATA_DIR, "run_report.json")
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if OPENMETRICS_PATH:
+            with open(OPENMETRICS_PATH, "w", encoding="utf-8") as f:
+                f.write(format_openmetrics(report))
+        log.info("Run report written: %s", path)
+    except OSError as e:
+        log.error("Failed to write run report: %s", e)
+    return report
+
+
+def _host(url):
+    return url.split("/")[2] if "://" in url else url
+
+
+# One pooled session for every fetch, so concurrent league / backfill
+# workers share keep-alive connections per host instead of each request
+# opening its own. requests (with urllib3 under it) is by far the most
+# expensive import here, so it is only loaded -- and the session built --
+# the first time something actually goes to the network; re-scoring a
+# saved snapshot never pays for it.
+_HTTP      = None
+_HTTP_LOCK = threading.Lock()
+
+
+def http_session():
+    global _HTTP
+    if _HTTP is None:
+        with _HTTP_LOCK:
+            if _HTTP is None:
+                import requests
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16)
+                if UPSTREAM_URL:
+                    _redirect_upstream(adapter, UPSTREAM_URL.rstrip("/"))
+                    session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _HTTP = session
+    return _HTTP
+
+
+def _redirect_upstream(adapter, base):
+    send = adapter.send
+
+    def send_upstream(request, **kwargs):
+        request.url = base + "/" + request.url.split("://", 1)[1]
+        return send(request, **kwargs)
+
+    adapter.send = send_upstream
+
+
+# Throttling (429) and server-side errors are retried, honouring
+# Retry-After up to RETRY_MAX_WAIT seconds and otherwise backing off
+# 0.5s, 1s, ...; any other 4xx fails at once, as before.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_MAX_WAIT = 5.0
+
+
+def _retry_wait(response, attempt):
+    """Seconds to wait before retrying an error response, or None."""
+    if response is None or response.status_code not in RETRY_STATUSES:
+        return None
+    try:
+        wait = float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        wait = 0.5 * 2 ** (attempt - 1)
+    return min(max(wait, 0.0), RETRY_MAX_WAIT)
 
 
 def safe_get(url, headers=None, params=None, retries=3, timeout=15):
+    session = http_session()
+    import requests
     for attempt in range(1, retries + 1):
+        count("http_requests", host=_host(url))
         try:
-            r = requests.get(url, headers=headers, params=params, timeout=timeout)
+            r = session.get(url, headers=headers, params=params, timeout=timeout)
             r.raise_for_status()
             return r.json()
         except requests.exceptions.Timeout:
+            count("http_errors", host=_host(url), kind="timeout")
             log.warning("Timeout attempt %d/%d: %s", attempt, retries, url)
         except requests.exceptions.HTTPError as e:
+            count("http_errors", host=_host(url), kind=str(e.response.status_code))
             log.error("HTTP error %s: %s", e.response.status_code, url)
-            break
+            wait = _retry_wait(e.response, attempt)
+            if wait is None or attempt == retries:
+                break
+            time.sleep(wait)
         except Exception as e:
+            count("http_errors", host=_host(url), kind="other")
             log.warning("Request failed attempt %d/%d: %s", attempt, retries, e)
     return None
 
 
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WS      = " \t\r\n"
+_JSON_NUMBER_START = "-0123456789"
+_JSON_NUMBER_END   = ",]}" + _JSON_WS
+STREAM_CHUNK  = 64 * 1024
+
+
+def iter_json_array(chunks, array_key=None, meta=None):
+    """Yield the elements of one JSON array as text chunks arrive.
+
+    Handles a top-level array (Odds API) or a top-level object whose
+    `array_key` member is the array (balldontlie "data", ESPN "events");
+    every other top-level member of that object is decoded whole into
+    `meta` (pagination cursors and the like are small). Only the element
+    currently being decoded is ever held as a dict, so the full nested tree
+    for a 100-game page never exists at once -- the caller projects each
+    element down to what it needs and lets the rest go.
+    """
+    chunks = iter(chunks)
+    state  = {"buf": "", "pos": 0}
+
+    def fill():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        state["buf"] = state["buf"][state["pos"]:] + chunk
+        state["pos"] = 0
+        return True
+
+    def peek():
+        while True:
+            buf, pos = state["buf"], state["pos"]
+            while pos < len(buf) and buf[pos] in _JSON_WS:
+                pos += 1
+            state["pos"] = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                raise ValueError("JSON stream ended early")
+
+    def value():
+        if peek() in _JSON_NUMBER_START:
+            # A bare number decodes "successfully" from any prefix ("-2" of
+            # "-2.5"), so wait until its terminator has arrived.
+            while not any(c in _JSON_NUMBER_END for c in state["buf"][state["pos"]:]):
+                if not fill():
+                    break
+        while True:
+            try:
+                obj, end = _JSON_DECODER.raw_decode(state["buf"], state["pos"])
+            except ValueError:
+                if not fill():
+                    raise
+                continue
+            state["pos"] = end
+            return obj
+
+    def array():
+        if peek() != "[":
+            raise ValueError("expected JSON array")
+        state["pos"] += 1
+        if peek() == "]":
+            state["pos"] += 1
+            return
+        while True:
+            yield value()
+            c = peek()
+            state["pos"] += 1
+            if c == "]":
+                return
+            if c != ",":
+                raise ValueError("malformed JSON array")
+
+    if peek() == "[" and array_key is None:
+        yield from array()
+        return
+    if peek() != "{":
+        raise ValueError("expected JSON object")
+    state["pos"] += 1
+    while peek() != "}":
+        key = value()
+        if peek() != ":":
+            raise ValueError("malformed JSON object")
+        state["pos"] += 1
+        if key == array_key:
+            yield from array()
+        elif meta is not None:
+            meta[key] = value()
+        else:
+            value()
+        if peek() == ",":
+            state["pos"] += 1
+    state["pos"] += 1
+
+
+# Compact per-game records projected out of the upstream payloads as they
+# stream in -- only the handful of fields the models actually read.
+GameRow     = namedtuple("GameRow", "date status home away home_score away_score")
+SummerEvent = namedtuple("SummerEvent", "date status completed home home_score away away_score")
+
+
+def project_bdl_game(g):
+    return GameRow(
+        (g.get("date") or "")[:10],
+        g.get("status"),
+        (g.get("home_team") or {}).get("full_name", ""),
+        (g.get("visitor_team") or {}).get("full_name", ""),
+        g.get("home_team_score") or 0,
+        g.get("visitor_team_score") or 0,
+    )
+
+
+StatRow = namedtuple("StatRow", "game_id date status team team_score opp_score player minutes gmsc pts reb ast")
+
+
+def _stat_minutes(value):
+    """balldontlie minutes ("34:12", "34", "", None) as a float."""
+    mins, _, secs = str(value or "").partition(":")
+    try:
+        return int(mins or 0) + (int(secs) / 60.0 if secs else 0.0)
+    except ValueError:
+        return 0.0
+
+
+def project_bdl_stat(s):
+    """One /v1/stats box-score line; None for a DNP. `gmsc` is Hollinger's
+    game score, the box-score prior of build_player_impacts; pts/reb/ast
+    feed the player-prop distributions."""
+    minutes = _stat_minutes(s.get("min"))
+    game    = s.get("game") or {}
+    if not minutes or not game.get("id"):
+        return None
+    team    = s.get("team") or {}
+    player  = s.get("player") or {}
+    is_home = team.get("id") == game.get("home_team_id")
+    hs, vs  = game.get("home_team_score") or 0, game.get("visitor_team_score") or 0
+
+    def v(key):
+        return s.get(key) or 0
+
+    gmsc = (v("pts") + 0.4 * v("fgm") - 0.7 * v("fga") - 0.4 * (v("fta") - v("ftm"))
+            + 0.7 * v("oreb") + 0.3 * v("dreb") + v("stl") + 0.7 * v("ast") + 0.7 * v("blk")
+            - 0.4 * v("pf") - v("turnover"))
+    return StatRow(
+        game["id"],
+        (game.get("date") or "")[:10],
+        game.get("status"),
+        normalize_team(team.get("full_name", "")),
+        hs if is_home else vs,
+        vs if is_home else hs,
+        ("%s %s" % (player.get("first_name") or "", player.get("last_name") or "")).strip().lower(),
+        minutes,
+        gmsc,
+        v("pts"),
+        v("reb"),
+        v("ast"),
+    )
+
+
+def project_espn_event(ev):
+    comp = (ev.get("competitions") or [{}])[0]
+    competitors = comp.get("competitors", [])
+    if len(competitors) != 2:
+        return None
+    home = next((c for c in competitors if c.get("homeAway") == "home"), competitors[0])
+    away = next((c for c in competitors if c.get("homeAway") == "away"), competitors[1])
+    try:
+        h_score = int(home.get("score", 0) or 0)
+        a_score = int(away.get("score", 0) or 0)
+    except (TypeError, ValueError):
+        h_score = a_score = 0
+    status_type = (ev.get("status") or {}).get("type") or {}
+    return SummerEvent(
+        ev.get("date", ""),
+        status_type.get("description") or "?",
+        bool(status_type.get("completed")),
+        (home.get("team") or {}).get("displayName", "?"),
+        h_score,
+        (away.get("team") or {}).get("displayName", "?"),
+        a_score,
+    )
+
+
+class BookOutcome:
+    """One priced outcome of one book: `market` is the raw Odds API key
+    ("spreads", "h2h_h1", ...), `side` the normalized team name (or
+    "over"/"under" for totals and player props), `region` the Odds API
+    region the book was fetched from (None when unknown), `player` the
+    lower-cased player a prop line is on (None for team markets)."""
+    __slots__ = ("book", "market", "side", "point", "price", "region", "player")
+
+    def __init__(self, book, market, side, point, price, region=None, player=None):
+        self.book   = book
+        self.market = market
+        self.side   = side
+        self.point  = point
+        self.price  = price
+        self.region = region
+        self.player = player
+
+
+def parse_bookmakers(bookmakers, region=None):
+    outcomes = []
+    for book in bookmakers:
+        title = book.get("title", "?")
+        tag   = book.get("region", region)
+        for market in book.get("markets", []):
+            key    = market.get("key", "")
+            totals = key.startswith(("totals", "player_"))
+            for o in market.get("outcomes", []):
+                raw    = o.get("name", "")
+                side   = raw.lower() if totals else normalize_team(raw)
+                player = (o.get("description") or "").lower() or None
+                outcomes.append(BookOutcome(title, key, side, o.get("point"), o.get("price"), tag, player))
+    return outcomes
+
+
+class Game:
+    """An Odds API event parsed once: normalized team names, a parsed UTC
+    tip-off and a flat list of BookOutcome, so the scoring loop never digs
+    through bookmakers -> markets -> outcomes dicts again. Consensus numbers
+    for every (market, side) are averaged in one pass on first use and
+    cached on the game."""
+    __slots__ = ("id", "commence", "home", "away", "outcomes", "_consensus")
+
+    def __init__(self, id, commence, home, away, outcomes):
+        self.id         = id
+        self.commence   = commence
+        self.home       = home
+        self.away       = away
+        self.outcomes   = outcomes
+        self._consensus = None
+
+    @classmethod
+    def from_odds(cls, g, region=None):
+        """None for events without a parseable commence_time. `region`
+        tags books that don't carry their own (a live fetch; snapshots
+        store the tag per bookmaker)."""
+        try:
+            commence = datetime.strptime(g["commence_time"], "%Y-%m-%dT%H:%M:%SZ")
+        except (KeyError, ValueError):
+            return None
+        return cls(
+            g.get("id"), commence,
+            normalize_team(g.get("home_team", "")), normalize_team(g.get("away_team", "")),
+            parse_bookmakers(g.get("bookmakers", []), region),
+        )
+
+    def to_odds(self):
+        """Back to the Odds API event shape from_odds reads, so a snapshot
+        goes through the same parser a live fetch does."""
+        books, regions = {}, {}
+        for o in self.outcomes:
+            outcome = {"name": o.side.title() if o.market.startswith(("totals", "player_")) else o.side,
+                       "price": o.price}
+            if o.point is not None:
+                outcome["point"] = o.point
+            if o.player:
+                outcome["description"] = o.player
+            books.setdefault(o.book, {}).setdefault(o.market, []).append(outcome)
+            regions.setdefault(o.book, o.region)
+        bookmakers = []
+        for book, markets in books.items():
+            entry = {"title": book, "markets": [{"key": k, "outcomes": v} for k, v in markets.items()]}
+            if regions[book]:
+                entry["region"] = regions[book]
+            bookmakers.append(entry)
+        return {
+            "id":            self.id,
+            "commence_time": self.commence.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "home_team":     self.home,
+            "away_team":     self.away,
+            "bookmakers":    bookmakers,
+        }
+
+    def consensus(self, market, side, player=None):
+        """Average point across books for one side of one market (of one
+        player, for a prop), each book weighted by SHARP_BOOKS when
+        CONSENSUS_SHARP is set."""
+        if self._consensus is None:
+            sums = {}
+            for o in self.outcomes:
+                if o.point is None:
+                    continue
+                w   = SHARP_BOOKS.get(o.book, 1.0) if CONSENSUS_SHARP else 1.0
+                key = (o.market, o.side, o.player)
+                acc = sums.get(key)
+                if acc is None:
+                    sums[key] = [o.point * w, w]
+                else:
+                    acc[0] += o.point * w
+                    acc[1] += w
+            self._consensus = {key: total / weight for key, (total, weight) in sums.items()}
+        return self._consensus.get((market, side, player))
+
+    def best_outcomes(self, min_price, max_price):
+        """The best quote of each (market, side, point, player) priced in
+        (min_price, max_price], first book on ties. Every quote of one line
+        has the same cover probability, so only the best playable price can
+        carry a game's best edge -- scoring these keeps the work per game
+        flat as books are added."""
+        best = {}
+        for o in self.outcomes:
+            if not (o.price and min_price < o.price <= max_price):
+                continue
+            key = (o.market, o.side, o.point, o.player)
+            cur = best.get(key)
+            if cur is None or o.price > cur.price:
+                best[key] = o
+        return list(best.values())
+
+    def books(self):
+        return {o.book for o in self.outcomes}
+
+    def add_outcomes(self, outcomes):
+        self.outcomes.extend(outcomes)
+        self._consensus = None
+
+
+class TeamRating:
+    __slots__ = ("off", "defense", "form")
+
+    def __init__(self, off, defense, form=0.0):
+        self.off     = off
+        self.defense = defense
+        self.form    = form
+
+
+def pick_tier(edge):
+    if edge > 0.12:
+        return "💎 頂級"
+    if edge > 0.09:
+        return "🔥 強力"
+    return "⭐ 穩定"
+
+
+class Pick:
+    """A scored outcome that cleared the edge bar. Holds references to its
+    Game and BookOutcome rather than copies of their fields; every display
+    string is derived on access, so only picks that actually end up in the
+    report or on the dashboard ever get formatted."""
+    __slots__ = ("game", "outcome", "prob", "raw_prob", "edge", "consensus", "missing", "ou_note",
+                 "kelly_stake", "league")
+
+    def __init__(self, game, outcome, prob, edge, consensus, missing, ou_note, league=None, raw_prob=None):
+        self.league      = league
+        self.game        = game
+        self.outcome     = outcome
+        self.prob        = prob
+        self.raw_prob    = prob if raw_prob is None else raw_prob
+        self.edge        = edge
+        self.consensus   = consensus
+        self.missing     = missing
+        self.ou_note     = ou_note
+        self.kelly_stake = 0.0
+
+    @property
+    def commence_tw(self):
+        return self.game.commence + timedelta(hours=8)
+
+    @property
+    def date(self):
+        return self.commence_tw.strftime("%Y-%m-%d")
+
+    @property
+    def league_tag(self):
+        return self.league.name if self.league is not None else "regular"
+
+    @property
+    def game_id(self):
+        gid = "%s@%s_%s" % (self.game.away, self.game.home, self.date)
+        if self.outcome.player:
+            # One entry per player and stat, not one per game.
+            gid = "%s_%s_%s" % (gid, self.outcome.player, PROP_STATS.get(self.outcome.market, self.outcome.market))
+        # NBA ids predate leagues and stay unprefixed in the history.
+        return gid if self.league_tag == "regular" else "%s_%s" % (self.league_tag, gid)
+
+    @property
+    def price(self):
+        return self.outcome.price
+
+    @property
+    def book(self):
+        return self.outcome.book
+
+    @property
+    def region(self):
+        return self.outcome.region
+
+    @property
+    def market(self):
+        return self.outcome.market
+
+    @property
+    def tier(self):
+        return pick_tier(self.edge)
+
+    @property
+    def matchup(self):
+        g = self.game
+        matchup = "%s @ %s" % (TEAM_CN.get(g.away, g.away), TEAM_CN.get(g.home, g.home))
+        return matchup if self.league_tag == "regular" else "%s %s" % (self.league.label, matchup)
+
+    @property
+    def start_time(self):
+        return self.commence_tw.strftime("%m/%d %H:%M")
+
+    @property
+    def bet(self):
+        o = self.outcome
+        if o.player:
+            return "%s %s %s %.1f" % (
+                display_player_name(o.player), PROP_ZH.get(o.market, o.market),
+                "大" if o.side == "over" else "小", o.point,
+            )
+        base, period = split_market_key(o.market)
+        team = TEAM_CN.get(o.side, o.side)
+        bet  = ("%s %s" % (team, MARKET_ZH["h2h"])) if base == "h2h" else ("%s %+.1f" % (team, o.point))
+        return ("%s %s" % (PERIOD_ZH[period], bet)) if period else bet
+
+    @property
+    def missing_str(self):
+        return "狀況: " + ", ".join(self.missing) if self.missing else "陣容完整"
+
+    @property
+    def consensus_str(self):
+        if self.outcome.player:
+            return "共識線: %.1f" % self.consensus
+        return "共識線: %+.1f" % self.consensus
+
+
+_STATIC_RATINGS = {}
+
+
+def team_rating(team, live_ratings):
+    """live_ratings entry, else FALLBACK_RATINGS/DEFAULT_RATING as a TeamRating."""
+    r = live_ratings.get(team)
+    if r is None:
+        r = _STATIC_RATINGS.get(team)
+        if r is None:
+            d = FALLBACK_RATINGS.get(team, DEFAULT_RATING)
+            r = _STATIC_RATINGS[team] = TeamRating(d["off"], d["def"], d.get("form", 0.0))
+    return r
+
+
+def safe_stream(url, project, array_key=None, headers=None, params=None, meta=None,
+                retries=3, timeout=15):
+    """safe_get for large list payloads: stream-parse the response with
+    iter_json_array and keep only `project(element)` for each element
+    (elements projecting to None are dropped). Same retry/None-on-failure
+    contract as safe_get; a stream that breaks mid-body is retried from the
+    start rather than returned half-read.
+    """
+    session = http_session()
+    import requests
+    for attempt in range(1, retries + 1):
+        count("http_requests", host=_host(url))
+        try:
+            with session.get(url, headers=headers, params=params, timeout=timeout, stream=True) as r:
+                r.raise_for_status()
+                r.encoding = r.encoding or "utf-8"
+                if meta is not None:
+                    meta.clear()
+                records = []
+                for item in iter_json_array(r.iter_content(STREAM_CHUNK, decode_unicode=True), array_key, meta):
+                    rec = project(item)
+                    if rec is not None:
+                        records.append(rec)
+                return records
+        except requests.exceptions.Timeout:
+            count("http_errors", host=_host(url), kind="timeout")
+            log.warning("Timeout attempt %d/%d: %s", attempt, retries, url)
+        except requests.exceptions.HTTPError as e:
+            count("http_errors", host=_host(url), kind=str(e.response.status_code))
+            log.error("HTTP error %s: %s", e.response.status_code, url)
+            wait = _retry_wait(e.response, attempt)
+            if wait is None or attempt == retries:
+                break
+            time.sleep(wait)
+        except Exception as e:
+            count("http_errors", host=_host(url), kind="other")
+            log.warning("Request failed attempt %d/%d: %s", attempt, retries, e)
+    return None
+
+
+def load_cache(name, default=None):
+    try:
+        with open(os.path.join(CACHE_DIR, name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_cache(name, data):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = os.path.join(CACHE_DIR, name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, os.path.join(CACHE_DIR, name))
+    except OSError as e:
+        log.warning("Failed to write cache %s: %s", name, e)
+
+
 def _player_marked_out(text, player, team_nickname, out_keywords, skip_keywords):
     """Scan every occurrence of `player` in `text`, not just the first.
 
@@ -242,50 +1097,59 @@ def _player_marked_out(text, player, team_nickname, out_keywords, skip_keywords)
             return True
 
 
-def get_injury_report():
+def parse_injury_report(html, players=None):
+    """Watched players (IMPACT_PLAYERS unless a {team: [player]} watchlist
+    is given, see injury_watchlist) confirmed out on a RotoWire
+    injury-report page, plus the SEASON_OUT fallback, as {team: [player, ...]}."""
+    players = players or IMPACT_PLAYERS
+    injured = {}
+    text = html.lower()
+
+    out_keywords  = ["ruled out", "will not play", "is out", "has been ruled out", "out ("]
+    skip_keywords = ["questionable", "probable", "available", "good to go", "day-to-day"]
+
+    for full_team, watched in players.items():
+        nickname = full_team.split()[-1].lower()
+        for player in watched:
+            if player not in text:
+                continue
+            if _player_marked_out(text, player, nickname, out_keywords, skip_keywords):
+                if player not in injured.get(full_team, []):
+                    injured.setdefault(full_team, []).append(player)
+
+    for team, watched in players.items():
+        for p in watched:
+            if listed_player(p, SEASON_OUT) and p not in injured.get(team, []):
+                injured.setdefault(team, []).append(p)
+    return injured
+
+
+def get_injury_report(players=None):
+    players = players or IMPACT_PLAYERS
     try:
         url  = "https://www.rotowire.com/basketball/injury-report.php"
         hdrs = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }
-        r = requests.get(url, headers=hdrs, timeout=15)
+        r = http_session().get(url, headers=hdrs, timeout=15)
         r.raise_for_status()
 
-        injured = {}
-        text = r.text.lower()
-
-        out_keywords  = ["ruled out", "will not play", "is out", "has been ruled out", "out ("]
-        skip_keywords = ["questionable", "probable", "available", "good to go", "day-to-day"]
-
-        for full_team in IMPACT_PLAYERS:
-            nickname = full_team.split()[-1].lower()
-            for player in IMPACT_PLAYERS[full_team]:
-                if player not in text:
-                    continue
-                if _player_marked_out(text, player, nickname, out_keywords, skip_keywords):
-                    if player not in injured.get(full_team, []):
-                        injured.setdefault(full_team, []).append(player)
-
-        for team, players in IMPACT_PLAYERS.items():
-            for p in players:
-                if p in SEASON_OUT and p not in injured.get(team, []):
-                    injured.setdefault(team, []).append(p)
-
+        injured = parse_injury_report(r.text, players)
         log.info("RotoWire injury loaded: %d entries", sum(len(v) for v in injured.values()))
         return injured
 
     except Exception as e:
         log.warning("RotoWire failed: %s, using SEASON_OUT fallback", e)
         fallback = {}
-        for team, players in IMPACT_PLAYERS.items():
-            out = [p for p in players if p in SEASON_OUT]
+        for team, watched in players.items():
+            out = [p for p in watched if listed_player(p, SEASON_OUT)]
             if out:
                 fallback[team] = out
         return fallback
 
 
-def fetch_team_stats():
-    """Pull every completed game of the season to build win/loss ratings.
+def fetch_season_games():
+    """Every game of the season, played or scheduled, as GameRows.
 
     balldontlie's v1 API caps each response at 100 games and paginates via a
     `next_cursor` in the response `meta`. A single unpaginated call (as this
@@ -298,107 +1162,539 @@ def fetch_team_stats():
     could ever need that many.
     """
     if not BALLDONTLIE_KEY:
-        return {}
+        return []
+    return fetch_bdl_pages("games", project_bdl_game, {"seasons[]": SEASON_YEAR}) or []
+
+
+def fetch_bdl_pages(endpoint, project, params, max_pages=50, partial_ok=True):
+    """Every page of a cursor-paginated balldontlie v1 list endpoint, each
+    element through `project`. None when nothing could be read; a failure
+    further in keeps the pages read so far, or is None too when partial_ok
+    is False (callers that fold a result once and never re-read it)."""
     headers = {"Authorization": BALLDONTLIE_KEY}
-    games  = []
-    cursor = None
-    for _ in range(50):
-        params = {"seasons[]": SEASON_YEAR, "per_page": 100}
+    records = []
+    cursor  = None
+    meta    = {}
+    for _ in range(max_pages):
+        page_params = dict(params, per_page=100)
         if cursor is not None:
-            params["cursor"] = cursor
-        data = safe_get("https://api.balldontlie.io/v1/games", headers=headers, params=params)
-        if not data or "data" not in data:
+            page_params["cursor"] = cursor
+        page = safe_stream(
+            "https://api.balldontlie.io/v1/" + endpoint, project,
+            array_key="data", headers=headers, params=page_params, meta=meta,
+        )
+        if page is None:
+            if not records or not partial_ok:
+                return None
             break
-        games.extend(data["data"])
-        cursor = (data.get("meta") or {}).get("next_cursor")
+        records.extend(page)
+        cursor = (meta.get("meta") or {}).get("next_cursor")
         if not cursor:
             break
+    return records
+
 
+def fetch_team_stats(games=None):
+    """Margin ratings from the season's games (fetched if not given)."""
+    if games is None:
+        games = fetch_season_games()
     if not games:
         return {}
+    solver  = _RATING_SOLVERS.setdefault(SEASON_YEAR, RatingSolver())
+    ratings = ratings_from_games(games, solver)
+    log.info("Margin ratings solved: %d teams, home court %+.2f", len(ratings), ratings.home_court)
+    return ratings
 
-    win_loss = {}
-    for game in games:
-        if game.get("status") != "Final":
-            continue
-        home = normalize_team(game["home_team"]["full_name"])
-        away = normalize_team(game["visitor_team"]["full_name"])
-        hs   = game.get("home_team_score", 0)
-        vs   = game.get("visitor_team_score", 0)
-        if hs and vs:
-            win_loss.setdefault(home, {"w": 0, "l": 0})
-            win_loss.setdefault(away, {"w": 0, "l": 0})
-            if hs > vs:
-                win_loss[home]["w"] += 1
-                win_loss[away]["l"] += 1
-            else:
-                win_loss[away]["w"] += 1
-                win_loss[home]["l"] += 1
 
-    ratings = {}
-    for team, rec in win_loss.items():
-        if team not in TEAM_CN:
+class MarginRatings(dict):
+    """team -> TeamRating from RatingSolver, in points per game against an
+    average opponent on a neutral floor. Carries the fitted home-court edge
+    and league scoring mean, which predict_margin / predict_total use in
+    place of the HOME_ADVANTAGE constant and the heuristic scale."""
+
+    def __init__(self, ratings=(), home_court=HOME_ADVANTAGE, mean_points=0.0):
+        super().__init__(ratings)
+        self.home_court  = home_court
+        self.mean_points = mean_points
+
+
+class RatingSolver:
+    """Opponent-adjusted offense/defense ratings by regularized least squares.
+
+    Each final game gives two observations,
+        home_pts = mu + hca/2 + off[home] - def[away]
+        away_pts = mu - hca/2 + off[away] - def[home]
+    so the margin carries the full home-court term and the totals carry the
+    scoring level. Only the normal equations are kept (a sparse dict of rows
+    over 62 unknowns), so adding games costs O(new games) regardless of how
+    many came before, and time decay is a single rescale of the accumulated
+    sums when the newest game date moves forward. solve() runs conjugate
+    gradient warm-started from the previous solution, which converges in a
+    handful of iterations when a poll brings in a few new games.
+    """
+
+    MU, HCA = 0, 1
+
+    def __init__(self, half_life_days=None, ridge=RATING_RIDGE, neutral_site=False, known=TEAM_CN):
+        half_life     = RATING_HALF_LIFE_DAYS if half_life_days is None else half_life_days
+        # On a neutral floor (summer league) there is no home-court term:
+        # it drops out of the observations and a unit ridge pins it to 0.
+        self.neutral  = neutral_site
+        # Team names are matched to TEAM_CN for the NBA; other leagues pass
+        # known=None and keep their book names as-is.
+        self.known    = known
+        self.decay    = math.log(2) / half_life if half_life > 0 else 0.0
+        self.ridge    = ridge
+        self.teams    = {}
+        self.ata      = {}
+        self.atb      = {}
+        self.anchor   = None
+        self.seen     = set()
+        self.solution = []
+
+    def _team(self, team):
+        idx = self.teams.get(team)
+        if idx is None:
+            base = 2 + 2 * len(self.teams)
+            idx  = self.teams[team] = (base, base + 1)
+        return idx
+
+    def _observe(self, w, y, feats):
+        for i, ci in feats:
+            self.atb[i] = self.atb.get(i, 0.0) + w * y * ci
+            row = self.ata.setdefault(i, {})
+            for j, cj in feats:
+                row[j] = row.get(j, 0.0) + w * ci * cj
+
+    def _rescale(self, factor):
+        for row in self.ata.values():
+            for j in row:
+                row[j] *= factor
+        for i in self.atb:
+            self.atb[i] *= factor
+
+    def add_games(self, games):
+        """Fold final GameRows not seen before into the normal equations.
+        Returns the number of games added."""
+        fresh = []
+        for g in games:
+            if g.status != "Final" or not (g.home_score and g.away_score):
+                continue
+            home, away = (normalize_team(g.home), normalize_team(g.away)) if self.known else (g.home, g.away)
+            key = (g.date, home, away)
+            if key in self.seen:
+                continue
+            self.seen.add(key)
+            fresh.append((datetime.fromisoformat(g.date).toordinal(), home, away, g))
+        if not fresh:
+            return 0
+
+        newest = max(f[0] for f in fresh)
+        if self.anchor is None:
+            self.anchor = newest
+        elif newest > self.anchor:
+            if self.decay:
+                self._rescale(math.exp(-self.decay * (newest - self.anchor)))
+            self.anchor = newest
+        for day, home, away, g in fresh:
+            w = math.exp(-self.decay * (self.anchor - day)) if self.decay else 1.0
+            h_off, h_def = self._team(home)
+            a_off, a_def = self._team(away)
+            hca = 0.0 if self.neutral else 0.5
+            self._observe(w, g.home_score, [(self.MU, 1.0), (self.HCA, hca), (h_off, 1.0), (a_def, -1.0)])
+            self._observe(w, g.away_score, [(self.MU, 1.0), (self.HCA, -hca), (a_off, 1.0), (h_def, -1.0)])
+        count("rating_games", len(fresh))
+        return len(fresh)
+
+    def _matvec(self, v):
+        out = [0.0, v[self.HCA] if self.neutral else 0.0] + [self.ridge * x for x in v[2:]]
+        for i, row in self.ata.items():
+            out[i] += sum(a * v[j] for j, a in row.items())
+        return out
+
+    def solve(self, tol=1e-10):
+        n = 2 + 2 * len(self.teams)
+        if not self.teams:
+            return MarginRatings()
+        x = self.solution + [0.0] * (n - len(self.solution))
+        if not self.solution:
+            x[self.MU], x[self.HCA] = 110.0, 0.0 if self.neutral else HOME_ADVANTAGE
+        b  = [self.atb.get(i, 0.0) for i in range(n)]
+        ax = self._matvec(x)
+        r  = [bi - ai for bi, ai in zip(b, ax)]
+        p  = list(r)
+        rr = sum(ri * ri for ri in r)
+        limit = tol * max(1.0, sum(bi * bi for bi in b))
+        for _ in range(4 * n):
+            if rr <= limit:
+                break
+            ap    = self._matvec(p)
+            alpha = rr / sum(pi * api for pi, api in zip(p, ap))
+            x     = [xi + alpha * pi for xi, pi in zip(x, p)]
+            r     = [ri - alpha * api for ri, api in zip(r, ap)]
+            rr_new = sum(ri * ri for ri in r)
+            p     = [ri + rr_new / rr * pi for ri, pi in zip(r, p)]
+            rr    = rr_new
+        self.solution = x
+
+        mu = x[self.MU]
+        return MarginRatings(
+            {
+                team: TeamRating(off=round(mu + x[o], 2), defense=round(mu - x[d], 2), form=0.0)
+                for team, (o, d) in self.teams.items()
+                if self.known is None or team in self.known
+            },
+            home_court=round(x[self.HCA], 2),
+            mean_points=round(mu, 2),
+        )
+
+
+# One solver per season, kept for the life of the process so repeated
+# polls only fold in the games that finished since the last one.
+_RATING_SOLVERS = {}
+
+
+def ratings_from_games(games, solver=None):
+    """MarginRatings from a season's GameRow list. Without a solver this is a
+    from-scratch fit; pass a long-lived RatingSolver to update incrementally."""
+    solver = solver or RatingSolver()
+    solver.add_games(games)
+    return solver.solve()
+
+
+ScheduleSpot = namedtuple("ScheduleSpot", "rest_days back_to_back three_in_four road_trip")
+
+
+class ScheduleIndex:
+    """Per-team schedule context for every game on the season calendar.
+
+    Built in one walk over each team's date-sorted games (the same
+    balldontlie list the ratings come from, which includes scheduled games),
+    so scoring a game is a dict lookup keyed by (team, US date):
+      rest_days     -- full days off before this game (None for the opener)
+      back_to_back  -- played the day before
+      three_in_four -- this is at least the third game in four days
+      road_trip     -- consecutive away games ending with this one, 0 at home
+    """
+
+    def __init__(self, games):
+        by_team = {}
+        for g in games:
+            try:
+                day = datetime.fromisoformat(g.date).toordinal()
+            except ValueError:
+                continue
+            home, away = normalize_team(g.home), normalize_team(g.away)
+            by_team.setdefault(home, {})[day] = True
+            by_team.setdefault(away, {})[day] = False
+
+        self.spots = {}
+        for team, slate in by_team.items():
+            slate = sorted(slate.items())
+            trip  = 0
+            for k, (day, at_home) in enumerate(slate):
+                rest = day - slate[k - 1][0] - 1 if k else None
+                trip = 0 if at_home else trip + 1
+                self.spots[(team, day)] = ScheduleSpot(
+                    rest_days=rest,
+                    back_to_back=rest == 0,
+                    three_in_four=k >= 2 and day - slate[k - 2][0] <= 3,
+                    road_trip=trip,
+                )
+
+    def __len__(self):
+        return len(self.spots)
+
+    def lookup(self, team, tip_off):
+        """ScheduleSpot for `team` playing at UTC `tip_off`, or None."""
+        day = (tip_off - timedelta(hours=US_DATE_OFFSET_HOURS)).toordinal()
+        return self.spots.get((team, day))
+
+    def margin_adjustment(self, home, away, tip_off):
+        """Home-minus-away schedule edge in points for one game."""
+        return (schedule_penalty(self.lookup(away, tip_off))
+                - schedule_penalty(self.lookup(home, tip_off)))
+
+
+def schedule_penalty(spot):
+    """Points a team gives up to its schedule in one game."""
+    if spot is None:
+        return 0.0
+    penalty = 0.0
+    if spot.back_to_back:
+        penalty += B2B_PENALTY
+    elif spot.rest_days is not None and spot.rest_days >= 2:
+        penalty -= EXTRA_REST_BONUS
+    if spot.three_in_four:
+        penalty += THREE_IN_FOUR_PENALTY
+    if spot.road_trip > 2:
+        penalty += min(ROAD_TRIP_MAX_PENALTY, (spot.road_trip - 2) * ROAD_TRIP_PENALTY)
+    return penalty
+
+
+# ── Player impacts ───────────────────────────────────────────────────────────
+# A per-season box-score store (CACHE_DIR/player_stats_<season>.json) folded
+# forward one settled date at a time, and the lineup table built from it:
+# {team: {player: [off, def]}}, the points of offense and defense the team
+# loses without that player. A set of missing players is the sum of their
+# vectors, so pricing any injury combination is a lookup, not a refit.
+# Version 2 added the per-stat moments and the points/rebounds/assists each
+# team allows that the player-prop distributions are built from.
+PLAYER_STATS_VERSION = 2
+
+
+def fold_box_scores(store, rows):
+    """Fold one date's StatRows into the store. Each player keeps running
+    sums for his current team only -- a player seen for a new team starts
+    over there -- so a traded player's on/off is measured against the
+    roster he is actually on. Points, rebounds and assists keep [sum, sum
+    of squares]; "allowed" keeps each team's [games, pts, reb, ast]
+    conceded, from the two teams' box totals of each game."""
+    teams   = store.setdefault("teams", {})
+    players = store.setdefault("players", {})
+    allowed = store.setdefault("allowed", {})
+    boxes   = {}
+    for r in rows:
+        if r.status != "Final" or not r.player:
             continue
-        total   = rec["w"] + rec["l"]
-        win_pct = rec["w"] / total if total else 0.5
-        ratings[team] = {
-            "off":  round(110.0 + win_pct * 18.0, 1),
-            "def":  round(120.0 - win_pct * 14.0, 1),
-            "form": round((win_pct - 0.5) * 4, 2),
-        }
+        teams.setdefault(r.team, {})[str(r.game_id)] = [r.date, r.team_score, r.opp_score]
+        p = players.get(r.player)
+        if p is None or p["team"] != r.team:
+            p = players[r.player] = {
+                "team": r.team, "first": r.date, "last": r.date,
+                "gp": 0, "min": 0.0, "gmsc": 0.0, "pf": 0, "pa": 0,
+                "pts": [0, 0], "reb": [0, 0], "ast": [0, 0],
+            }
+        p["first"] = min(p["first"], r.date)
+        p["last"]  = max(p["last"], r.date)
+        p["gp"]   += 1
+        p["min"]  += r.minutes
+        p["gmsc"] += r.gmsc
+        p["pf"]   += r.team_score
+        p["pa"]   += r.opp_score
+        box = boxes.setdefault(r.game_id, {}).setdefault(r.team, [0, 0, 0])
+        for i, (stat, value) in enumerate((("pts", r.pts), ("reb", r.reb), ("ast", r.ast))):
+            p[stat][0] += value
+            p[stat][1] += value * value
+            box[i]     += value
+    for game in boxes.values():
+        if len(game) != 2:
+            continue
+        (a, a_box), (b, b_box) = game.items()
+        for team, conceded in ((a, b_box), (b, a_box)):
+            row = allowed.setdefault(team, [0, 0, 0, 0])
+            row[0] += 1
+            for i, value in enumerate(conceded):
+                row[i + 1] += value
+
+
+def update_player_stats(season_games):
+    """Bring this season's box-score store up to date and return it.
+
+    Only dates whose games are all final are fetched (a date is folded
+    once, never re-read), oldest first and at most
+    PLAYER_STATS_DATES_PER_RUN per run, concurrently across dates. A failed
+    date -- including one whose later stat pages failed, since a partial
+    date would never be re-read -- stops the fold there so dates always go
+    in in order and whole.
+    """
+    name  = PLAYER_STATS_CACHE % SEASON_YEAR
+    store = load_cache(name) or {}
+    if store.get("version") != PLAYER_STATS_VERSION:
+        store = {"version": PLAYER_STATS_VERSION}
+    done   = set(store.get("dates", []))
+    folded = 0
+
+    finals = {}
+    for g in season_games:
+        finals.setdefault(g.date, []).append(g.status == "Final")
+    batch = sorted(d for d, f in finals.items() if all(f) and d not in done)[:PLAYER_STATS_DATES_PER_RUN]
+    if batch:
+        with ThreadPoolExecutor(max_workers=PLAYER_STATS_WORKERS, thread_name_prefix="bdl-stats") as pool:
+            pages = pool.map(
+                lambda d: fetch_bdl_pages("stats", project_bdl_stat, {"dates[]": d}, partial_ok=False), batch)
+            for d, rows in zip(batch, pages):
+                if rows is None:
+                    log.warning("Player box scores for %s incomplete; retrying next run", d)
+                    break
+                fold_box_scores(store, rows)
+                done.add(d)
+                folded += 1
+        store["dates"] = sorted(done)
+        save_cache(name, store)
+    count("player_stat_dates", folded)
+    log.info("Player box scores: %d dates folded (+%d this run), %d players",
+             len(done), folded, len(store.get("players", {})))
+    return store
+
+
+def build_player_impacts(store):
+    """The lineup table from a box-score store.
+
+    Each player's vector blends two estimates of what his team loses
+    without him. The direct one is on/off: the team's points for and
+    against per game with him vs. without him, over the team's games since
+    he joined. It is shrunk toward a box-score prior -- game score per 48
+    above replacement, scaled by his share of the 48 minutes and split
+    60/40 offense/defense -- by games missed, so a player who never sits
+    is valued on the prior alone. Players with fewer than PLAYER_MIN_GAMES
+    games, or not seen for PLAYER_STALE_DAYS before their team's latest
+    game (traded away, waived, out long-term -- already the team's
+    baseline), are left out; only positive impacts are kept.
+    """
+    cum = {}
+    for team, games in store.get("teams", {}).items():
+        rows  = sorted(games.values())
+        dates = [r[0] for r in rows]
+        pf, pa = [0], [0]
+        for _, f, a in rows:
+            pf.append(pf[-1] + f)
+            pa.append(pa[-1] + a)
+        cum[team] = (dates, pf, pa)
+
+    table = {}
+    for name, p in store.get("players", {}).items():
+        if p["gp"] < PLAYER_MIN_GAMES or not p["min"] or p["team"] not in cum:
+            continue
+        dates, pf, pa = cum[p["team"]]
+        stale = datetime.strptime(dates[-1], "%Y-%m-%d") - datetime.strptime(p["last"], "%Y-%m-%d")
+        if stale.days > PLAYER_STALE_DAYS:
+            continue
+        box  = max(0.0, p["gmsc"] / p["min"] * 48 - PLAYER_REPLACEMENT_GMSC48) * PLAYER_BOX_SCALE
+        box *= p["min"] / p["gp"] / 48
+        off, dfn = box * PLAYER_BOX_OFF_SHARE, box * (1 - PLAYER_BOX_OFF_SHARE)
+
+        i     = bisect.bisect_left(dates, p["first"])
+        n_off = len(dates) - i - p["gp"]
+        if n_off > 0:
+            w = n_off / (n_off + PLAYER_ONOFF_PRIOR_GAMES)
+            on_off_pf = p["pf"] / p["gp"] - (pf[-1] - pf[i] - p["pf"]) / n_off
+            on_off_pa = (pa[-1] - pa[i] - p["pa"]) / n_off - p["pa"] / p["gp"]
+            off = w * on_off_pf + (1 - w) * off
+            dfn = w * on_off_pa + (1 - w) * dfn
+
+        total = off + dfn
+        if total <= 0:
+            continue
+        if total > PLAYER_MAX_IMPACT:
+            off, dfn = off * PLAYER_MAX_IMPACT / total, dfn * PLAYER_MAX_IMPACT / total
+        table.setdefault(p["team"], []).append((off + dfn, name, [round(off, 2), round(dfn, 2)]))
 
-    log.info("Game-based ratings loaded: %d teams", len(ratings))
-    return ratings
+    return {
+        team: {name: vec for _, name, vec in sorted(entries, reverse=True)[:PLAYER_IMPACT_TOP]}
+        for team, entries in table.items()
+    }
 
 
-def load_history():
+def fetch_player_impacts(season_games, store=None):
+    """The lineup table for this season, {} without a balldontlie key.
+    `store` is an already-updated box-score store to build it from."""
+    if not BALLDONTLIE_KEY or not season_games:
+        return {}
+    impacts = build_player_impacts(update_player_stats(season_games) if store is None else store)
+    log.info("Player impacts: %d teams, %d players", len(impacts), sum(len(v) for v in impacts.values()))
+    return impacts
+
+
+def lineup_delta(impacts, team, missing):
+    """[off, def] a team loses to `missing` [(player, "out"/"limited")];
+    a limited player counts half."""
+    vectors = impacts.get(team, {})
+    off = dfn = 0.0
+    for player, status in missing:
+        vec = vectors.get(player)
+        if vec is not None:
+            weight = 1.0 if status == "out" else 0.5
+            off += vec[0] * weight
+            dfn += vec[1] * weight
+    return [off, dfn]
+
+
+def injury_watchlist(impacts):
+    """Players to look for in the injury report: the lineup table's where
+    a team has one, IMPACT_PLAYERS' hand-kept names otherwise."""
+    return {team: list(impacts.get(team) or players) for team, players in IMPACT_PLAYERS.items()}
+
+
+def listed_player(player, names):
+    """Whether a player (a full name or an IMPACT_PLAYERS surname) is in a
+    hand-kept surname set such as SEASON_OUT."""
+    return player in names or player.rpartition(" ")[2] in names
+
+
+HISTORY_FILE   = "history.json"
+ANALYTICS_FILE = "analytics.json"
+
+# The history gist's listing entry, looked up once per run and shared by
+# load_history / load_analytics / save_history.
+_HISTORY_GIST = {}
+
+
+def _find_history_gist(headers):
+    if "gist" not in _HISTORY_GIST:
+        # GitHub's gist list defaults to 30/page; since the history gist's
+        # updated_at refreshes on every official run it normally sorts first
+        # anyway, but requesting the max page size costs nothing and removes
+        # the risk entirely if other gists on the account get touched a lot
+        # during an off-season lull.
+        gists = safe_get("https://api.github.com/gists", headers=headers, params={"per_page": 100})
+        _HISTORY_GIST["gist"] = next(
+            (g for g in gists or [] if g.get("description") == "nba_bot_history"), None
+        )
+    return _HISTORY_GIST["gist"]
+
+
+def _load_gist_file(name, fallback_first=False):
     if not GITHUB_TOKEN:
         return {}
-    headers = {"Authorization": "token %s" % GITHUB_TOKEN}
-    # GitHub's gist list defaults to 30/page; since the history gist's
-    # updated_at refreshes on every official run it normally sorts first
-    # anyway, but requesting the max page size costs nothing and removes
-    # the risk entirely if other gists on the account get touched a lot
-    # during an off-season lull.
-    gists = safe_get("https://api.github.com/gists", headers=headers, params={"per_page": 100})
-    if not gists:
+    gist = _find_history_gist({"Authorization": "token %s" % GITHUB_TOKEN})
+    if not gist:
+        return {}
+    files = gist.get("files") or {}
+    # Gists written before analytics.json existed hold a single file.
+    entry = files.get(name) or (list(files.values())[0] if fallback_first and len(files) == 1 else None)
+    if not entry:
         return {}
-    for g in gists:
-        if g.get("description") == "nba_bot_history":
-            raw_url = list(g["files"].values())[0]["raw_url"]
-            data    = safe_get(raw_url)
-            return data if isinstance(data, dict) else {}
-    return {}
+    data = safe_get(entry["raw_url"])
+    return data if isinstance(data, dict) else {}
+
 
+def load_history():
+    return _load_gist_file(HISTORY_FILE, fallback_first=True)
+
+
+def load_analytics():
+    return _load_gist_file(ANALYTICS_FILE)
 
-def save_history(history):
+
+def save_history(history, analytics=None, extra_files=None):
+    """Write the history (plus analytics and any extra gist files, such as
+    season archives from the compaction stage) in one gist update."""
     if not GITHUB_TOKEN:
         return
     headers = {
         "Authorization": "token %s" % GITHUB_TOKEN,
         "Content-Type":  "application/json",
     }
-    content = json.dumps(history, ensure_ascii=False, indent=2)
-    gists   = safe_get("https://api.github.com/gists", headers=headers, params={"per_page": 100})
-    gist_id = None
-    if gists:
-        for g in gists:
-            if g.get("description") == "nba_bot_history":
-                gist_id = g["id"]
-                break
+    files = {HISTORY_FILE: {"content": json.dumps(history, ensure_ascii=False, indent=2)}}
+    if analytics is not None:
+        files[ANALYTICS_FILE] = {"content": json.dumps(analytics, ensure_ascii=False, separators=(",", ":"))}
+    files.update(extra_files or {})
+    gist    = _find_history_gist(headers)
+    gist_id = gist["id"] if gist else None
     payload = {
         "description": "nba_bot_history",
         "public":      False,
-        "files":       {"history.json": {"content": content}},
+        "files":       files,
     }
     try:
         if gist_id:
-            requests.patch(
+            http_session().patch(
                 "https://api.github.com/gists/%s" % gist_id,
                 headers=headers, json=payload, timeout=10,
             )
         else:
-            requests.post(
+            http_session().post(
                 "https://api.github.com/gists",
                 headers=headers, json=payload, timeout=10,
             )
@@ -407,73 +1703,855 @@ def save_history(history):
         log.error("Failed to save history: %s", e)
 
 
-def calc_performance(history, league="regular"):
-    """Entries carry a "league" tag ("regular" or "summer") so the two can be
-    tracked side by side in one Gist without a regular-season Kelly-based
-    profit figure ever getting diluted by summer-league reference-only picks
-    that were never actually staked. Untagged entries (written before the
-    "league" field existed) default to "regular" for backward compatibility.
+def calc_performance(analytics, league="regular"):
+    """(settled, wins, win rate, profit) of one league, read off the
+    analytics totals -- archived seasons included -- instead of walking the
+    whole history. Entries carry a "league" tag ("regular" or "summer") so
+    the two can be tracked side by side in one Gist without a
+    regular-season Kelly-based profit figure ever getting diluted by
+    summer-league reference-only picks that were never actually staked.
+    Untagged entries (written before the "league" field existed) count as
+    "regular" for backward compatibility.
+    """
+    ls = ((analytics or {}).get("leagues") or {}).get(league)
+    total, win, _, profit = ls["total"] if ls else (0, 0, 0.0, 0.0)
+    win_rate = (win / total * 100) if total else 0
+    return total, win, win_rate, profit
+
+
+def settled_pnl(record):
+    """(stake, profit) of one settled history entry. Summer entries carry no
+    Kelly stake and are counted at a flat 10."""
+    stake = record.get("kelly_stake") or 10.0
+    if record["result"] == "win":
+        return stake, stake * (record.get("price", 1.9) - 1)
+    return stake, -stake
+
+
+# ── Settlement ───────────────────────────────────────────────────────────────
+# Grades pending history entries against final scores, so the win/loss
+# correction no longer has to be made by hand in the gist. A game id is
+# "<league>_<away>@<home>_<Taiwan date>" (no prefix for the NBA; summer ids
+# use the zh matchup), and the side and point are read back from the
+# display bet. Period bets can't be graded from a final score and stay
+# pending for a manual call.
+_TEAM_FROM_CN = {cn: team for team, cn in TEAM_CN.items()}
+
+
+def _parse_history_bet(record):
+    """(side, point) of a history entry -- point None for a moneyline --
+    or None when the bet can't be graded from a final score."""
+    bet = record.get("bet", "")
+    if any(label and bet.startswith(label) for label in PERIOD_ZH.values()):
+        return None
+    if record.get("league") == PROPS.name:
+        return None
+    team, _, tail = bet.rpartition(" ")
+    if tail == MARKET_ZH["h2h"]:
+        point = None
+    else:
+        try:
+            point = float(tail)
+        except ValueError:
+            return None
+    return _TEAM_FROM_CN.get(team, team), point
+
+
+def _parse_history_game(game_id, record):
+    """(away, home, Taiwan date) of a history entry's game id."""
+    league = record.get("league", "regular")
+    head, _, date = game_id.rpartition("_")
+    if league != "regular" and head.startswith(league + "_"):
+        head = head[len(league) + 1:]
+    away, _, home = head.partition("@")
+    away, home = away.strip(), home.strip()
+    return _TEAM_FROM_CN.get(away, away), _TEAM_FROM_CN.get(home, home), date
+
+
+def grade_bet(side, point, home, away, home_score, away_score):
+    """"win" / "loss" / "push" for `side` (+point, None for a moneyline)."""
+    if side == home:
+        margin = home_score - away_score
+    elif side == away:
+        margin = away_score - home_score
+    else:
+        return None
+    margin += point or 0
+    return "win" if margin > 0 else ("loss" if margin < 0 else "push")
+
+
+def settle_history(history, finals):
+    """Grade every pending entry whose game is in `finals`, in place.
+
+    `finals` maps (away, home) normalized team names to [(date, home score,
+    away score)] with US/UTC dates. An entry's date is the Taiwan date, a
+    day ahead of an evening tip-off back home, so a final dated the same
+    day or the day before counts. Returns the number of entries settled.
     """
-    total = win = 0
-    profit = 0.0
-    for record in history.values():
-        if record.get("league", "regular") != league:
+    settled = 0
+    for game_id, record in history.items():
+        if record.get("result") != "pending":
             continue
-        if record.get("result") not in ["win", "loss"]:
+        bet = _parse_history_bet(record)
+        if bet is None:
+            continue
+        away, home, date = _parse_history_game(game_id, record)
+        try:
+            day_before = (datetime.strptime(date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+        for d, home_score, away_score in finals.get((away, home), []):
+            if d in (date, day_before):
+                result = grade_bet(bet[0], bet[1], home, away, home_score, away_score)
+                if result:
+                    record["result"] = result
+                    settled += 1
+                break
+    return settled
+
+
+def collect_finals(history):
+    """Final scores for every league with a pending entry: the balldontlie
+    season for the NBA, each league's Odds API results store (refreshed
+    first) and the summer-league results store."""
+    pending = {r.get("league", "regular") for r in history.values() if r.get("result") == "pending"}
+    finals  = {}
+
+    def add(date, home, away, home_score, away_score):
+        finals.setdefault((normalize_team(away), normalize_team(home)), []).append((date, home_score, away_score))
+
+    for name in pending:
+        if name == "regular":
+            for g in fetch_season_games():
+                if g.status == "Final":
+                    add(g.date, g.home, g.away, g.home_score, g.away_score)
+        elif name == "summer":
+            years = {r["date"][:4] for r in history.values()
+                     if r.get("league") == "summer" and r.get("result") == "pending"}
+            for year in years:
+                store = load_cache(SUMMER_RESULTS_CACHE % int(year)) or {}
+                # Per-slug stores; older ones held a single slug's games flat.
+                for entry in (store.get("slugs") or {"": store}).values():
+                    for row in entry.get("games", {}).values():
+                        ev = SummerEvent(*row)
+                        add(ev.date[:10], ev.home, ev.away, ev.home_score, ev.away_score)
+        elif name in LEAGUES:
+            results = LEAGUES[name].update_results() if ODDS_API_KEY else (
+                load_cache("results_%s.json" % LEAGUES[name].sport_key) or {})
+            for date, home, away, home_score, away_score in results.values():
+                add(date, home, away, home_score, away_score)
+    return finals
+
+
+# ── Performance analytics ────────────────────────────────────────────────────
+# Per-league aggregates kept in analytics.json next to history.json in the
+# gist and folded forward as picks settle. Each group cell is
+# [settled, wins, staked, pnl]; "days" maps pick date -> [pnl, settled]
+# and feeds the cumulative P&L curve and max drawdown; "calib" maps tier ->
+# raw-probability percent -> [settled, wins], what the calibration below
+# is fitted from.
+ANALYTICS_VERSION    = 2
+ANALYTICS_DIMENSIONS = ("tier", "book", "edge", "month")
+EDGE_BUCKETS         = (0.06, 0.08, 0.10, 0.12, 0.15, 0.20)
+
+
+def edge_bucket(edge):
+    i = bisect.bisect_right(EDGE_BUCKETS, edge)
+    if i == 0:
+        return "<%d%%" % round(EDGE_BUCKETS[0] * 100)
+    if i == len(EDGE_BUCKETS):
+        return "≥%d%%" % round(EDGE_BUCKETS[-1] * 100)
+    return "%d-%d%%" % (round(EDGE_BUCKETS[i - 1] * 100), round(EDGE_BUCKETS[i] * 100))
+
+
+EDGE_BUCKET_ORDER = {edge_bucket(e): i for i, e in enumerate((0.0,) + EDGE_BUCKETS)}
+
+
+def _analytics_keys(record):
+    return {
+        "tier":  pick_tier(record.get("edge", 0)),
+        "book":  record.get("book", "") or "-",
+        "edge":  edge_bucket(record.get("edge", 0)),
+        "month": record.get("date", "")[:7],
+    }
+
+
+def _new_league_state():
+    # cum/peak/max_dd describe the curve through the last day; the *_before
+    # fields hold the same through the day before it, so more results for
+    # the latest day can be folded in without replaying the series.
+    return {
+        "total": [0, 0, 0.0, 0.0],
+        "by":    {dim: {} for dim in ANALYTICS_DIMENSIONS},
+        "days":  {},
+        "calib": {},
+        "last":  "",
+        "cum": 0.0, "peak": 0.0, "max_dd": 0.0,
+        "cum_before": 0.0, "peak_before": 0.0, "dd_before": 0.0,
+    }
+
+
+def _replay_days(ls):
+    cum = peak = dd = 0.0
+    ls["cum_before"] = ls["peak_before"] = ls["dd_before"] = 0.0
+    for date in sorted(ls["days"]):
+        ls["cum_before"], ls["peak_before"], ls["dd_before"] = cum, peak, dd
+        cum  += ls["days"][date][0]
+        peak  = max(peak, cum)
+        dd    = max(dd, peak - cum)
+        ls["last"] = date
+    ls["cum"], ls["peak"], ls["max_dd"] = cum, peak, dd
+
+
+def _fold_settled(ls, record):
+    stake, pnl = settled_pnl(record)
+    won        = 1 if record["result"] == "win" else 0
+    keys       = _analytics_keys(record)
+    cells      = [ls["total"]] + [ls["by"][dim].setdefault(keys[dim], [0, 0, 0.0, 0.0]) for dim in ANALYTICS_DIMENSIONS]
+    for cell in cells:
+        cell[0] += 1
+        cell[1] += won
+        cell[2] += stake
+        cell[3] += pnl
+    raw, tier = calibration_key(record)
+    cell = ls["calib"].setdefault(tier, {}).setdefault(str(raw), [0, 0])
+    cell[0] += 1
+    cell[1] += won
+
+    date = record.get("date", "")
+    day  = ls["days"].setdefault(date, [0.0, 0])
+    day[0] += pnl
+    day[1] += 1
+    if date < ls["last"]:
+        # A late settlement for an earlier day shifts every later point.
+        _replay_days(ls)
+        return
+    if date > ls["last"]:
+        ls["cum_before"], ls["peak_before"], ls["dd_before"] = ls["cum"], ls["peak"], ls["max_dd"]
+        ls["last"] = date
+    ls["cum"]    = ls["cum_before"] + day[0]
+    ls["peak"]   = max(ls["peak_before"], ls["cum"])
+    ls["max_dd"] = max(ls["dd_before"], ls["peak"] - ls["cum"])
+
+
+def update_analytics(state, history, archives=None):
+    """Fold picks settled since the last run into the analytics state.
+
+    The state remembers which ids it has already counted ("settled", id ->
+    "w"/"l"), so only new settlements do any aggregation work. If an entry
+    it counted has since changed result or vanished from the history, the
+    state is rebuilt from scratch instead of trying to un-apply it --
+    starting from the archived seasons' aggregates (the archive index), as
+    their entries are no longer in the history to replay.
+    """
+    if not state or state.get("version") != ANALYTICS_VERSION:
+        state = {"version": ANALYTICS_VERSION, "settled": {}, "leagues": archived_leagues(archives)}
+    settled = state["settled"]
+    fresh   = []
+    seen    = 0
+    stale   = False
+    for gid, record in history.items():
+        result = record.get("result")
+        prev   = settled.get(gid)
+        if result not in ("win", "loss"):
+            stale = stale or prev is not None
             continue
-        total += 1
-        stake = record.get("kelly_stake") or 10.0
-        if record["result"] == "win":
-            win    += 1
-            profit += stake * (record.get("price", 1.9) - 1)
+        if prev is None:
+            fresh.append(gid)
         else:
-            profit -= stake
-    win_rate = (win / total * 100) if total else 0
-    return total, win, win_rate, profit
+            seen  += 1
+            stale  = stale or prev != result[0]
+    if stale or seen != len(settled):
+        log.info("Analytics state out of sync with history; rebuilding")
+        state   = {"version": ANALYTICS_VERSION, "settled": {}, "leagues": archived_leagues(archives)}
+        settled = state["settled"]
+        fresh   = [gid for gid, r in history.items() if r.get("result") in ("win", "loss")]
+
+    fresh.sort(key=lambda gid: history[gid].get("date", ""))
+    for gid in fresh:
+        record = history[gid]
+        league = record.get("league", "regular")
+        ls     = state["leagues"].get(league)
+        if ls is None:
+            ls = state["leagues"][league] = _new_league_state()
+        _fold_settled(ls, record)
+        settled[gid] = record["result"][0]
+    count("analytics_settled", len(fresh))
+    return state
+
+
+def _analytics_cell(key, cell):
+    n, wins, staked, pnl = cell
+    return {
+        "key":      key,
+        "settled":  n,
+        "wins":     wins,
+        "win_rate": round(wins / n * 100, 1) if n else 0,
+        "roi":      round(pnl / staked * 100, 1) if staked else 0,
+        "pnl":      round(pnl, 1),
+    }
 
 
-def kelly_stake(prob, price, bankroll, fraction=KELLY_FRACTION):
+def analytics_view(state):
+    """Dashboard-ready form of the analytics state, per league."""
+    view = {}
+    for league, ls in sorted((state or {}).get("leagues", {}).items()):
+        series, cum = [], 0.0
+        for date in sorted(ls["days"]):
+            cum += ls["days"][date][0]
+            series.append([date, round(cum, 1)])
+        summary = _analytics_cell(league, ls["total"])
+        summary.pop("key")
+        summary["max_drawdown"] = round(ls["max_dd"], 1)
+        view[league] = {
+            "summary": summary,
+            "series":  series,
+            "by": {
+                dim: [
+                    _analytics_cell(k, c)
+                    for k, c in sorted(ls["by"][dim].items(), key=lambda kv: (EDGE_BUCKET_ORDER.get(kv[0], 0), kv[0]))
+                ]
+                for dim in ANALYTICS_DIMENSIONS
+            },
+        }
+    return view
+
+
+# ── Season archives ──────────────────────────────────────────────────────────
+# history.json only ever grew, and every run downloaded, re-serialized and
+# re-uploaded all of it. Once a season is over its settled entries never
+# change again, so the compaction stage moves them into one gzip'd file per
+# season in the same gist (history_<season>.json) and keeps per-season
+# aggregates in archive_index.json: each league's analytics state for that
+# season plus how many picks it recorded. The hot history keeps the current
+# season and anything still pending; the performance totals come from the
+# analytics state, which already holds the archived seasons, and the
+# dashboard lists archived seasons from the index and loads one on demand.
+ARCHIVE_VERSION    = 1
+ARCHIVE_INDEX_FILE = "archive_index.json"
+ARCHIVE_FILE       = "history_%d.json"
+
+
+def history_season(record):
+    """Season (its starting year) a history entry belongs to. July
+    summer-league entries land in the off-season of the season before."""
+    try:
+        return current_season_year(datetime.strptime(record.get("date", "")[:10], "%Y-%m-%d"))
+    except ValueError:
+        return SEASON_YEAR
+
+
+def season_label(season):
+    return "%d-%02d" % (season, (season + 1) % 100)
+
+
+def new_archive_index():
+    return {"version": ARCHIVE_VERSION, "seasons": {}}
+
+
+def load_archive_index():
+    index = _load_gist_file(ARCHIVE_INDEX_FILE)
+    return index if index.get("version") == ARCHIVE_VERSION else new_archive_index()
+
+
+def _merge_league_state(dst, src):
+    for a, b in [(dst["total"], src["total"])] + [
+        (dst["by"][dim].setdefault(k, [0, 0, 0.0, 0.0]), cell)
+        for dim in ANALYTICS_DIMENSIONS for k, cell in src["by"][dim].items()
+    ]:
+        for i in range(4):
+            a[i] += b[i]
+    for date, (pnl, n) in src["days"].items():
+        day = dst["days"].setdefault(date, [0.0, 0])
+        day[0] += pnl
+        day[1] += n
+    for tier, bins in src.get("calib", {}).items():
+        for key, (n, wins) in bins.items():
+            cell = dst["calib"].setdefault(tier, {}).setdefault(key, [0, 0])
+            cell[0] += n
+            cell[1] += wins
+
+
+def archived_leagues(index):
+    """Per-league analytics state of every archived season combined: what
+    update_analytics starts from when it has to rebuild."""
+    leagues = {}
+    for key in sorted((index or {}).get("seasons", {}), key=int):
+        for league, ls in index["seasons"][key]["leagues"].items():
+            _merge_league_state(leagues.setdefault(league, _new_league_state()), ls)
+    for ls in leagues.values():
+        _replay_days(ls)
+    return leagues
+
+
+def archived_recorded(index, league):
+    """Picks a league recorded in the archived seasons, settled or not."""
+    return sum(s["recorded"].get(league, 0) for s in (index or {}).get("seasons", {}).values())
+
+
+def closed_seasons(history, season=None):
+    """Seasons before the current one that still have settled entries in
+    the hot history."""
+    season = season or SEASON_YEAR
+    return sorted({
+        s for s in (history_season(r) for r in history.values() if r.get("result", "pending") != "pending")
+        if s < season
+    })
+
+
+def compact_history(history, analytics, index, seasons):
+    """Move the settled entries of `seasons` out of the hot history.
+
+    The moved ids are dropped from the analytics "settled" map (their
+    results stay folded into the league totals, so nothing is rebuilt) and
+    folded into each season's aggregates in the index. Pending entries stay
+    behind until they settle. Returns {season: {id: record}} of what moved;
+    history, analytics and index are updated in place.
+    """
+    seasons = set(seasons)
+    moved   = {}
+    for gid in [gid for gid, r in history.items()
+                if r.get("result", "pending") != "pending" and history_season(r) in seasons]:
+        record = history.pop(gid)
+        moved.setdefault(history_season(record), {})[gid] = record
+
+    settled = analytics.setdefault("settled", {})
+    for season, records in moved.items():
+        entry = index["seasons"].setdefault(str(season), {"recorded": {}, "leagues": {}})
+        for gid, record in sorted(records.items(), key=lambda kv: kv[1].get("date", "")):
+            settled.pop(gid, None)
+            league = record.get("league", "regular")
+            entry["recorded"][league] = entry["recorded"].get(league, 0) + 1
+            if record["result"] in ("win", "loss"):
+                ls = entry["leagues"].get(league)
+                if ls is None:
+                    ls = entry["leagues"][league] = _new_league_state()
+                _fold_settled(ls, record)
+    count("history_archived", sum(len(r) for r in moved.values()))
+    return moved
+
+
+def encode_archive(records):
+    raw = json.dumps(records, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    return json.dumps({
+        "version":  ARCHIVE_VERSION,
+        "entries":  len(records),
+        "encoding": "gzip+base64",
+        "data":     base64.b64encode(gzip.compress(raw, mtime=0)).decode("ascii"),
+    })
+
+
+def decode_archive(data):
+    return json.loads(gzip.decompress(base64.b64decode(data["data"])).decode("utf-8"))
+
+
+def load_archive(season):
+    """Every archived entry of one season: {} when the season has no archive
+    yet, None when it has one that could not be read."""
+    if not GITHUB_TOKEN:
+        return {}
+    gist  = _find_history_gist({"Authorization": "token %s" % GITHUB_TOKEN})
+    entry = ((gist or {}).get("files") or {}).get(ARCHIVE_FILE % season)
+    if not entry:
+        return {}
+    try:
+        return decode_archive(safe_get(entry["raw_url"]))
+    except (TypeError, KeyError, ValueError, OSError) as e:
+        log.error("Archive %s unreadable: %s", ARCHIVE_FILE % season, e)
+        return None
+
+
+def archive_closed_seasons(history, analytics, index, season=None):
+    """The compaction stage: fold every closed season's settled entries into
+    its archive. Returns (gist files to save alongside the history,
+    {season: all of its archived records}) -- both empty when nothing moved.
+
+    A season whose existing archive can't be read is left alone this run,
+    since rewriting it from just the new entries would lose the old ones.
+    """
+    existing = {}
+    for s in closed_seasons(history, season):
+        records = load_archive(s)
+        if records is None:
+            log.warning("Keeping season %s in the hot history until its archive is readable", season_label(s))
+            continue
+        existing[s] = records
+    moved = compact_history(history, analytics, index, existing)
+    files = {}
+    for s, records in sorted(moved.items()):
+        existing[s].update(records)
+        files[ARCHIVE_FILE % s] = {"content": encode_archive(existing[s])}
+        log.info("Archived %d entries of season %s (%d in its archive)",
+                 len(records), season_label(s), len(existing[s]))
+    if files:
+        files[ARCHIVE_INDEX_FILE] = {"content": json.dumps(index, ensure_ascii=False, separators=(",", ":"))}
+    return files, {s: existing[s] for s in moved}
+
+
+def archive_listing(index, records=None):
+    """Dashboard entries for the archived seasons, newest first. `records`
+    ({season: records}) attaches the rows for seasons whose shard has to be
+    (re)written; the rest reuse the shard already on disk."""
+    listing = []
+    for key in sorted((index or {}).get("seasons", {}), key=int, reverse=True):
+        entry  = index["seasons"][key]
+        season = int(key)
+        item   = {
+            "season":   season,
+            "label":    season_label(season),
+            "recorded": sum(entry["recorded"].values()),
+            "leagues":  {lg: _analytics_cell(lg, ls["total"]) for lg, ls in sorted(entry["leagues"].items())},
+        }
+        if records and season in records:
+            item["rows"] = build_history_pages(records[season], page_size=len(records[season]) or 1)[0]
+        listing.append(item)
+    return listing
+
+
+# ── Calibration ──────────────────────────────────────────────────────────────
+# simulate_covers' probabilities were never checked against results, and
+# the settled picks win far less often than they claim. Each league's
+# settled picks (raw probability in 1% bins, per tier -- see "calib" in the
+# analytics state) fit a map from raw to realized cover probability: a
+# Platt fit on logit(p) pulled toward the identity, refined per tier by an
+# isotonic (pool-adjacent-violators) pass over the bins with the Platt
+# curve as a prior, so thin tiers stay close to the smooth fit and only
+# well-populated ones follow their own results. The maps are stored in the
+# analytics state as values on a fixed probability grid and refitted only
+# when a league's settled count changes; score_slate interpolates every
+# candidate through them in one pass, so the calibrated probability and
+# edge are what meet the edge threshold and size the Kelly stakes.
+CALIBRATION_VERSION     = 1
+CALIBRATION_MIN_SETTLED = 30      # per league; below this probabilities pass through unchanged
+CALIBRATION_RIDGE       = 20.0    # Platt prior strength toward the identity / league fit
+CALIBRATION_BIN_PRIOR   = 10.0    # pseudo-picks per bin drawn from the Platt curve before PAV
+CALIBRATION_GRID        = (0.20, 0.02, 40)   # first point, step, points: 0.20 .. 0.98
+CALIBRATION_TIERS       = (pick_tier(0.20), pick_tier(0.10), pick_tier(0.0))
+
+
+def calibration_key(record):
+    """(raw probability percent, tier by raw edge) of a history entry.
+    Entries written before calibration carry only the raw "prob"."""
+    raw   = record.get("raw_prob", record.get("prob", 0))
+    price = record.get("price") or 0
+    tier  = pick_tier(raw - 1 / price) if price > 1 else pick_tier(record.get("edge", 0))
+    return min(99, max(0, int(raw * 100))), tier
+
+
+def _logit(p):
+    p = min(max(p, 1e-4), 1 - 1e-4)
+    return math.log(p / (1 - p))
+
+
+def _sigmoid(z):
+    return 1 / (1 + math.exp(-z)) if z > -700 else 0.0
+
+
+def fit_platt(bins, prior=(1.0, 0.0), ridge=CALIBRATION_RIDGE, iters=25):
+    """(a, b) of P(cover) = sigmoid(a * logit(p) + b) over [(p, n, wins)]
+    bins, a ridge penalty pulling both toward `prior`. Newton's method on
+    the 2x2 system; a is kept positive so the map stays increasing."""
+    a, b = prior
+    for _ in range(iters):
+        ga, gb = ridge * (a - prior[0]), ridge * (b - prior[1])
+        haa, hab, hbb = ridge, 0.0, ridge
+        for p, n, wins in bins:
+            x = _logit(p)
+            q = _sigmoid(a * x + b)
+            r = n * q - wins
+            w = n * q * (1 - q)
+            ga  += r * x
+            gb  += r
+            haa += w * x * x
+            hab += w * x
+            hbb += w
+        det = haa * hbb - hab * hab
+        if det <= 0:
+            break
+        da = (hbb * ga - hab * gb) / det
+        db = (haa * gb - hab * ga) / det
+        a, b = max(0.05, a - da), b - db
+        if abs(da) < 1e-7 and abs(db) < 1e-7:
+            break
+    return a, b
+
+
+def isotonic(values, weights):
+    """Weighted pool-adjacent-violators: the non-decreasing sequence
+    closest to `values` in weighted least squares."""
+    blocks = []   # [mean, weight, count]
+    for v, w in zip(values, weights):
+        blocks.append([v, w, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            v2, w2, c2 = blocks.pop()
+            v1, w1, c1 = blocks[-1]
+            blocks[-1] = [(v1 * w1 + v2 * w2) / (w1 + w2), w1 + w2, c1 + c2]
+    out = []
+    for v, _, c in blocks:
+        out.extend([v] * c)
+    return out
+
+
+def _calibration_grid():
+    lo, step, n = CALIBRATION_GRID
+    return [lo + step * i for i in range(n)]
+
+
+def fit_calibration(ls):
+    """{tier: calibrated probability at each CALIBRATION_GRID point} for one
+    league state, or None when it has too few settled picks to fit."""
+    calib = ls.get("calib") or {}
+    tiers = {
+        tier: sorted(((int(k) + 0.5) / 100, n, wins) for k, (n, wins) in bins.items())
+        for tier, bins in calib.items()
+    }
+    pooled = [b for bins in tiers.values() for b in bins]
+    if sum(n for _, n, _ in pooled) < CALIBRATION_MIN_SETTLED:
+        return None
+    league_fit = fit_platt(pooled)
+    grid   = _calibration_grid()
+    tables = {}
+    for tier in CALIBRATION_TIERS:
+        bins  = tiers.get(tier, [])
+        a, b  = fit_platt(bins, prior=league_fit) if bins else league_fit
+        table = [_sigmoid(a * _logit(g) + b) for g in grid]
+        if bins:
+            xs    = [p for p, _, _ in bins]
+            prior = [_sigmoid(a * _logit(p) + b) for p in xs]
+            fit   = isotonic(
+                [(wins + CALIBRATION_BIN_PRIOR * q) / (n + CALIBRATION_BIN_PRIOR) for (_, n, wins), q in zip(bins, prior)],
+                [n + CALIBRATION_BIN_PRIOR for _, n, _ in bins],
+            )
+            for i, g in enumerate(grid):
+                if xs[0] <= g <= xs[-1]:
+                    j = min(bisect.bisect_right(xs, g), len(xs) - 1)
+                    t = (g - xs[j - 1]) / (xs[j] - xs[j - 1]) if j and xs[j] > xs[j - 1] else 1.0
+                    table[i] = fit[j - 1] + (fit[j] - fit[j - 1]) * t if j else fit[0]
+            for i in range(1, len(table)):
+                table[i] = max(table[i], table[i - 1])
+        tables[tier] = [round(v, 4) for v in table]
+    return tables
+
+
+def update_calibration(state):
+    """Per-league calibration tables, refitted only for leagues whose
+    settled count moved since the last fit; kept in the analytics state."""
+    cal = (state or {}).get("calibration")
+    if not cal or cal.get("version") != CALIBRATION_VERSION:
+        cal = {"version": CALIBRATION_VERSION, "seen": {}, "tables": {}}
+    for league, ls in (state or {}).get("leagues", {}).items():
+        settled = ls["total"][0]
+        if cal["seen"].get(league) == settled:
+            continue
+        with span("fit_calibration"):
+            tables = fit_calibration(ls)
+        cal["seen"][league] = settled
+        if tables:
+            cal["tables"][league] = tables
+        else:
+            cal["tables"].pop(league, None)
+        count("calibration_refits", league=league)
+    if state is not None:
+        state["calibration"] = cal
+    return cal["tables"]
+
+
+def calibrate(tables, probs, implied):
+    """Calibrated probabilities for raw `probs`, each read through its tier's
+    table (tier by raw edge against the `implied` probability) with linear
+    interpolation on the grid. No tables: the raw probabilities."""
+    if not tables:
+        return list(probs)
+    lo, step, n = CALIBRATION_GRID
+    out = []
+    for p, q in zip(probs, implied):
+        table = tables.get(pick_tier(p - q))
+        if table is None:
+            out.append(p)
+            continue
+        x = min(max((p - lo) / step, 0.0), n - 1.0)
+        i = min(int(x), n - 2)
+        out.append(table[i] + (table[i + 1] - table[i]) * (x - i))
+    return out
+
+
+def kelly_fraction(prob, price, fraction=KELLY_FRACTION):
     b = price - 1
     if b <= 0:
         return 0.0
     q = 1 - prob
     k = (b * prob - q) / b
-    k = max(0.0, k) * fraction
-    return round(bankroll * k, 1)
+    return max(0.0, k) * fraction
 
 
-def predict_margin(home, away, injury_data, live_ratings):
-    h_base = live_ratings.get(home, FALLBACK_RATINGS.get(home, DEFAULT_RATING))
-    a_base = live_ratings.get(away, FALLBACK_RATINGS.get(away, DEFAULT_RATING))
-    h_stat = dict(h_base)
-    a_stat = dict(a_base)
+def kelly_stake(prob, price, bankroll, fraction=KELLY_FRACTION):
+    return round(bankroll * kelly_fraction(prob, price, fraction), 1)
+
+
+def current_bankroll(analytics, start=BANKROLL):
+    """Starting bankroll plus the realized P&L of every settled staked pick
+    (every league but the summer watchlist), so stake sizing follows the
+    actual results instead of pretending the account is still sitting at
+    its opening balance. Floored at 10% of the start so a losing streak
+    shrinks stakes rather than zeroing them."""
+    profit = sum(
+        calc_performance(analytics, league=name)[3]
+        for name in ((analytics or {}).get("leagues") or {})
+        if name != "summer"
+    )
+    return max(start * 0.1, start + profit)
+
+
+def _project_capped(values, cap):
+    """Euclidean projection of `values` onto {x >= 0, sum(x) <= cap}."""
+    clipped = [max(0.0, v) for v in values]
+    if sum(clipped) <= cap:
+        return clipped
+    # Onto the simplex sum(x) == cap: find the shift theta with
+    # sum(max(v - theta, 0)) == cap via the usual sort-and-scan.
+    ordered = sorted(values, reverse=True)
+    running = 0.0
+    theta   = 0.0
+    for i, v in enumerate(ordered, 1):
+        running += v
+        t = (running - cap) / i
+        if v - t > 0:
+            theta = t
+    return [max(0.0, v - theta) for v in values]
+
+
+def _project_portfolio(f, groups, game_cap, total_cap, iters=30):
+    """Project onto the intersection of the per-game caps and the total
+    exposure cap with Dykstra's alternating projections -- each set has a
+    cheap exact projection, their intersection doesn't."""
+    x = list(f)
+    p = [0.0] * len(x)
+    q = [0.0] * len(x)
+    for _ in range(iters):
+        y = [0.0] * len(x)
+        shifted = [x[i] + p[i] for i in range(len(x))]
+        for idx in groups.values():
+            proj = _project_capped([shifted[i] for i in idx], game_cap)
+            for i, v in zip(idx, proj):
+                y[i] = v
+        p = [shifted[i] - y[i] for i in range(len(x))]
+        shifted = [y[i] + q[i] for i in range(len(x))]
+        x_new = _project_capped(shifted, total_cap)
+        q = [shifted[i] - x_new[i] for i in range(len(x))]
+        if max(abs(a - b) for a, b in zip(x, x_new)) < 1e-9:
+            x = x_new
+            break
+        x = x_new
+    return x
+
+
+def allocate_portfolio(picks, bankroll, fraction=KELLY_FRACTION,
+                       game_cap=PORTFOLIO_GAME_CAP, total_cap=PORTFOLIO_MAX_EXPOSURE,
+                       steps=300):
+    """Size a whole slate at once instead of one pick at a time.
+
+    `picks` is a list of Pick (anything with game_id/prob/price), at most
+    one per game id -- score_slate and group_by_date keep only each game's
+    best outcome. Sizing each independently with kelly_stake lets an
+    8-pick night commit far more than any single-bet Kelly fraction
+    suggests.
+
+    This maximizes the second-order expected log growth
+        g(f) = f . mu - (1 / (2 * fraction)) * f' M f
+    where mu_i is pick i's expected return per unit and M = E[r r'] its
+    return second-moment matrix -- the Taylor expansion of E[log(1 + f.r)],
+    whose unconstrained optimum is `fraction` times the simultaneous Kelly
+    vector. Every pair of picks is treated as independent (M_ij = mu_i
+    mu_j). Projected gradient ascent then enforces f >= 0, each game id's
+    total <= game_cap and the slate's total <= total_cap, with every pick
+    also capped at its standalone fractional Kelly stake so adding picks can
+    only ever shrink a stake.
+
+    Limitation: with one pick per game id there are no correlated legs to
+    model, so game_cap works as a per-pick cap and nothing here accounts
+    for correlation. A player prop has its own game id (player and stat),
+    so it sits in the same slate as its game's side or total and is sized
+    as if independent of it.
+
+    Returns stakes in currency, aligned with `picks`.
+    """
+    n = len(picks)
+    if not n:
+        return []
+    b  = [p.price - 1 for p in picks]
+    pr = [p.prob for p in picks]
+    mu = [pr[i] * b[i] - (1 - pr[i]) for i in range(n)]
+
+    M = [[0.0] * n for _ in range(n)]
+    for i in range(n):
+        for j in range(i, n):
+            if i == j:
+                m = pr[i] * b[i] * b[i] + (1 - pr[i])
+            else:
+                m = mu[i] * mu[j]
+            M[i][j] = M[j][i] = m
+
+    groups = {}
+    for i, p in enumerate(picks):
+        groups.setdefault(p.game_id, []).append(i)
+    solo_caps = [kelly_fraction(pr[i], picks[i].price, fraction) for i in range(n)]
+
+    # Fixed step from a Gershgorin bound on the Hessian's largest eigenvalue.
+    lipschitz = max(sum(abs(v) for v in row) for row in M) / fraction or 1.0
+    step = 1.0 / lipschitz
+    f = [0.0] * n
+    for _ in range(steps):
+        grad = [mu[i] - sum(M[i][j] * f[j] for j in range(n)) / fraction for i in range(n)]
+        f_new = [min(solo_caps[i], f[i] + step * grad[i]) for i in range(n)]
+        f_new = _project_portfolio(f_new, groups, game_cap, total_cap)
+        if max(abs(a - c) for a, c in zip(f, f_new)) < 1e-7:
+            f = f_new
+            break
+        f = f_new
+    return [round(bankroll * v, 1) for v in f]
+
+
+def predict_margin(home, away, injury_data, live_ratings, schedule=None, tip_off=None, impacts=None):
+    h_base  = team_rating(home, live_ratings)
+    a_base  = team_rating(away, live_ratings)
+    impacts = impacts or {}
 
     def get_missing(team):
         injured_lower = [p.lower() for p in injury_data.get(team, [])]
         result = []
-        for k in IMPACT_PLAYERS.get(team, []):
-            if k in SEASON_OUT or any(k in p for p in injured_lower):
+        for k in impacts.get(team) or IMPACT_PLAYERS.get(team, []):
+            if listed_player(k, SEASON_OUT) or any(k in p for p in injured_lower):
                 result.append((k, "out"))
-            elif k in LIMITED_PLAYERS:
+            elif listed_player(k, LIMITED_PLAYERS):
                 result.append((k, "limited"))
         return result
 
     h_missing = get_missing(home)
     a_missing = get_missing(away)
 
-    for p, status in h_missing:
-        penalty = (SUPERSTAR_PENALTY if p in SUPERSTARS else STAR_PENALTY) if status == "out" else LIMITED_PENALTY
-        h_stat["off"] -= penalty * 0.6
-        h_stat["def"] += penalty * 0.4
-
-    for p, status in a_missing:
-        penalty = (SUPERSTAR_PENALTY if p in SUPERSTARS else STAR_PENALTY) if status == "out" else LIMITED_PENALTY
-        a_stat["off"] -= penalty * 0.6
-        a_stat["def"] += penalty * 0.4
-
-    h_net  = (h_stat["off"] - h_stat["def"]) + h_base.get("form", 0.0)
-    a_net  = (a_stat["off"] - a_stat["def"]) + a_base.get("form", 0.0)
-    margin = (h_net - a_net) / 2 + HOME_ADVANTAGE
+    def injury_penalty(team, missing):
+        """Points of margin lost: the lineup table's vector sum where the
+        team has one, else the flat per-100 penalties at half weight."""
+        if team in impacts:
+            return sum(lineup_delta(impacts, team, missing))
+        return sum(
+            (SUPERSTAR_PENALTY if p in SUPERSTARS else STAR_PENALTY) if status == "out" else LIMITED_PENALTY
+            for p, status in missing
+        ) / 2
+
+    h_pen = injury_penalty(home, h_missing)
+    a_pen = injury_penalty(away, a_missing)
+    h_net = h_base.off - h_base.defense + h_base.form
+    a_net = a_base.off - a_base.defense + a_base.form
+    if isinstance(live_ratings, MarginRatings) and home in live_ratings and away in live_ratings:
+        # Solved ratings are already points per game against an average
+        # opponent, so their difference is used at full scale with the
+        # fitted home-court term.
+        margin = (h_net - a_net) + live_ratings.home_court - (h_pen - a_pen)
+    else:
+        margin = (h_net - a_net) / 2 + HOME_ADVANTAGE - (h_pen - a_pen)
+    if schedule is not None and tip_off is not None:
+        margin += schedule.margin_adjustment(home, away, tip_off)
 
     def fmt(lst):
         return ["%s(%s)" % (display_player_name(p), "缺" if s == "out" else "限") for p, s in lst]
@@ -482,65 +2560,900 @@ def predict_margin(home, away, injury_data, live_ratings):
 
 
 def predict_total(home, away, live_ratings):
-    h_base = live_ratings.get(home, FALLBACK_RATINGS.get(home, DEFAULT_RATING))
-    a_base = live_ratings.get(away, FALLBACK_RATINGS.get(away, DEFAULT_RATING))
-    return round((h_base["off"] + a_base["off"]) / 2 * 2 * 0.97, 1)
+    h_base = team_rating(home, live_ratings)
+    a_base = team_rating(away, live_ratings)
+    if isinstance(live_ratings, MarginRatings) and home in live_ratings and away in live_ratings:
+        mu = live_ratings.mean_points
+        return round((h_base.off + a_base.defense - mu) + (a_base.off + h_base.defense - mu), 1)
+    return round((h_base.off + a_base.off) / 2 * 2 * 0.97, 1)
 
 
-def get_consensus_line(bookmakers, team_name):
-    lines = []
-    for book in bookmakers:
-        for market in book.get("markets", []):
-            if market.get("key") != "spreads":
+def ou_note(model_total, consensus_total):
+    if not consensus_total:
+        return ""
+    diff = model_total - consensus_total
+    if diff > 3:
+        return "OU: 模型偏大分 (%.1f vs 市場 %.1f) 偏Over" % (model_total, consensus_total)
+    if diff < -3:
+        return "OU: 模型偏小分 (%.1f vs 市場 %.1f) 偏Under" % (model_total, consensus_total)
+    return "OU: 模型 %.1f vs 市場 %.1f (無明顯偏向)" % (model_total, consensus_total)
+
+
+# ── League engine ────────────────────────────────────────────────────────────
+# A League bundles one sport's Odds API key, how its games are modelled and
+# the thresholds its picks are held to; score_slate is the one scoring pass
+# every league (and the summer-league watchlist) goes through. `name` is
+# the history / analytics "league" tag.
+Slate = namedtuple("Slate", "league games model live")
+
+
+class League:
+    """A sport the engine can score from the Odds API alone: team strength
+    comes from RatingSolver over a results store built up from the Odds
+    API /scores feed (CACHE_DIR/results_<sport_key>.json), so the model
+    improves as the season's finals accumulate run over run."""
+
+    def __init__(self, name, label, sport_key, edge_threshold=EDGE_THRESHOLD,
+                 model_weight=MODEL_WEIGHT, market_weight=MARKET_WEIGHT, std=DYNAMIC_STD_BASE,
+                 markets=SCORED_MARKETS, spread_range=(MIN_SPREAD, MAX_SPREAD),
+                 history_edge=0.12, staked=True):
+        self.name           = name
+        self.label          = label
+        self.sport_key      = sport_key
+        self.edge_threshold = edge_threshold
+        self.model_weight   = model_weight
+        self.market_weight  = market_weight
+        self.std            = std
+        self.markets        = markets
+        self.spread_range   = spread_range
+        self.history_edge   = history_edge
+        self.staked         = staked
+
+    def __repr__(self):
+        return "League(%s)" % self.name
+
+    def fetch_odds(self):
+        data = fetch_board(self.sport_key)
+        log.info("%s odds loaded: %d games", self.label, len(data or []))
+        return data or []
+
+    def fetch_live_board(self):
+        """The bulk in-play board (ODDS_MARKETS), one request per region.
+        Never the per-event period markets fetch_odds may add for a league:
+        live mode polls this every few seconds."""
+        return fetch_board(self.sport_key) or []
+
+    def update_results(self):
+        """This league's results store (finals keyed by event id), after
+        upserting the last three days of Odds API scores."""
+        name   = "results_%s.json" % self.sport_key
+        finals = load_cache(name) or {}
+        data   = safe_get(
+            "https://api.the-odds-api.com/v4/sports/%s/scores/" % self.sport_key,
+            params={"apiKey": ODDS_API_KEY, "daysFrom": 3},
+        )
+        for ev in data or []:
+            scores = {s.get("name"): s.get("score") for s in ev.get("scores") or []}
+            try:
+                hs, vs = int(scores[ev["home_team"]]), int(scores[ev["away_team"]])
+            except (KeyError, TypeError, ValueError):
                 continue
-            for outcome in market.get("outcomes", []):
-                if normalize_team(outcome.get("name", "")) == team_name:
-                    pt = outcome.get("point")
-                    if pt is not None:
-                        lines.append(pt)
-    return (sum(lines) / len(lines)) if lines else None
+            if ev.get("completed"):
+                finals[ev.get("id") or ev["commence_time"]] = [
+                    ev["commence_time"][:10], ev["home_team"], ev["away_team"], hs, vs,
+                ]
+        save_cache(name, finals)
+        return finals
+
+    def fetch_inputs(self, now_utc):
+        """Everything build_slate needs, fetched: the board as Games plus
+        plain-JSON model inputs (see freeze_inputs)."""
+        games = self.fetch_odds()
+        if not games:
+            # No board, no reason to spend a /scores request.
+            return {"games": []}
+        return {"games": games, "finals": list(self.update_results().values())}
+
+    def build_slate(self, inputs):
+        """The Slate for fetched (or snapshot-loaded) inputs. No I/O."""
+        games = inputs["games"]
+        if not games:
+            return Slate(self, [], None, False)
+        rows    = [GameRow(d, "Final", h, a, hs, vs) for d, h, a, hs, vs in inputs.get("finals", [])]
+        ratings = ratings_from_games(rows, RatingSolver(known=None))
+
+        def model(g):
+            if g.home not in ratings or g.away not in ratings:
+                return None
+            h, a   = ratings[g.home], ratings[g.away]
+            margin = (h.off - h.defense) - (a.off - a.defense) + ratings.home_court
+            total  = (h.off + a.defense - ratings.mean_points) + (a.off + h.defense - ratings.mean_points)
+            return margin, [], [], ou_note(round(total, 1), g.consensus("totals", "over"))
+
+        return Slate(self, games, model, bool(ratings))
+
+    def prepare(self, now_utc):
+        return self.build_slate(self.fetch_inputs(now_utc))
+
+
+class NbaLeague(League):
+    """The NBA: balldontlie season games for MarginRatings and the schedule
+    index, balldontlie box scores for the player impact table (and the
+    prop profiles), RotoWire injuries, and optional period and prop
+    markets."""
+
+    def fetch_odds(self):
+        return fetch_odds()
+
+    def fetch_inputs(self, now_utc):
+        with span("fetch_team_stats"):
+            season_games = fetch_season_games()
+        with span("player_impacts"):
+            store   = update_player_stats(season_games) if BALLDONTLIE_KEY and season_games else {}
+            impacts = fetch_player_impacts(season_games, store)
+        with span("get_injury_report"):
+            injuries = get_injury_report(injury_watchlist(impacts))
+        with span("fetch_odds"):
+            games = self.fetch_odds()
+        inputs = {"games": games, "season_games": season_games, "injuries": injuries, "impacts": impacts}
+        if PROP_MARKETS and games and store:
+            with span("fetch_props"):
+                fetch_prop_odds(games, now_utc)
+                inputs["props"] = build_prop_profiles(store)
+        return inputs
+
+    def build_slate(self, inputs):
+        season_games = inputs.get("season_games", [])
+        live_ratings = fetch_team_stats(season_games)
+        schedule     = ScheduleIndex(season_games)
+        model        = nba_model(inputs.get("injuries", {}), live_ratings, schedule, inputs.get("impacts"))
+        return Slate(self, inputs["games"], model, bool(live_ratings))
+
+
+def nba_model(injuries, live_ratings, schedule=None, impacts=None):
+    def model(g):
+        margin, h_missing, a_missing = predict_margin(
+            g.home, g.away, injuries, live_ratings, schedule, g.commence, impacts,
+        )
+        note = ou_note(predict_total(g.home, g.away, live_ratings), g.consensus("totals", "over"))
+        return margin, h_missing, a_missing, note
+    return model
 
 
-def get_consensus_total(bookmakers):
-    totals = []
-    for book in bookmakers:
-        for market in book.get("markets", []):
-            if market.get("key") != "totals":
+NBA = NbaLeague("regular", "NBA", "basketball_nba")
+LEAGUES = {
+    "regular":    NBA,
+    "wnba":       League("wnba", "WNBA", "basketball_wnba", std=11.0),
+    "ncaab":      League("ncaab", "NCAA男籃", "basketball_ncaab", std=11.5, spread_range=(MIN_SPREAD, 25.0)),
+    "euroleague": League("euroleague", "歐洲聯賽", "basketball_euroleague", std=11.0),
+}
+# Extra leagues to run alongside the NBA, e.g. NBA_LEAGUES=wnba,euroleague.
+ACTIVE_LEAGUES = ["regular"] + [
+    n.strip() for n in os.getenv("NBA_LEAGUES", "").split(",")
+    if n.strip() in LEAGUES and n.strip() != "regular"
+]
+
+
+def freeze_inputs(inputs):
+    """League inputs as plain JSON: Games back to Odds API events (the
+    GameRow tuples in season_games already serialize as lists)."""
+    frozen = dict(inputs)
+    frozen["games"] = [g.to_odds() for g in inputs["games"]]
+    return frozen
+
+
+def thaw_inputs(inputs):
+    thawed = dict(inputs)
+    thawed["games"] = [g for g in map(Game.from_odds, inputs.get("games", [])) if g is not None]
+    if "season_games" in inputs:
+        thawed["season_games"] = [GameRow(*row) for row in inputs["season_games"]]
+    return thawed
+
+
+def _fetch_safely(league, now_utc):
+    try:
+        return league.fetch_inputs(now_utc)
+    except Exception as e:
+        log.error("League %s failed to load: %s", league.name, e)
+        return {"games": []}
+
+
+def fetch_league_inputs(leagues, now_utc):
+    """{league name: inputs}. The first league loads on the main thread (so
+    its stage spans still show up in the run report) while the rest load
+    concurrently on worker threads sharing the HTTP session."""
+    if not leagues:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, len(leagues) - 1), thread_name_prefix="league") as pool:
+        futures = [pool.submit(_fetch_safely, l, now_utc) for l in leagues[1:]]
+        inputs  = {leagues[0].name: _fetch_safely(leagues[0], now_utc)}
+        for league, f in zip(leagues[1:], futures):
+            inputs[league.name] = f.result()
+    return inputs
+
+
+def prepare_leagues(leagues, now_utc):
+    """One Slate per league, fetched live."""
+    inputs = fetch_league_inputs(leagues, now_utc)
+    return [l.build_slate(inputs[l.name]) for l in leagues]
+
+
+def score_slate(league, games, model, now_utc, keep_all=False, calibration=None, seed=0):
+    """The scoring pass shared by every league: each not-yet-started game's
+    outcomes in league.markets, blended model/market margin, one batched
+    cover simulation, best outcome per game as a Pick. Outcomes below
+    league.edge_threshold are dropped unless keep_all (the summer watchlist
+    shows every evaluated game). `model(game)` returns (margin, home
+    missing, away missing, ou note), or None to skip the game.
+    `calibration` is the league's table set from update_calibration; the
+    calibrated probability is what the edge is measured from. `seed` is the
+    run seed each game's simulation stream is derived from."""
+    candidates = []
+    lo, hi     = league.spread_range
+
+    for g in games:
+        if g.commence < now_utc:
+            continue
+        modelled = model(g)
+        if modelled is None:
+            continue
+        margin, h_missing, a_missing, note = modelled
+
+        # Only the best playable price of each line (see best_outcomes).
+        for o in g.best_outcomes(MIN_PRICE, MAX_PRICE):
+            base, period = split_market_key(o.market)
+            if base not in league.markets or period is None:
+                continue
+            scale = MARKET_PERIODS[period]
+            if base == "spreads":
+                if o.point is None:
+                    continue
+                line = o.point
+                if not (lo * scale <= abs(line) <= hi * scale):
+                    continue
+            else:
+                line = 0.0
+
+            consensus = g.consensus("spreads" + period, o.side)
+            if consensus is None:
+                # A moneyline has no number of its own to fall back on;
+                # without a spread market there's no market margin to
+                # blend the model against.
+                if base == "h2h":
+                    continue
+                consensus = line
+
+            # A higher signed point value is always better for whichever side
+            # you're betting: more cushion for the underdog (+5.5 beats +4.5),
+            # less to cover for the favorite (-4.5 beats -5.5). So the
+            # comparison is `line - consensus` uniformly -- no sign flip by
+            # favorite/underdog. (Previously flipped for negative lines, which
+            # inverted the favorable/unfavorable verdict for every favorite bet.)
+            if base == "spreads" and line - consensus < 0:
                 continue
-            for outcome in market.get("outcomes", []):
-                if outcome.get("name", "").lower() == "over":
-                    pt = outcome.get("point")
-                    if pt is not None:
-                        totals.append(pt)
-    return (sum(totals) / len(totals)) if totals else None
-
-
-def simulate_cover(blended, line, std=DYNAMIC_STD_BASE):
-    wins = sum(
-        1 for _ in range(SIMS)
-        if blended + random.gauss(0, std) + line > 0
+
+            is_home = o.side == g.home
+            target  = (margin if is_home else -margin) * scale
+            missing = (h_missing + a_missing) if is_home else (a_missing + h_missing)
+            candidates.append((
+                g, o, consensus, missing, note, line,
+                target * league.model_weight + (-consensus) * league.market_weight,
+                league.std * scale ** 0.5,
+            ))
+
+    # One simulation pass over every market of every game: a moneyline is
+    # just a spread of 0 (win outright), so both share the cover model.
+    raw_probs = simulate_covers(
+        [c[6] for c in candidates],
+        [c[5] for c in candidates],
+        [c[7] for c in candidates],
+        keys=[game_key(c[0]) for c in candidates],
+        seed=seed,
     )
-    return wins / SIMS
+    implied = [1 / c[1].price for c in candidates]
+    probs   = calibrate(calibration, raw_probs, implied)
+    best = {}
+    for (g, o, consensus, missing, note, _, _, _), prob, raw, q in zip(candidates, probs, raw_probs, implied):
+        edge = prob - q
+        if edge < league.edge_threshold and not keep_all:
+            continue
+        existing = best.get(g)
+        if existing is None or edge > existing[0]:
+            best[g] = (edge, prob, o, consensus, missing, note, raw)
+    # Only each game's winning outcome becomes a Pick.
+    return [
+        Pick(g, o, prob, edge, consensus, missing, note, league, raw)
+        for g, (edge, prob, o, consensus, missing, note, raw) in best.items()
+    ]
+
+
+def group_by_date(picks, daily_picks=None):
+    """{Taiwan date: {game_id: Pick}}, keeping the best pick per game id."""
+    daily_picks = {} if daily_picks is None else daily_picks
+    for pick in picks:
+        day      = daily_picks.setdefault(pick.date, {})
+        existing = day.get(pick.game_id)
+        if existing is None or pick.edge > existing.edge:
+            day[pick.game_id] = pick
+    return daily_picks
+
+
+# ── Player props ─────────────────────────────────────────────────────────────
+# Points / rebounds / assists lines. Each player's line is priced from his
+# per-game distribution in the box-score store (see fold_box_scores), scaled
+# for the opponent's allowance and for teammates the injury report has out,
+# blended with the books' consensus line the way a team margin is, and run
+# through the same batched simulation, calibration, portfolio Kelly and
+# history as every other pick under the "props" league tag. Lines come from
+# the per-event endpoint -- one request per game -- so they stay off unless
+# NBA_PROPS lists the markets, e.g. player_points,player_rebounds.
+PROP_STATS = {"player_points": "pts", "player_rebounds": "reb", "player_assists": "ast"}
+PROP_ZH    = {"player_points": "得分", "player_rebounds": "籃板", "player_assists": "助攻"}
+PROP_STAT_KEYS = ("pts", "reb", "ast")
+PROP_MARKETS   = [m.strip() for m in os.getenv("NBA_PROPS", "").split(",") if m.strip() in PROP_STATS]
+PROP_WORKERS         = 4
+PROP_MIN_GAMES       = 10
+PROP_MIN_SD          = {"pts": 3.0, "reb": 1.5, "ast": 1.2}
+PROP_OPP_PRIOR_GAMES = 10.0   # games of league-average defence each team's allowance is shrunk toward
+PROP_INJURY_PASS     = 0.5    # share of an out teammate's production the rest of the roster absorbs
+PROP_NAME_SUFFIXES   = (" jr", " sr", " ii", " iii", " iv")
+PROPS = League("props", "球員道具", "basketball_nba", edge_threshold=0.08,
+               model_weight=0.5, market_weight=0.5, markets=tuple(PROP_STATS))
+
+
+def prop_player_key(name):
+    """A player name as both balldontlie and the books can be matched on:
+    lower case, no periods or apostrophes, no Jr./III suffix."""
+    key = (name or "").lower().replace(".", "").replace("'", "").strip()
+    for suffix in PROP_NAME_SUFFIXES:
+        if key.endswith(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+def build_prop_profiles(store):
+    """The props model's plain-JSON input from a box-score store: every
+    current player with PROP_MIN_GAMES games (stale players dropped as in
+    build_player_impacts) as his per-game [mean, sd] of each stat, keyed by
+    prop_player_key, and each team's allowance per stat relative to the
+    league, shrunk toward 1 by PROP_OPP_PRIOR_GAMES."""
+    latest = {team: max(g[0] for g in games.values())
+              for team, games in store.get("teams", {}).items() if games}
+    players = {}
+    for name, p in store.get("players", {}).items():
+        gp = p["gp"]
+        if gp < PROP_MIN_GAMES or p["team"] not in latest or "pts" not in p:
+            continue
+        stale = datetime.strptime(latest[p["team"]], "%Y-%m-%d") - datetime.strptime(p["last"], "%Y-%m-%d")
+        if stale.days > PLAYER_STALE_DAYS:
+            continue
+        profile = {"name": name, "team": p["team"], "gp": gp}
+        for stat in PROP_STAT_KEYS:
+            total, squares = p[stat]
+            mean = total / gp
+            var  = max(0.0, squares / gp - mean * mean) * gp / (gp - 1)
+            profile[stat] = [round(mean, 2), round(max(math.sqrt(var), PROP_MIN_SD[stat]), 2)]
+        players[prop_player_key(name)] = profile
+
+    allowed = store.get("allowed", {})
+    games   = sum(a[0] for a in allowed.values())
+    defense = {}
+    if games:
+        league = [sum(a[i + 1] for a in allowed.values()) / games for i in range(len(PROP_STAT_KEYS))]
+        for team, a in allowed.items():
+            defense[team] = {
+                stat: round((a[i + 1] + PROP_OPP_PRIOR_GAMES * league[i])
+                            / ((a[0] + PROP_OPP_PRIOR_GAMES) * league[i]), 3) if league[i] else 1.0
+                for i, stat in enumerate(PROP_STAT_KEYS)
+            }
+    return {"players": players, "defense": defense}
+
+
+def fetch_prop_odds(games, now_utc, markets=None):
+    """Add every upcoming game's prop lines to its outcomes in place, one
+    per-event request per game, PROP_WORKERS at a time."""
+    markets  = markets or PROP_MARKETS
+    upcoming = [g for g in games if g.id and g.commence > now_utc]
+    if not markets or not upcoming:
+        return
+    with ThreadPoolExecutor(max_workers=PROP_WORKERS, thread_name_prefix="props") as pool:
+        for g, outcomes in zip(upcoming, pool.map(lambda g: fetch_event_odds(g, markets), upcoming)):
+            g.add_outcomes(outcomes)
+    log.info("Prop lines loaded: %d", sum(1 for g in upcoming for o in g.outcomes if o.player))
+
+
+def score_props(league, games, props, injuries, now_utc, calibration=None, seed=0):
+    """score_slate for player props: every prop line of every
+    not-yet-started game in one batched simulation, best side and book per
+    player and stat as a Pick. A line's model mean is the player's season
+    mean times the opponent's allowance factor times an injury boost --
+    PROP_INJURY_PASS of the team's production sitting out tonight, spread
+    over the rest -- blended with the consensus line by the league's
+    weights. Players the injury report has out are skipped."""
+    players = props.get("players", {})
+    defense = props.get("defense", {})
+
+    # Each team's production per stat, and the part of it ruled out.
+    totals, missing, out = {}, {}, {}
+    for prof in players.values():
+        team   = prof["team"]
+        t      = totals.setdefault(team, [0.0] * len(PROP_STAT_KEYS))
+        m      = missing.setdefault(team, [0.0] * len(PROP_STAT_KEYS))
+        is_out = listed_player(prof["name"], injuries.get(team, []))
+        if is_out:
+            out.setdefault(team, []).append("%s(缺)" % display_player_name(prof["name"]))
+        for i, stat in enumerate(PROP_STAT_KEYS):
+            t[i] += prof[stat][0]
+            if is_out:
+                m[i] += prof[stat][0]
+
+    candidates = []
+    for g in games:
+        if g.commence < now_utc:
+            continue
+        for o in g.best_outcomes(MIN_PRICE, MAX_PRICE):
+            stat = PROP_STATS.get(o.market)
+            if stat is None or not o.player or o.point is None:
+                continue
+            prof = players.get(prop_player_key(o.player))
+            if prof is None or prof["team"] not in (g.home, g.away):
+                continue
+            team = prof["team"]
+            if listed_player(prof["name"], injuries.get(team, [])):
+                continue
+            # As with spreads, only a number at least as good as the
+            # market's: at or under consensus for an over, at or over it
+            # for an under.
+            sign      = 1 if o.side == "over" else -1
+            consensus = g.consensus(o.market, o.side, o.player)
+            if (consensus - o.point) * sign < 0:
+                continue
+
+            i        = PROP_STAT_KEYS.index(stat)
+            mean, sd = prof[stat]
+            t, m     = totals[team][i], missing[team][i]
+            boost    = 1 + PROP_INJURY_PASS * m / (t - m) if t > m else 1.0
+            opp      = defense.get(g.away if team == g.home else g.home, {}).get(stat, 1.0)
+            model    = mean * opp * boost
+            note     = "模型: %.1f ± %.1f（對手 ×%.2f%s）" % (
+                model, sd, opp, "、傷兵 ×%.2f" % boost if boost != 1.0 else "")
+            # Over: mu + z * sd - line > 0; under: line - mu - z * sd > 0,
+            # the same cover check as a spread with z's sign flipped.
+            mu = model * league.model_weight + consensus * league.market_weight
+            candidates.append((g, o, consensus, out.get(team, []), note, -sign * o.point, sign * mu, sd))
+
+    raw_probs = simulate_covers(
+        [c[6] for c in candidates],
+        [c[5] for c in candidates],
+        [c[7] for c in candidates],
+        keys=[game_key(c[0]) for c in candidates],
+        seed=seed,
+    )
+    implied = [1 / c[1].price for c in candidates]
+    probs   = calibrate(calibration, raw_probs, implied)
+    best = {}
+    for (g, o, consensus, absent, note, _, _, _), prob, raw, q in zip(candidates, probs, raw_probs, implied):
+        edge = prob - q
+        if edge < league.edge_threshold:
+            continue
+        key = (g, o.player, o.market)
+        if key not in best or edge > best[key][0]:
+            best[key] = (edge, prob, o, consensus, absent, note, raw)
+    count("prop_lines_scored", len(candidates))
+    return [
+        Pick(g, o, prob, edge, consensus, absent, note, league, raw)
+        for (g, _, _), (edge, prob, o, consensus, absent, note, raw) in best.items()
+    ]
+
+
+# Cross-book line shopping. The pick loop in run() scores every book's
+# outcome on its own, which finds the best *edge* but never notices when two
+# books disagree enough to be played against each other.
+LINE_SHOP_MARKETS = ("h2h", "spreads", "totals")
+MIN_MIDDLE_WIDTH  = 1.0
+
+
+def build_line_index(game):
+    """Per-game cross-book index: market -> side -> [(point, price, book)],
+    each side sorted best-first so the head of every list is the line worth
+    shopping for.
+
+    "Best" is the same higher-signed-point-is-better rule run() uses for
+    spreads (more cushion for the dog, less to cover for the favorite), the
+    lowest number for Over and the highest for Under, with price as the
+    tiebreak -- and price alone for h2h. One sort per side keeps a game at
+    O(n log n) in its book count instead of comparing every pair of books.
+    """
+    index = {}
+    for o in game.outcomes:
+        if o.market not in LINE_SHOP_MARKETS:
+            continue
+        if not o.price or (o.market != "h2h" and o.point is None):
+            continue
+        index.setdefault(o.market, {}).setdefault(o.side, []).append((o.point, o.price, o.book))
+
+    for key, sides in index.items():
+        for side, lines in sides.items():
+            if key == "h2h":
+                lines.sort(key=lambda x: -x[1])
+            elif key == "totals" and side == "over":
+                lines.sort(key=lambda x: (x[0], -x[1]))
+            else:
+                lines.sort(key=lambda x: (-x[0], -x[1]))
+    return index
+
+
+def _lines_by_point(lines):
+    """point -> that number's (point, price, book) lines, best price first
+    (the side's best-first order already sorts price within a number)."""
+    by_point = {}
+    for line in lines:
+        by_point.setdefault(line[0], []).append(line)
+    return by_point
+
+
+def _cross_book_pair(lines_a, lines_b, score):
+    """The best pair of lines from two different books, from two best-first
+    lists: the heads, or when one book quotes both heads, whichever of the
+    head plus the other side's first line from another book scores higher.
+    None when a single book quotes every line."""
+    head_a, head_b = lines_a[0], lines_b[0]
+    if head_a[2] != head_b[2]:
+        return head_a, head_b
+    pairs = [
+        (head_a, next((l for l in lines_b if l[2] != head_a[2]), None)),
+        (next((l for l in lines_a if l[2] != head_b[2]), None), head_b),
+    ]
+    pairs = [p for p in pairs if None not in p]
+    return max(pairs, key=score) if pairs else None
+
+
+def find_arbitrage(index):
+    """Two-way markets where the best cross-book price on each side, at the
+    *same* number, implies probabilities summing under 1 -- i.e. both sides
+    can be bet across two books for a guaranteed return. Spreads pair a
+    side's +x with the other side's -x, totals pair Over x with Under x. A
+    "sub-1" pair quoted by a single book is a stale/bad quote rather than
+    something playable across books, so when one book holds both best
+    prices the next-best price from another book stands in for one leg."""
+    def score(pair):
+        return -(1 / pair[0][1] + 1 / pair[1][1])
+
+    arbs = []
+    for key, sides in index.items():
+        if len(sides) != 2:
+            continue
+        (side_a, lines_a), (side_b, lines_b) = sorted(sides.items())
+        if key == "h2h":
+            pairs = [_cross_book_pair(lines_a, lines_b, score)]
+        else:
+            by_a = _lines_by_point(lines_a)
+            by_b = _lines_by_point(lines_b)
+            sign = -1 if key == "spreads" else 1
+            pairs = [_cross_book_pair(by_a[pt], by_b[sign * pt], score) for pt in by_a if sign * pt in by_b]
+        for pair in pairs:
+            if pair is None:
+                continue
+            (pt_a, price_a, book_a), (pt_b, price_b, book_b) = pair
+            implied = 1 / price_a + 1 / price_b
+            if implied >= 1:
+                continue
+            arbs.append({
+                "market":  key,
+                "legs":    [
+                    {"side": side_a, "point": pt_a, "price": price_a, "book": book_a},
+                    {"side": side_b, "point": pt_b, "price": price_b, "book": book_b},
+                ],
+                "implied": round(implied, 4),
+                "margin":  round((1 / implied - 1) * 100, 2),
+            })
+    arbs.sort(key=lambda a: -a["margin"])
+    return arbs
+
+
+def find_middles(index, min_width=MIN_MIDDLE_WIDTH):
+    """Spread/total pairs at different books that leave a window where both
+    bets win. With each side already sorted best-first, the widest middle is
+    the two list heads -- or, when one book quotes both, the widest pair
+    _cross_book_pair finds walking past it -- so this stays a short check
+    per market: spreads middle when the two points sum above 0 (home +3.5 /
+    away -2.5 both cash on a 3-point home loss), totals when the Under sits
+    above the Over."""
+    middles = []
+    spreads = index.get("spreads", {})
+    if len(spreads) == 2:
+        (side_a, lines_a), (side_b, lines_b) = sorted(spreads.items())
+        pair = _cross_book_pair(lines_a, lines_b, lambda p: (p[0][0] + p[1][0], p[0][1] + p[1][1]))
+        if pair and pair[0][0] + pair[1][0] >= min_width:
+            a, b  = pair
+            width = a[0] + b[0]
+            middles.append({
+                "market": "spreads",
+                "legs":   [
+                    {"side": side_a, "point": a[0], "price": a[1], "book": a[2]},
+                    {"side": side_b, "point": b[0], "price": b[1], "book": b[2]},
+                ],
+                "width":  round(width, 1),
+            })
+    totals = index.get("totals", {})
+    if "over" in totals and "under" in totals:
+        pair = _cross_book_pair(totals["over"], totals["under"], lambda p: (p[1][0] - p[0][0], p[0][1] + p[1][1]))
+        if pair and pair[1][0] - pair[0][0] >= min_width:
+            over, under = pair
+            width = under[0] - over[0]
+            middles.append({
+                "market": "totals",
+                "legs":   [
+                    {"side": "over",  "point": over[0],  "price": over[1],  "book": over[2]},
+                    {"side": "under", "point": under[0], "price": under[1], "book": under[2]},
+                ],
+                "width":  round(width, 1),
+            })
+    return middles
+
+
+def shop_lines(games, now_utc=None):
+    """Best line per side plus any arbitrage/middle for every upcoming game,
+    for the Discord "跨書比價" section and latest.json. Same tip-off cutoff
+    as the pick loop -- a stale pre-game price isn't shoppable anymore."""
+    now_utc = now_utc or datetime.utcnow()
+    report  = []
+    for g in games:
+        if g.commence < now_utc:
+            continue
+        index = build_line_index(g)
+        if not index:
+            continue
+        home, away = g.home, g.away
+        best = [
+            {"market": key, "side": side, "point": lines[0][0], "price": lines[0][1],
+             "book": lines[0][2], "books": len(lines)}
+            for key in LINE_SHOP_MARKETS
+            for side, lines in sorted(index.get(key, {}).items())
+        ]
+        report.append({
+            "matchup":    "%s @ %s" % (TEAM_CN.get(away, away), TEAM_CN.get(home, home)),
+            "start_time": (g.commence + timedelta(hours=8)).strftime("%m/%d %H:%M"),
+            "best":       best,
+            "arbs":       find_arbitrage(index),
+            "middles":    find_middles(index),
+        })
+    return report
+
+
+def _shop_side_label(market, side, point):
+    name = TEAM_CN.get(side, side) if market != "totals" else ("大分" if side == "over" else "小分")
+    if point is None:
+        return name
+    return ("%s %.1f" % (name, point)) if market == "totals" else ("%s %+.1f" % (name, point))
+
+
+def format_line_shopping_section(report):
+    flagged = [r for r in report if r["arbs"] or r["middles"]]
+    if not flagged:
+        return ""
+    lines = ["\n🛒 **跨書盤口比價** (套利 / 中間盤)\n"]
+    for r in flagged:
+        lines.append("**%s** (%s)" % (r["matchup"], r["start_time"]))
+        for a in r["arbs"]:
+            legs = " + ".join(
+                "%s @ %.2f (%s)" % (_shop_side_label(a["market"], l["side"], l["point"]), l["price"], l["book"])
+                for l in a["legs"]
+            )
+            lines.append("> 💰 套利 [%s] %s | 隱含機率 %.1f%% | 報酬 %+.2f%%" % (
+                MARKET_ZH.get(a["market"], a["market"]), legs, a["implied"] * 100, a["margin"]
+            ))
+        for m in r["middles"]:
+            legs = " + ".join(
+                "%s @ %.2f (%s)" % (_shop_side_label(m["market"], l["side"], l["point"]), l["price"], l["book"])
+                for l in m["legs"]
+            )
+            lines.append("> 🎯 中間盤 [%s] %s | 區間寬 %.1f 分" % (
+                MARKET_ZH.get(m["market"], m["market"]), legs, m["width"]
+            ))
+    return "\n".join(lines) + "\n"
+
+
+def split_market_key(key):
+    """"spreads_h1" -> ("spreads", "_h1"); unknown period suffixes give None."""
+    for period in MARKET_PERIODS:
+        if period and key.endswith(period):
+            return key[: -len(period)], period
+    if "_" in key:
+        return key, None
+    return key, ""
+
+
+# ── Simulation ───────────────────────────────────────────────────────────────
+# Every game draws from its own RNG stream, seeded from the run seed and the
+# game's key, so a game's cover probabilities depend only on (run seed, game,
+# SIMS): re-scoring a snapshot reproduces them exactly, and games can be
+# split across worker processes in any grouping with bit-identical results.
+# The run seed is picked in take_snapshot (NBA_SIM_SEED pins it) and stored
+# in the snapshot and the dashboard manifest.
+SIM_POOL_MIN_GAMES = 8
+
+
+def new_run_seed():
+    return int(SIM_SEED) if SIM_SEED else int.from_bytes(os.urandom(6), "big")
+
+
+def stream_seed(seed, key):
+    """The RNG seed of one game's stream: a hash of the run seed and the
+    game's key, so streams don't depend on which games share a run."""
+    digest = hashlib.sha256(("%d/%s" % (seed, key)).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def normal_cdf(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def _simulate_stream(job):
+    """Cover probabilities for one game: `sims` sorted draws from the
+    game's stream, and one bisect per outcome threshold.
+
+    Every outcome's cover check is `blended + z * std + line > 0`, i.e. one
+    threshold on the same kind of draw, so sorting the sample once turns
+    each outcome from an O(SIMS) loop into a single bisect -- and a game's
+    outcomes are compared on common random numbers instead of each carrying
+    its own independent noise. The draws are kept as uniforms u, z being
+    the inverse normal CDF of u: the map is monotone, so z > t exactly when
+    u > normal_cdf(t), and the uniforms cost a third of what gauss() does.
+    Top-level so worker processes can run it.
+    """
+    stream, sims, thresholds = job
+    rand  = random.Random(stream).random
+    draws = [rand() for _ in range(sims)]
+    draws.sort()
+    return [(sims - bisect.bisect_right(draws, normal_cdf(t))) / sims for t in thresholds]
+
+
+def simulate_games(jobs, workers=None):
+    """Run (stream seed, sims, thresholds) jobs, in order.
+
+    With workers > 1 and at least SIM_POOL_MIN_GAMES jobs they're spread
+    over a process pool -- drawing is pure-Python CPU work, so threads
+    wouldn't help. Each job only reads its own stream, so the answer is the
+    same for any worker count.
+    """
+    workers = SIM_WORKERS if workers is None else workers
+    count("simulation_draws", sum(j[1] for j in jobs))
+    if workers <= 1 or len(jobs) < SIM_POOL_MIN_GAMES:
+        return [_simulate_stream(j) for j in jobs]
+    workers = min(workers, len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_simulate_stream, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def simulate_covers(blendeds, lines, stds, keys=None, seed=0, workers=None):
+    """Cover probability for a whole batch of outcomes in one pass.
+    `keys` names each outcome's game (one stream per distinct key); without
+    them the batch shares one stream."""
+    keys   = keys or [""] * len(blendeds)
+    groups = {}
+    for i, key in enumerate(keys):
+        groups.setdefault(key, []).append(i)
+    jobs = [
+        (stream_seed(seed, key), SIMS, [-(blendeds[i] + lines[i]) / stds[i] for i in idx])
+        for key, idx in groups.items()
+    ]
+    count("simulated_outcomes", len(blendeds))
+    probs = [0.0] * len(blendeds)
+    for idx, result in zip(groups.values(), simulate_games(jobs, workers)):
+        for i, prob in zip(idx, result):
+            probs[i] = prob
+    return probs
+
+
+def cover_probability(blended, line, std=DYNAMIC_STD_BASE):
+    """The fast path for pricing a single cover: the exact probability
+    normal_cdf((blended + line) / std) that a game's stream estimates, with
+    no draws. Live mode prices every tick with it; slates, backtests and
+    season sims go through simulate_covers so they stay on the seeded
+    streams."""
+    return normal_cdf((blended + line) / std)
+
+
+def game_key(game):
+    """A game's simulation stream key: the Odds API event id, or its
+    matchup and tip-off when the feed didn't carry one."""
+    return game.id or "%s@%s/%s" % (game.away, game.home, game.commence.strftime("%Y-%m-%dT%H:%M"))
+
+
+def fetch_board(sport_key, markets=ODDS_MARKETS, regions=None):
+    """One sport's odds board across `regions` (default ODDS_REGIONS): one
+    request per region, fetched concurrently, books tagged with their
+    region and merged by merge_boards. None when every region failed."""
+    regions = regions or ODDS_REGIONS
+    url     = "https://api.the-odds-api.com/v4/sports/%s/odds/" % sport_key
+
+    def fetch(region):
+        return safe_stream(url, lambda ev: Game.from_odds(ev, region), params={
+            "apiKey":     ODDS_API_KEY,
+            "regions":    region,
+            "markets":    markets,
+            "oddsFormat": "decimal",
+        })
+
+    if len(regions) == 1:
+        return fetch(regions[0])
+    with ThreadPoolExecutor(max_workers=len(regions), thread_name_prefix="odds-region") as pool:
+        boards = list(pool.map(fetch, regions))
+    for region, board in zip(regions, boards):
+        if board is None:
+            log.warning("Odds API region %s failed; merging the others", region)
+    boards = [b for b in boards if b is not None]
+    return merge_boards(boards) if boards else None
+
+
+def merge_boards(boards):
+    """Per-region boards (lists of Game, in ODDS_REGIONS order) as one list:
+    each event once, carrying every book that quoted it. A book listed in
+    more than one region (Betfair is in uk and eu) keeps its first region's
+    quotes only, so it isn't counted twice in the consensus."""
+    merged = {}
+    for board in boards:
+        for g in board:
+            key  = game_key(g)
+            into = merged.get(key)
+            if into is None:
+                merged[key] = g
+                continue
+            seen = into.books()
+            into.add_outcomes([o for o in g.outcomes if o.book not in seen])
+    count("odds_books", sum(len(g.books()) for g in merged.values()))
+    return list(merged.values())
 
 
 def fetch_odds():
-    params = {
-        "apiKey":     ODDS_API_KEY,
-        "regions":    "us",
-        "markets":    "spreads,totals",
-        "oddsFormat": "decimal",
-    }
-    data = safe_get(
-        "https://api.the-odds-api.com/v4/sports/basketball_nba/odds/",
-        params=params,
-    )
+    data = fetch_board("basketball_nba")
     if data is None:
         log.error("Odds API failed")
         return []
-    log.info("Odds loaded: %d games", len(data))
+    log.info("Odds loaded: %d games (regions: %s)", len(data), ",".join(ODDS_REGIONS))
+    if ODDS_PERIOD_MARKETS:
+        fetch_period_odds(data)
     return data
 
 
+def fetch_period_odds(games, sport_key="basketball_nba"):
+    """Merge first-half/quarter markets into each Game's outcomes in place.
+
+    The bulk /odds endpoint only serves the featured markets; period markets
+    are per-event only, so this costs one request per game against the
+    monthly quota and stays off unless ODDS_PERIOD_MARKETS is set.
+    """
+    for g in games:
+        if g.id:
+            g.add_outcomes(fetch_event_odds(g, ODDS_PERIOD_MARKETS, sport_key))
+
+
+def fetch_event_odds(game, markets, sport_key="basketball_nba"):
+    """One event's `markets` from the per-event /odds endpoint as
+    BookOutcomes ([] on failure). All regions go in the one request; books
+    keep the region tag the main board gave them, and a title listed twice
+    keeps its first entry."""
+    data = safe_get(
+        "https://api.the-odds-api.com/v4/sports/%s/events/%s/odds" % (sport_key, game.id),
+        params={
+            "apiKey":     ODDS_API_KEY,
+            "regions":    ",".join(ODDS_REGIONS),
+            "markets":    ",".join(markets),
+            "oddsFormat": "decimal",
+        },
+    )
+    if not data:
+        return []
+    regions, books = {o.book: o.region for o in game.outcomes}, {}
+    for book in data.get("bookmakers", []):
+        books.setdefault(book.get("title", "?"), book)
+    outcomes = parse_bookmakers(books.values())
+    for o in outcomes:
+        o.region = regions.get(o.book)
+    return outcomes
+
+
 def fetch_summer_league_sport_key():
     """Scan the live Odds API sports list for a basketball entry whose key or
     title mentions 'summer' -- the exact sport_key isn't documented and can
@@ -568,31 +3481,159 @@ def fetch_summer_league_odds():
     if not sport_key:
         log.info("No NBA Summer League market currently listed on Odds API")
         return []
-    data = safe_get(
-        "https://api.the-odds-api.com/v4/sports/%s/odds/" % sport_key,
-        params={
-            "apiKey":     ODDS_API_KEY,
-            "regions":    "us",
-            "markets":    "h2h,spreads,totals",
-            "oddsFormat": "decimal",
-        },
+    return fetch_board(sport_key, markets="h2h,spreads,totals") or []
+
+
+def summer_league_plausible(now_utc):
+    """Whether the calendar allows a summer league to be running: the
+    SUMMER_LEAGUE_WINDOW from late June into early August."""
+    return SUMMER_LEAGUE_WINDOW[0] <= (now_utc.month, now_utc.day) <= SUMMER_LEAGUE_WINDOW[1]
+
+
+def espn_scoreboard(slug, retries=3, timeout=15, params=None):
+    return safe_stream(
+        "https://site.api.espn.com/apis/site/v2/sports/basketball/%s/scoreboard" % slug,
+        project_espn_event, array_key="events", params=params, retries=retries, timeout=timeout,
     )
-    return data or []
 
 
-def fetch_summer_league_scores():
-    """Try known ESPN league slugs in turn; the host city (and so the slug)
-    moves year to year and isn't documented."""
-    for slug in SUMMER_LEAGUE_ESPN_SLUGS:
-        data = safe_get(
-            "https://site.api.espn.com/apis/site/v2/sports/basketball/%s/scoreboard" % slug
-        )
-        events = (data or {}).get("events") if data else None
+def discover_summer_slug(slugs=None):
+    """Probe every candidate ESPN slug at once and take the first one that
+    returns events; (slug, events), or (None, []) if none do.
+
+    Dead slugs used to cost 15 s x 3 retries each, one after another. Here
+    each probe is a single short request, and as soon as one succeeds the
+    probes that haven't started are cancelled and the ones in flight are
+    left to finish in the background rather than waited on.
+    """
+    slugs = slugs or SUMMER_LEAGUE_ESPN_SLUGS
+    pool  = ThreadPoolExecutor(max_workers=len(slugs), thread_name_prefix="espn-slug")
+    futures = {
+        pool.submit(espn_scoreboard, slug, 1, SUMMER_SLUG_PROBE_TIMEOUT): slug
+        for slug in slugs
+    }
+    try:
+        for fut in as_completed(futures):
+            events = fut.result()
+            if events:
+                return futures[fut], events
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return None, []
+
+
+def fetch_summer_league_scores(now_utc=None):
+    """(slug, events) for the current ESPN summer-league scoreboard.
+
+    The host city (and so the slug) moves year to year and isn't
+    documented, so the working slug is discovered at runtime and cached in
+    CACHE_DIR for SUMMER_SLUG_TTL_DAYS; later runs go straight to it and
+    only rediscover when it stops answering or expires. Outside the
+    calendar window nothing is requested unless a cached slug is still
+    live (a league running late).
+    """
+    now_utc = now_utc or datetime.utcnow()
+    cached  = load_cache(SUMMER_SLUG_CACHE) or {}
+    fresh   = cached.get("slug") and cached.get("expires", "") > now_utc.isoformat()
+    if fresh:
+        events = espn_scoreboard(cached["slug"])
         if events:
-            log.info("Summer League scores loaded via ESPN slug '%s': %d events", slug, len(events))
-            return events
-    log.info("No ESPN Summer League scoreboard responded")
-    return []
+            log.info("Summer League scores loaded via cached ESPN slug '%s': %d events", cached["slug"], len(events))
+            return cached["slug"], events
+    if not summer_league_plausible(now_utc):
+        log.info("Outside the summer league window; skipping ESPN slug discovery")
+        return None, []
+
+    slug, events = discover_summer_slug()
+    if not slug:
+        log.info("No ESPN Summer League scoreboard responded")
+        return None, []
+    save_cache(SUMMER_SLUG_CACHE, {
+        "slug":    slug,
+        "expires": (now_utc + timedelta(days=SUMMER_SLUG_TTL_DAYS)).isoformat(),
+    })
+    log.info("Summer League scores loaded via ESPN slug '%s': %d events", slug, len(events))
+    return slug, events
+
+
+def _summer_window_dates(now_utc):
+    """Every US date (YYYYMMDD) of this year's window up to today."""
+    (m0, d0), (m1, d1) = SUMMER_LEAGUE_WINDOW
+    day  = datetime(now_utc.year, m0, d0)
+    last = min(datetime(now_utc.year, m1, d1), now_utc - timedelta(hours=US_DATE_OFFSET_HOURS))
+    out  = []
+    while day <= last:
+        out.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return out
+
+
+def update_summer_results(slug, now_utc, events=()):
+    """Bring the persistent summer-league results store up to date.
+
+    The store (CACHE_DIR/summer_results_<year>.json) keeps, per ESPN slug,
+    every final seen this year plus which scoreboard dates are settled. Each
+    run upserts the finals from the current scoreboard, then fetches --
+    concurrently -- the dated scoreboards only for window dates not yet
+    settled; a date settles once it is at least two days old and every event
+    on it is final. A league that started before the bot first ran is
+    backfilled in one pass; after that a run touches a day or two.
+    Rediscovery can land on a different slug that also answers this season
+    (discover_summer_slug takes whichever probe wins), so each slug keeps
+    its own entry rather than replacing what the others gathered.
+
+    Returns every stored final of the year, across slugs, as SummerEvents.
+    """
+    name  = SUMMER_RESULTS_CACHE % now_utc.year
+    store = load_cache(name) or {}
+    if "slugs" not in store:
+        # Stores from before per-slug keying held one slug's data flat.
+        old   = {"dates": store.get("dates", {}), "games": store.get("games", {})}
+        store = {"slugs": {store["slug"]: old} if store.get("slug") else {}}
+    entry  = store["slugs"].setdefault(slug or "", {})
+    dates  = entry.setdefault("dates", {})
+    finals = entry.setdefault("games", {})
+
+    def upsert(evs):
+        n = 0
+        for ev in evs:
+            if ev.completed and (ev.home_score or ev.away_score):
+                key = "%s|%s|%s" % (ev.date, ev.home, ev.away)
+                n  += key not in finals
+                finals[key] = list(ev)
+        return n
+
+    added = upsert(events)
+    if slug:
+        settle_before = (now_utc - timedelta(days=2)).strftime("%Y%m%d")
+        missing = [d for d in _summer_window_dates(now_utc) if dates.get(d) != "settled"]
+        if missing:
+            with ThreadPoolExecutor(max_workers=SUMMER_BACKFILL_WORKERS, thread_name_prefix="espn-day") as pool:
+                pages = pool.map(lambda d: espn_scoreboard(slug, params={"dates": d}), missing)
+                for d, evs in zip(missing, pages):
+                    if evs is None:
+                        continue
+                    added += upsert(evs)
+                    if d < settle_before and all(ev.completed or ev.status.lower() in SUMMER_DEAD_STATUSES for ev in evs):
+                        dates[d] = "settled"
+        count("summer_backfill_dates", len(missing))
+        log.info("Summer results store: %d finals for %s (+%d), fetched %d dates", len(finals), slug, added, len(missing))
+    save_cache(name, store)
+    merged = {}
+    for other in store["slugs"].values():
+        merged.update(other.get("games", {}))
+    return [SummerEvent(*row) for row in merged.values()]
+
+
+def summer_power_ratings(finals):
+    """zh team name -> opponent-adjusted margin rating (points vs an average
+    summer roster, neutral floor) over every stored final."""
+    rows = [
+        GameRow(ev.date[:10], "Final", ev.home, ev.away, ev.home_score, ev.away_score)
+        for ev in finals
+    ]
+    ratings = ratings_from_games(rows, RatingSolver(half_life_days=0, neutral_site=True))
+    return {TEAM_CN[team]: round(r.off - r.defense, 1) for team, r in ratings.items()}
 
 
 GAME_STATUS_ZH = {
@@ -631,6 +3672,16 @@ SUMMER_MODEL_WEIGHT    = 0.30
 SUMMER_MARKET_WEIGHT   = 0.70
 SUMMER_STD_MULTIPLIER  = 1.3    # exhibition-game scoring swings more than real-season ball
 
+# The summer watchlist runs through the shared score_slate with its own
+# weights and variance: full-game spreads only, no spread-size gate, and
+# never staked.
+SUMMER = League(
+    "summer", "夏季聯賽", None, edge_threshold=SUMMER_EDGE_THRESHOLD,
+    model_weight=SUMMER_MODEL_WEIGHT, market_weight=SUMMER_MARKET_WEIGHT,
+    std=DYNAMIC_STD_BASE * SUMMER_STD_MULTIPLIER, markets=("spreads",),
+    spread_range=(0.0, float("inf")), staked=False,
+)
+
 # Pre-tournament prior for teams that haven't played a Summer League game yet,
 # so the model has something better than a flat 0 to work with before results
 # exist. Deliberately limited to 2026 lottery picks (1-14) only -- these are
@@ -661,10 +3712,11 @@ SUMMER_ROOKIE_PRIOR = {
 }
 
 
-def summer_recommendations(odds_games, team_power, now_utc=None):
+def summer_recommendations(odds_games, team_power, now_utc=None, seed=0):
     """Same edge-vs-market-consensus approach as the regular-season model
-    (predict_margin's role is played by team_power, a simple avg-margin
-    proxy from completed Summer League games), gated harder than regular
+    (predict_margin's role is played by team_power, opponent-adjusted
+    margin ratings over every completed Summer League game in the results
+    store), gated harder than regular
     season: wider simulated variance (rosters/rotations are far less
     settled), and no Kelly stake -- this is a probability/edge lean only,
     not a bankroll-sizing recommendation, given how thin the sample is.
@@ -699,66 +3751,33 @@ def summer_recommendations(odds_games, team_power, now_utc=None):
     visibly distinguishable from "we couldn't evaluate this at all".
     """
     now_utc = now_utc or datetime.utcnow()
-    picks = {}
-    for g in odds_games:
-        try:
-            c_time = datetime.strptime(g["commence_time"], "%Y-%m-%dT%H:%M:%SZ")
-        except (KeyError, ValueError):
-            continue
-        if c_time < now_utc:
-            continue
-        home = zh_team_name(g.get("home_team", ""))
-        away = zh_team_name(g.get("away_team", ""))
-        home_power = team_power.get(home)
-        away_power = team_power.get(away)
-        has_form   = home_power is not None and away_power is not None
-        home_est   = home_power if home_power is not None else SUMMER_ROOKIE_PRIOR.get(home, 0.0)
-        away_est   = away_power if away_power is not None else SUMMER_ROOKIE_PRIOR.get(away, 0.0)
-        margin_est = home_est - away_est
-        bookmakers = g.get("bookmakers", [])
-        game_id    = "%s@%s_%s" % (away, home, c_time.date())
-
-        for book in bookmakers:
-            for market in book.get("markets", []):
-                if market.get("key") != "spreads":
-                    continue
-                for outcome in market.get("outcomes", []):
-                    raw_name = outcome.get("name", "")
-                    name     = normalize_team(raw_name)
-                    line     = outcome.get("point")
-                    price    = outcome.get("price")
-                    if line is None or not price:
-                        continue
-                    if not (MIN_PRICE < price <= MAX_PRICE):
-                        continue
 
-                    consensus = get_consensus_line(bookmakers, name)
-                    if consensus is None:
-                        consensus = line
-                    if line - consensus < 0:
-                        continue
+    def estimate(team):
+        power = team_power.get(team)
+        return power if power is not None else SUMMER_ROOKIE_PRIOR.get(team, 0.0)
+
+    def model(g):
+        return estimate(TEAM_CN.get(g.home, g.home)) - estimate(TEAM_CN.get(g.away, g.away)), [], [], ""
 
-                    is_home = zh_team_name(raw_name) == home
-                    target  = margin_est if is_home else -margin_est
-                    blended = target * SUMMER_MODEL_WEIGHT + (-consensus) * SUMMER_MARKET_WEIGHT
-                    prob    = simulate_cover(blended, line, std=DYNAMIC_STD_BASE * SUMMER_STD_MULTIPLIER)
-                    edge    = prob - (1 / price)
-
-                    existing = picks.get(game_id)
-                    if existing is None or edge > existing["edge"]:
-                        picks[game_id] = {
-                            "matchup":        "%s @ %s" % (away, home),
-                            "start_time":     c_time.isoformat() + "Z",
-                            "bet":            "%s %+.1f" % (zh_team_name(raw_name), line),
-                            "price":          price,
-                            "book":           book.get("title", "?"),
-                            "prob":           round(prob * 100, 1),
-                            "edge":           round(edge * 100, 1),
-                            "has_form":       has_form,
-                            "meets_threshold": edge >= SUMMER_EDGE_THRESHOLD and has_form,
-                        }
-
-    return sorted(picks.values(), key=lambda x: (x["start_time"][:10], -x["edge"]))
+    def has_form(g):
+        return TEAM_CN.get(g.home, g.home) in team_power and TEAM_CN.get(g.away, g.away) in team_power
+
+    # Only each game's winning outcome is ever turned into an output dict.
+    picks = [
+        {
+            "matchup":        "%s @ %s" % (TEAM_CN.get(p.game.away, p.game.away), TEAM_CN.get(p.game.home, p.game.home)),
+            "start_time":     p.game.commence.isoformat() + "Z",
+            "bet":            "%s %+.1f" % (TEAM_CN.get(p.outcome.side, p.outcome.side), p.outcome.point),
+            "price":          p.price,
+            "book":           p.book,
+            "prob":           round(p.prob * 100, 1),
+            "edge":           round(p.edge * 100, 1),
+            "has_form":       has_form(p.game),
+            "meets_threshold": p.edge >= SUMMER_EDGE_THRESHOLD and has_form(p.game),
+        }
+        for p in score_slate(SUMMER, odds_games, model, now_utc, keep_all=True, seed=seed)
+    ]
+    return sorted(picks, key=lambda x: (x["start_time"][:10], -x["edge"]))
 
 
 def build_summer_league_summary(power_ranking):
@@ -784,7 +3803,7 @@ def build_summer_league_summary(power_ranking):
     return "".join(parts)
 
 
-def analyze_summer_league(now_utc=None):
+def analyze_summer_league(now_utc=None, seed=0):
     """Lightweight, informational-only Summer League report.
 
     Summer League rosters are dominated by rookies/two-way/G-League players
@@ -794,41 +3813,34 @@ def analyze_summer_league(now_utc=None):
     point-margin power ranking, and a market watchlist for reference.
     """
     now_utc    = now_utc or datetime.utcnow()
-    events     = fetch_summer_league_scores()
-    odds_games = fetch_summer_league_odds()
+    with span("summer_scores"):
+        slug, events = fetch_summer_league_scores(now_utc)
+    with span("summer_results"):
+        finals = update_summer_results(slug, now_utc, events) if (slug or events) else []
+    with span("summer_odds"):
+        odds_games = fetch_summer_league_odds()
+
+    games = [
+        {
+            "status":      zh_game_status(ev.status),
+            "home":        zh_team_name(ev.home),
+            "away":        zh_team_name(ev.away),
+            "home_score":  ev.home_score,
+            "away_score":  ev.away_score,
+            "start_time":  ev.date,
+        }
+        for ev in events
+    ]
 
-    games      = []
+    # Records and ratings come from every final in the results store, not
+    # just the games on today's scoreboard.
     team_games = {}
-    for ev in events:
-        comp = (ev.get("competitions") or [{}])[0]
-        competitors = comp.get("competitors", [])
-        if len(competitors) != 2:
-            continue
-        home = next((c for c in competitors if c.get("homeAway") == "home"), competitors[0])
-        away = next((c for c in competitors if c.get("homeAway") == "away"), competitors[1])
-        h_name = zh_team_name((home.get("team") or {}).get("displayName", "?"))
-        a_name = zh_team_name((away.get("team") or {}).get("displayName", "?"))
-        try:
-            h_score = int(home.get("score", 0) or 0)
-            a_score = int(away.get("score", 0) or 0)
-        except (TypeError, ValueError):
-            h_score = a_score = 0
-        status_type = (ev.get("status") or {}).get("type") or {}
-        status      = zh_game_status(status_type.get("description") or "?")
-        is_final    = bool(status_type.get("completed"))
-
-        games.append({
-            "status":      status,
-            "home":        h_name,
-            "away":        a_name,
-            "home_score":  h_score,
-            "away_score":  a_score,
-            "start_time":  ev.get("date", ""),
-        })
-
-        if is_final and (h_score or a_score):
-            team_games.setdefault(h_name, []).append({"pf": h_score, "pa": a_score, "win": h_score > a_score})
-            team_games.setdefault(a_name, []).append({"pf": a_score, "pa": h_score, "win": a_score > h_score})
+    for ev in finals:
+        h_name, a_name = zh_team_name(ev.home), zh_team_name(ev.away)
+        h_score, a_score = ev.home_score, ev.away_score
+        team_games.setdefault(h_name, []).append({"pf": h_score, "pa": a_score, "win": h_score > a_score})
+        team_games.setdefault(a_name, []).append({"pf": a_score, "pa": h_score, "win": a_score > h_score})
+    power = summer_power_ratings(finals)
 
     power_ranking = []
     for t, glist in team_games.items():
@@ -842,41 +3854,34 @@ def analyze_summer_league(now_utc=None):
             "wins":       wins,
             "losses":     n - wins,
             "avg_margin": round(avg_pf - avg_pa, 1),
+            "power":      power.get(t, round(avg_pf - avg_pa, 1)),
             "avg_pf":     round(avg_pf, 1),
             "avg_pa":     round(avg_pa, 1),
         })
-    power_ranking.sort(key=lambda x: x["avg_margin"], reverse=True)
+    power_ranking.sort(key=lambda x: x["power"], reverse=True)
     summary = build_summer_league_summary(power_ranking)
-    team_power      = {r["team"]: r["avg_margin"] for r in power_ranking}
-    recommendations = summer_recommendations(odds_games, team_power, now_utc=now_utc)
+    team_power      = {r["team"]: r["power"] for r in power_ranking}
+    recommendations = summer_recommendations(odds_games, team_power, now_utc=now_utc, seed=seed)
 
     watchlist = []
     for g in odds_games:
-        try:
-            c_time = datetime.strptime(g["commence_time"], "%Y-%m-%dT%H:%M:%SZ")
-        except (KeyError, ValueError):
-            continue
-        if c_time < now_utc:
+        if g.commence < now_utc or not g.outcomes:
             continue
-        home = zh_team_name(g.get("home_team", ""))
-        away = zh_team_name(g.get("away_team", ""))
-        for book in g.get("bookmakers", [])[:1]:
-            for market in book.get("markets", []):
-                if market.get("key") not in ("h2h", "spreads"):
-                    continue
-                for outcome in market.get("outcomes", []):
-                    price = outcome.get("price")
-                    if not price:
-                        continue
-                    watchlist.append({
-                        "matchup":    "%s @ %s" % (away, home),
-                        "start_time": c_time.isoformat() + "Z",
-                        "market":     MARKET_ZH.get(market.get("key"), market.get("key")),
-                        "pick":       zh_team_name(outcome.get("name")),
-                        "point":      outcome.get("point"),
-                        "price":      price,
-                        "book":       book.get("title", "?"),
-                    })
+        home = TEAM_CN.get(g.home, g.home)
+        away = TEAM_CN.get(g.away, g.away)
+        first_book = g.outcomes[0].book
+        for o in g.outcomes:
+            if o.book != first_book or o.market not in ("h2h", "spreads") or not o.price:
+                continue
+            watchlist.append({
+                "matchup":    "%s @ %s" % (away, home),
+                "start_time": g.commence.isoformat() + "Z",
+                "market":     MARKET_ZH.get(o.market, o.market),
+                "pick":       TEAM_CN.get(o.side, o.side),
+                "point":      o.point,
+                "price":      o.price,
+                "book":       o.book,
+            })
 
     return {
         "available":       bool(events or odds_games),
@@ -946,10 +3951,10 @@ def format_summer_league_section(sl):
             ))
 
     if sl["power_ranking"]:
-        lines.append("\n📈 戰力排行 (戰績 / 場均淨勝分 / 攻防):")
+        lines.append("\n📈 戰力排行 (戰績 / 對手校正戰力 / 場均淨勝分 / 攻防):")
         for r in sl["power_ranking"][:8]:
-            lines.append("> %s: %d勝%d敗 | 淨勝 %+.1f | 攻 %.1f 防 %.1f" % (
-                r["team"], r["wins"], r["losses"], r["avg_margin"], r["avg_pf"], r["avg_pa"]
+            lines.append("> %s: %d勝%d敗 | 戰力 %+.1f | 淨勝 %+.1f | 攻 %.1f 防 %.1f" % (
+                r["team"], r["wins"], r["losses"], r.get("power", r["avg_margin"]), r["avg_margin"], r["avg_pf"], r["avg_pa"]
             ))
 
     if sl.get("recommendations"):
@@ -972,34 +3977,261 @@ def format_summer_league_section(sl):
     return "\n".join(lines) + "\n"
 
 
-def chunked_send(content, webhook):
+def chunk_message(content, limit=DISCORD_CHAR_LIMIT):
+    """Split a report into Discord-sized, "(i/n)"-labelled messages."""
     lines = content.split("\n")
     # A single line longer than the chunk limit would otherwise produce an
     # oversized chunk that Discord's 2000-char hard cap rejects outright,
     # silently dropping that part of the message.
     lines = [
-        (line[: DISCORD_CHAR_LIMIT - 3] + "...") if len(line) > DISCORD_CHAR_LIMIT else line
+        (line[: limit - 3] + "...") if len(line) > limit else line
         for line in lines
     ]
     chunk, chunks = "", []
     for line in lines:
-        if len(chunk) + len(line) + 1 > DISCORD_CHAR_LIMIT:
+        if len(chunk) + len(line) + 1 > limit:
             chunks.append(chunk)
             chunk = line + "\n"
         else:
             chunk += line + "\n"
     if chunk:
         chunks.append(chunk)
-    for i, part in enumerate(chunks, 1):
-        label = "(%d/%d)\n%s" % (i, len(chunks), part) if len(chunks) > 1 else part
+    if len(chunks) == 1:
+        return chunks
+    return ["(%d/%d)\n%s" % (i, len(chunks), part) for i, part in enumerate(chunks, 1)]
+
+
+def chunked_send(content, webhook, retries=3, limit=DISCORD_CHAR_LIMIT):
+    """Post a report in chunks; True when every chunk was delivered."""
+    delivered = True
+    for i, label in enumerate(chunk_message(content, limit), 1):
+        for attempt in range(1, retries + 1):
+            try:
+                r = http_session().post(webhook, json={"content": label}, timeout=NOTIFY_TIMEOUT)
+                r.raise_for_status()
+                break
+            except Exception as e:
+                log.error("Discord send failed chunk %d: %s", i, e)
+                wait = _retry_wait(getattr(e, "response", None), attempt)
+                if wait is None or attempt == retries:
+                    delivered = False
+                    break
+                time.sleep(wait)
+    return delivered
+
+
+# ── Notifications ────────────────────────────────────────────────────────────
+# build_report renders the run once into sections -- a header, the slate
+# (days of picks, each tagged with league and tier), and text blocks, some
+# tagged with a league -- and every destination renders its own view of
+# them: a Discord channel can take only one tier or one league, a file or
+# JSONL sink keeps a local copy, an HTTP sink posts the structure as JSON.
+# Sinks are sent to concurrently and each on its own, so a slow or failing
+# one neither delays nor takes down the rest.
+#
+# NOTIFY_SINKS is a JSON list of sink specs, e.g.
+#   [{"type": "discord", "url": "https://discord.com/api/webhooks/...", "tiers": ["頂級"]},
+#    {"type": "discord", "url": "...", "leagues": ["wnba"]},
+#    {"type": "jsonl", "path": "reports.jsonl"},
+#    {"type": "http", "url": "https://example.com/hook", "headers": {"X-Token": "..."}}]
+# DISCORD_WEBHOOK, when set, is always the first sink (unfiltered).
+NOTIFY_TIMEOUT = 10
+
+
+def render_report(sections):
+    """The message text for a list of report sections."""
+    picks = [p for sec in sections if sec["kind"] == "slate" for day in sec["days"] for p in day["picks"]]
+    out   = ""
+    for sec in sections:
+        kind = sec["kind"]
+        if kind == "header":
+            avg_edge = sum(p["edge"] for p in picks) / len(picks) if picks else 0
+            out += "🏀 NBA %s | 更新: %s | 資料: %s | 推薦: %d 場 | 平均Edge: %+.1f%%\n" % (
+                sec["version"], sec["updated"], sec["data_source"], len(picks), avg_edge * 100
+            )
+            out += "📌 正式記錄版本\n" if sec["official"] else "🔧 測試版本（不寫入回測）\n"
+        elif kind == "slate":
+            if not sec["days"]:
+                out += "\n今日無符合條件之推薦。\n"
+            for day in sec["days"]:
+                out += "\n%s\n" % day["label"]
+                out += "".join(p["text"] for p in day["picks"])
+                out += "-" * 30 + "\n"
+        else:
+            out += sec["text"]
+    return out
+
+
+def _matches(value, wanted):
+    return not wanted or any(w in value for w in wanted)
+
+
+def filter_sections(sections, tiers=None, leagues=None):
+    """Sections narrowed to picks whose tier contains one of `tiers` (so
+    "頂級" matches "💎 頂級") and picks/blocks of `leagues`; untagged text
+    and the header always stay. A day left with no picks is dropped."""
+    if not tiers and not leagues:
+        return sections
+    out = []
+    for sec in sections:
+        if sec["kind"] == "slate":
+            days = []
+            for day in sec["days"]:
+                picks = [
+                    p for p in day["picks"]
+                    if _matches(p["tier"], tiers) and (not leagues or p["league"] in leagues)
+                ]
+                if picks:
+                    days.append(dict(day, picks=picks))
+            out.append(dict(sec, days=days))
+        elif sec.get("league") and leagues and sec["league"] not in leagues:
+            continue
+        else:
+            out.append(sec)
+    return out
+
+
+class Sink(ABC):
+    """One notification destination; `tiers` / `leagues` narrow what it gets.
+    Subclasses implement send; one that doesn't fails when it's built."""
+
+    kind = "sink"
+
+    def __init__(self, name=None, tiers=None, leagues=None, **_):
+        self.tiers   = tiers or []
+        self.leagues = leagues or []
+        self.name    = name or self.kind
+
+    def deliver(self, sections):
+        """Send this sink's view of the sections; True when all of it went out."""
+        return self.send(filter_sections(sections, self.tiers, self.leagues))
+
+    @abstractmethod
+    def send(self, sections):
+        """Deliver already-filtered sections; True when all of it went out."""
+
+
+class DiscordSink(Sink):
+    kind = "discord"
+
+    def __init__(self, url, limit=DISCORD_CHAR_LIMIT, **kw):
+        Sink.__init__(self, **kw)
+        self.url   = url
+        self.limit = limit
+
+    def send(self, sections):
+        return chunked_send(render_report(sections), self.url, limit=self.limit)
+
+
+class FileSink(Sink):
+    """The rendered text, overwritten on every run."""
+    kind = "file"
+
+    def __init__(self, path, **kw):
+        Sink.__init__(self, **kw)
+        self.path = path
+
+    def send(self, sections):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(render_report(sections))
+        return True
+
+
+class JsonlSink(Sink):
+    """One line per run: the sections plus their rendered text."""
+    kind = "jsonl"
+
+    def __init__(self, path, **kw):
+        Sink.__init__(self, **kw)
+        self.path = path
+
+    def send(self, sections):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        line = json.dumps({
+            "sent_at":  datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "text":     render_report(sections),
+            "sections": sections,
+        }, ensure_ascii=False, separators=(",", ":"))
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return True
+
+
+class HttpSink(Sink):
+    """POSTs {"text", "sections"} as JSON, retried like every other request."""
+    kind = "http"
+
+    def __init__(self, url, headers=None, retries=3, **kw):
+        Sink.__init__(self, **kw)
+        self.url     = url
+        self.headers = headers or {}
+        self.retries = retries
+
+    def send(self, sections):
+        payload = {"text": render_report(sections), "sections": sections}
+        for attempt in range(1, self.retries + 1):
+            count("http_requests", host=_host(self.url))
+            try:
+                r = http_session().post(self.url, json=payload, headers=self.headers, timeout=NOTIFY_TIMEOUT)
+                r.raise_for_status()
+                return True
+            except Exception as e:
+                log.error("HTTP sink %s failed: %s", self.name, e)
+                wait = _retry_wait(getattr(e, "response", None), attempt)
+                if wait is None or attempt == self.retries:
+                    return False
+                time.sleep(wait)
+        return False
+
+
+SINK_TYPES = {cls.kind: cls for cls in (DiscordSink, FileSink, JsonlSink, HttpSink)}
+
+
+def build_sinks(spec=None, webhook=None):
+    """Sinks from a NOTIFY_SINKS-style JSON list, after the DISCORD_WEBHOOK
+    one. A spec that doesn't parse is logged and skipped."""
+    spec    = NOTIFY_SINKS if spec is None else spec
+    webhook = WEBHOOK if webhook is None else webhook
+    sinks   = [DiscordSink(webhook, name="discord")] if webhook else []
+    try:
+        entries = json.loads(spec) if spec else []
+    except ValueError as e:
+        log.error("NOTIFY_SINKS is not valid JSON: %s", e)
+        entries = []
+    for i, entry in enumerate(entries):
+        entry = dict(entry)
+        cls   = SINK_TYPES.get(entry.pop("type", ""))
+        entry.setdefault("name", "%s-%d" % (cls.kind if cls else "sink", i + 1))
         try:
-            r = requests.post(webhook, json={"content": label}, timeout=10)
-            r.raise_for_status()
-        except Exception as e:
-            log.error("Discord send failed chunk %d: %s", i, e)
+            sinks.append(cls(**entry))
+        except TypeError as e:
+            log.error("Skipping notify sink %s: %s", entry["name"], e)
+    return sinks
+
+
+def _deliver(sink, sections):
+    t0 = time.perf_counter()
+    try:
+        ok = bool(sink.deliver(sections))
+    except Exception as e:
+        log.error("Notify sink %s failed: %s", sink.name, e)
+        ok = False
+    count("notify_sends", sink=sink.kind, ok=str(ok).lower())
+    log.info("Notify %s: %s in %.0f ms", sink.name, "ok" if ok else "FAILED", (time.perf_counter() - t0) * 1000)
+    return ok
+
+
+def notify(sections, sinks):
+    """Deliver to every sink concurrently; {sink name: delivered}."""
+    if not sinks:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(sinks)) as pool:
+        futures = {sink.name: pool.submit(_deliver, sink, sections) for sink in sinks}
+    return {name: f.result() for name, f in futures.items()}
 
 
-RESULT_ZH = {"win": "獲勝", "loss": "落敗", "pending": "待開獎"}
+RESULT_ZH = {"win": "獲勝", "loss": "落敗", "push": "走盤", "pending": "待開獎"}
 
 # .title() mis-cases the handful of keys with internal capitals or that are
 # better known by an all-caps nickname; everything else title-cases fine.
@@ -1025,47 +4257,73 @@ def build_team_stars():
     ]
 
 
-def build_history_list(history, limit=30):
-    items = sorted(history.values(), key=lambda h: h.get("date", ""), reverse=True)
-    return [
-        {
-            "date":        h.get("date", ""),
-            "bet":         h.get("bet", ""),
-            "book":        h.get("book", ""),
-            "price":       h.get("price"),
-            "prob":        round(h.get("prob", 0) * 100, 1),
-            "edge":        round(h.get("edge", 0) * 100, 1),
-            "kelly_stake": h.get("kelly_stake"),
-            "result":      RESULT_ZH.get(h.get("result", "pending"), h.get("result", "pending")),
-            "league":      h.get("league", "regular"),
-        }
-        for h in items[:limit]
-    ]
+def _history_row(h):
+    return {
+        "date":        h.get("date", ""),
+        "bet":         h.get("bet", ""),
+        "book":        h.get("book", ""),
+        "price":       h.get("price"),
+        "prob":        round(h.get("prob", 0) * 100, 1),
+        "edge":        round(h.get("edge", 0) * 100, 1),
+        "kelly_stake": h.get("kelly_stake"),
+        "result":      RESULT_ZH.get(h.get("result", "pending"), h.get("result", "pending")),
+        "league":      h.get("league", "regular"),
+    }
+
+
+HISTORY_PAGE_SIZE = 50
+
+
+def build_history_pages(history, page_size=HISTORY_PAGE_SIZE):
+    """History split into fixed-size pages, oldest first.
+
+    Paging from the oldest end is what keeps the shards stable: a new pick
+    only ever lands on the last page, and settling an old one only touches
+    the page it sits on, so every other page keeps its content hash and is
+    never rewritten.
+    """
+    items = sorted(history.values(), key=lambda h: (h.get("date", ""), h.get("bet", ""), h.get("book", "")))
+    rows  = [_history_row(h) for h in items]
+    return [rows[i:i + page_size] for i in range(0, len(rows), page_size)] or [[]]
 
 
 def export_site_data(now_tw, data_source, is_official_run, daily_picks, today_s,
-                      total_rec, wins, win_rate, profit, summer_league, history):
-    """Write a JSON snapshot for the static web dashboard (docs/index.html)."""
+                      total_rec, wins, win_rate, profit, summer_league, history,
+                      line_shopping=None, analytics=None, archives=None):
+    """Build the dashboard snapshot and hand it to write_site_data."""
+    write_site_data(build_site_payload(
+        now_tw, data_source, is_official_run, daily_picks, today_s,
+        total_rec, wins, win_rate, profit, summer_league, history,
+        line_shopping, analytics, archives,
+    ))
+
+
+def build_site_payload(now_tw, data_source, is_official_run, daily_picks, today_s,
+                       total_rec, wins, win_rate, profit, summer_league, history,
+                       line_shopping=None, analytics=None, archives=None, sim_seed=None):
+    """The dashboard payload write_site_data partitions into shards."""
     days = []
     for date in sorted(daily_picks):
-        picks = sorted(daily_picks[date].values(), key=lambda x: x["edge"], reverse=True)
+        picks = sorted(daily_picks[date].values(), key=lambda x: x.edge, reverse=True)
         days.append({
             "date":  date,
             "label": "今日賽事" if date == today_s else ("預告 %s" % date),
             "picks": [
                 {
-                    "tier":       p["tier"],
-                    "matchup":    p["matchup"],
-                    "start_time": p["start_time"],
-                    "bet":        p["bet"],
-                    "price":      p["price"],
-                    "book":       p["book"],
-                    "prob":       round(p["prob"] * 100, 1),
-                    "edge":       round(p["edge"] * 100, 1),
-                    "kelly_stake": p["kelly_stake"],
-                    "missing":    p["missing"],
-                    "consensus":  p["consensus"],
-                    "ou_note":    p["ou_note"],
+                    "tier":       p.tier,
+                    "matchup":    p.matchup,
+                    "start_time": p.start_time,
+                    "bet":        p.bet,
+                    "price":      p.price,
+                    "book":       p.book,
+                    "region":     p.region,
+                    "prob":       round(p.prob * 100, 1),
+                    "edge":       round(p.edge * 100, 1),
+                    "kelly_stake": p.kelly_stake,
+                    "missing":    p.missing_str,
+                    "consensus":  p.consensus_str,
+                    "ou_note":    p.ou_note,
+                    "league":     p.league_tag,
                 }
                 for p in picks
             ],
@@ -1073,7 +4331,7 @@ def export_site_data(now_tw, data_source, is_official_run, daily_picks, today_s,
 
     total_picks = sum(len(v) for v in daily_picks.values())
     avg_edge    = (
-        sum(p["edge"] for d in daily_picks.values() for p in d.values()) / total_picks
+        sum(p.edge for d in daily_picks.values() for p in d.values()) / total_picks
         if total_picks else 0
     )
 
@@ -1082,6 +4340,7 @@ def export_site_data(now_tw, data_source, is_official_run, daily_picks, today_s,
         "generated_at":     now_tw.strftime("%Y-%m-%d %H:%M"),
         "data_source":      data_source,
         "run_type":         "official" if is_official_run else "test",
+        "sim_seed":         sim_seed,
         "regular_season": {
             "total_picks": total_picks,
             "avg_edge":    round(avg_edge * 100, 1),
@@ -1094,29 +4353,151 @@ def export_site_data(now_tw, data_source, is_official_run, daily_picks, today_s,
             "profit":                round(profit, 1),
             "min_sample":            MIN_HISTORY_SAMPLE,
         },
+        "line_shopping": line_shopping or [],
         "summer_league": summer_league,
-        "history":       build_history_list(history),
+        "history":       build_history_pages(history),
+        "archives":      archive_listing(archives),
+        "analytics":     analytics_view(analytics),
         "team_stars":    build_team_stars(),
     }
+    return payload
+
+
+def _write_shard(shard_dir, name, content):
+    """Write one minified shard (plus a .gz twin) under a content-hashed
+    name, skipping the write when that exact content already exists."""
+    raw    = json.dumps(content, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    fname  = "%s.%s.json" % (name, digest)
+    path   = os.path.join(shard_dir, fname)
+    if not os.path.exists(path):
+        with open(path, "wb") as f:
+            f.write(raw)
+        # mtime=0 keeps the .gz bytes a pure function of the content.
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(raw, mtime=0))
+    return {"path": "shards/" + fname, "hash": digest, "bytes": len(raw)}
+
+
+def _archive_shard(shard_dir, item):
+    """Shard ref for one archived season: written from the item's rows when
+    it carries them, else the season's shard already on disk (None if
+    there is none -- the dashboard then just lists the season's totals)."""
+    name = "archive-%d" % item["season"]
+    if "rows" in item:
+        return _write_shard(shard_dir, name, item["rows"])
+    found = sorted(
+        (f for f in os.listdir(shard_dir) if f.startswith(name + ".") and f.endswith(".json")),
+        key=lambda f: os.path.getmtime(os.path.join(shard_dir, f)),
+    )
+    if not found:
+        return None
+    path = os.path.join(shard_dir, found[-1])
+    return {"path": "shards/" + found[-1], "hash": found[-1].split(".")[1], "bytes": os.path.getsize(path)}
 
+
+def missing_archive_shards(listing, site_dir=None):
+    """Seasons in a dashboard archive listing with neither rows attached
+    nor a shard on disk."""
+    shard_dir = os.path.join(site_dir or SITE_DATA_DIR, "shards")
+    have = set(os.listdir(shard_dir)) if os.path.isdir(shard_dir) else set()
+    return [
+        item["season"] for item in listing
+        if "rows" not in item and not any(f.startswith("archive-%d." % item["season"]) for f in have)
+    ]
+
+
+def write_site_data(payload, site_dir=None):
+    """Partition a dashboard payload into manifest.json + shards/.
+
+    The monolithic latest.json was rewritten (pretty-printed) on every run
+    even when only the timestamp moved, and committed each time. Now the
+    small manifest carries the run metadata and headline numbers and points
+    at content-hashed shards -- today's picks, summer league, static team
+    data, performance analytics, oldest-first history pages and one per
+    archived season -- so an unchanged section keeps
+    its file, only changed shards are written, and the workflow commits
+    just those. Shards no longer referenced are deleted.
+    """
+    site_dir  = site_dir or SITE_DATA_DIR
+    shard_dir = os.path.join(site_dir, "shards")
     try:
-        os.makedirs(os.path.dirname(SITE_DATA_PATH) or ".", exist_ok=True)
-        with open(SITE_DATA_PATH, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
-        log.info("Site data written: %s", SITE_DATA_PATH)
+        os.makedirs(shard_dir, exist_ok=True)
+        rs = payload.get("regular_season", {})
+        shards = {
+            "picks":   _write_shard(shard_dir, "picks", {
+                "days":          rs.get("days", []),
+                "line_shopping": payload.get("line_shopping", []),
+            }),
+            "summer":  _write_shard(shard_dir, "summer", payload.get("summer_league", {})),
+            "teams":   _write_shard(shard_dir, "teams", payload.get("team_stars", [])),
+            "analytics": _write_shard(shard_dir, "analytics", payload.get("analytics", {})),
+            "history": [
+                _write_shard(shard_dir, "history-%d" % i, page)
+                for i, page in enumerate(payload.get("history", [[]]))
+            ],
+        }
+        archives = []
+        for item in payload.get("archives", []):
+            entry = {k: v for k, v in item.items() if k != "rows"}
+            entry["shard"] = _archive_shard(shard_dir, item)
+            archives.append(entry)
+        manifest = {
+            "version":      payload.get("version"),
+            "generated_at": payload.get("generated_at"),
+            "data_source":  payload.get("data_source"),
+            "run_type":     payload.get("run_type"),
+            "sim_seed":     payload.get("sim_seed"),
+            "regular_season": {
+                "total_picks": rs.get("total_picks", 0),
+                "avg_edge":    rs.get("avg_edge", 0),
+            },
+            "performance":  payload.get("performance", {}),
+            "history_total": sum(len(p) for p in payload.get("history", [])),
+            "archives":     archives,
+            "shards":       shards,
+        }
+        with open(os.path.join(site_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+
+        live = {
+            os.path.basename(s["path"])
+            for s in [shards["picks"], shards["summer"], shards["teams"], shards["analytics"]] + shards["history"]
+            + [a["shard"] for a in archives if a["shard"]]
+        }
+        for fname in os.listdir(shard_dir):
+            if fname.replace(".gz", "") not in live:
+                os.remove(os.path.join(shard_dir, fname))
+        log.info("Site data written: %s (%d shards)", site_dir, len(live))
     except OSError as e:
         log.error("Failed to write site data: %s", e)
 
 
-def run():
-    if not all([ODDS_API_KEY, WEBHOOK]):
-        log.error("Missing env vars")
-        return
+def format_pick_msg(p):
+    return (
+        "**[%s] %s** (%s)\n"
+        "投注: `%s` @ **%.2f** (%s)\n"
+        "> %s | %s\n"
+        "> 勝率: %.1f%% | Edge: %+.1f%% | Kelly建議: $%.1f\n"
+        "> %s\n"
+    ) % (
+        p.tier, p.matchup, p.start_time,
+        p.bet, p.price, p.book,
+        p.missing_str, p.consensus_str,
+        p.prob * 100, p.edge * 100, p.kelly_stake,
+        p.ou_note,
+    )
 
-    now_utc = datetime.utcnow()
-    now_tw  = now_utc + timedelta(hours=8)
-    today_s = now_tw.strftime("%Y-%m-%d")
 
+def score_games(games, injuries, live_ratings, now_utc, schedule=None):
+    """The NBA scoring pass: every not-yet-started game's spread/moneyline
+    outcomes that clear EDGE_THRESHOLD, best one per game, as
+    {date: {game_id: Pick}}. Stakes are left at 0 for the portfolio
+    allocator in run()."""
+    return group_by_date(score_slate(NBA, games, nba_model(injuries, live_ratings, schedule), now_utc))
+
+
+def is_official(now_utc):
     # GITHUB_EVENT_NAME ("schedule" vs "workflow_dispatch") is set automatically
     # by GitHub Actions and is a reliable signal. Falling back to a wall-clock
     # hour check (as before) only when that env var is absent -- e.g. running
@@ -1125,159 +4506,163 @@ def run():
     # runs into untracked ones under the old hour==22 check.
     github_event = os.getenv("GITHUB_EVENT_NAME", "")
     if github_event:
-        is_official_run = (github_event == "schedule")
+        official = (github_event == "schedule")
     else:
-        is_official_run = (now_utc.hour == 22)
-    log.info("Official run: %s (event: %s, UTC hour: %d)", is_official_run, github_event or "n/a", now_utc.hour)
-
-    live_ratings = fetch_team_stats()
-    data_source  = "即時數據" if live_ratings else "靜態備用"
-    injuries     = get_injury_report()
-    games        = fetch_odds()
-    history      = load_history()
-    summer_league = analyze_summer_league(now_utc=now_utc)
-    record_summer_history(history, summer_league, is_official_run)
+        official = (now_utc.hour == 22)
+    log.info("Official run: %s (event: %s, UTC hour: %d)", official, github_event or "n/a", now_utc.hour)
+    return official
 
-    if not games and not summer_league.get("available"):
-        log.info("No regular-season games and no Summer League data; nothing to report")
-        return
 
-    daily_picks = {}
+# ── Snapshots and reports ────────────────────────────────────────────────────
+# A run is split into take_snapshot (every network read), build_report (pure
+# computation over the snapshot) and the side effects in _run (gist, site,
+# Discord). The CLI below exposes each step on its own, so a saved snapshot
+# can be re-scored offline after a parameter tweak.
+SNAPSHOT_VERSION = 1
+Report = namedtuple("Report", "output sections site history analytics archives official")
 
-    for g in games:
-        try:
-            c_time_utc = datetime.strptime(g["commence_time"], "%Y-%m-%dT%H:%M:%SZ")
-            c_time_tw  = c_time_utc + timedelta(hours=8)
-        except (KeyError, ValueError):
-            continue
 
-        if c_time_utc < now_utc:
-            continue
+def take_snapshot(now_utc=None):
+    """Everything one run reads from the outside world: each active
+    league's inputs, the gist history, analytics and archive index, and the
+    summer-league analysis -- plus the run seed the simulations draw from. Games stay live objects here; freeze_snapshot makes it JSON."""
+    now_utc = now_utc or datetime.utcnow()
+    official = is_official(now_utc)
+    seed     = new_run_seed()
+    with span("prepare_leagues"):
+        leagues = fetch_league_inputs([LEAGUES[n] for n in ACTIVE_LEAGUES], now_utc)
+    with span("load_history"):
+        history   = load_history()
+        analytics = load_analytics()
+        archives  = load_archive_index()
+    with span("analyze_summer_league"):
+        summer_league = analyze_summer_league(now_utc=now_utc, seed=seed)
+    return {
+        "version":       SNAPSHOT_VERSION,
+        "taken_at":      now_utc.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "official":      official,
+        "seed":          seed,
+        "leagues":       leagues,
+        "history":       history,
+        "analytics":     analytics,
+        "archives":      archives,
+        "summer_league": summer_league,
+    }
 
-        g_date     = c_time_tw.strftime("%Y-%m-%d")
-        home       = normalize_team(g.get("home_team", ""))
-        away       = normalize_team(g.get("away_team", ""))
-        game_id    = "%s@%s_%s" % (away, home, g_date)
-        bookmakers = g.get("bookmakers", [])
-
-        daily_picks.setdefault(g_date, {})
-        margin, h_missing, a_missing = predict_margin(home, away, injuries, live_ratings)
-
-        model_total     = predict_total(home, away, live_ratings)
-        consensus_total = get_consensus_total(bookmakers)
-        ou_note = ""
-        if consensus_total:
-            diff = model_total - consensus_total
-            if diff > 3:
-                ou_note = "OU: 模型偏大分 (%.1f vs 市場 %.1f) 偏Over" % (model_total, consensus_total)
-            elif diff < -3:
-                ou_note = "OU: 模型偏小分 (%.1f vs 市場 %.1f) 偏Under" % (model_total, consensus_total)
-            else:
-                ou_note = "OU: 模型 %.1f vs 市場 %.1f (無明顯偏向)" % (model_total, consensus_total)
 
-        for book in bookmakers:
-            for market in book.get("markets", []):
-                if market.get("key") != "spreads":
-                    continue
-                for outcome in market.get("outcomes", []):
-                    name  = normalize_team(outcome.get("name", ""))
-                    line  = outcome.get("point", 0)
-                    price = outcome.get("price", 0)
+def freeze_snapshot(snapshot):
+    frozen = dict(snapshot)
+    frozen["leagues"] = {name: freeze_inputs(inputs) for name, inputs in snapshot["leagues"].items()}
+    return frozen
 
-                    if not (MIN_SPREAD <= abs(line) <= MAX_SPREAD):
-                        continue
-                    if not (MIN_PRICE < price <= MAX_PRICE):
-                        continue
 
-                    consensus = get_consensus_line(bookmakers, name)
-                    if consensus is None:
-                        consensus = line
-
-                    # A higher signed point value is always better for whichever side
-                    # you're betting: more cushion for the underdog (+5.5 beats +4.5),
-                    # less to cover for the favorite (-4.5 beats -5.5). So the
-                    # comparison is `line - consensus` uniformly -- no sign flip by
-                    # favorite/underdog. (Previously flipped for negative lines, which
-                    # inverted the favorable/unfavorable verdict for every favorite bet.)
-                    line_advantage = line - consensus
-                    if line_advantage < 0:
-                        continue
+def save_snapshot(snapshot, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(freeze_snapshot(snapshot), f, ensure_ascii=False, separators=(",", ":"))
+    log.info("Snapshot written: %s", path)
 
-                    target  = margin if name == home else -margin
-                    blended = target * MODEL_WEIGHT + (-consensus) * MARKET_WEIGHT
-                    prob    = simulate_cover(blended, line)
-                    edge    = prob - (1 / price)
 
-                    if edge < EDGE_THRESHOLD:
-                        continue
+def snapshot_seed(snapshot):
+    """The snapshot's run seed. Snapshots saved before seeds were recorded
+    get one derived from their timestamp, so re-scoring them is repeatable too."""
+    if snapshot.get("seed") is not None:
+        return snapshot["seed"]
+    return stream_seed(0, snapshot["taken_at"]) >> 16
 
-                    missing = (h_missing if name == home else a_missing) + \
-                              (a_missing if name == home else h_missing)
-
-                    stake = kelly_stake(prob, price, BANKROLL)
-
-                    if edge > 0.12:
-                        tier = "💎 頂級"
-                    elif edge > 0.09:
-                        tier = "🔥 強力"
-                    else:
-                        tier = "⭐ 穩定"
-
-                    bet_cn        = TEAM_CN.get(name, name)
-                    away_cn       = TEAM_CN.get(away, away)
-                    home_cn       = TEAM_CN.get(home, home)
-                    missing_str   = "狀況: " + ", ".join(missing) if missing else "陣容完整"
-                    consensus_str = "共識線: %+.1f" % consensus
-
-                    msg = (
-                        "**[%s] %s @ %s** (%s)\n"
-                        "投注: `%s %+.1f` @ **%.2f** (%s)\n"
-                        "> %s | %s\n"
-                        "> 勝率: %.1f%% | Edge: %+.1f%% | Kelly建議: $%.1f\n"
-                        "> %s\n"
-                    ) % (
-                        tier, away_cn, home_cn,
-                        c_time_tw.strftime("%m/%d %H:%M"),
-                        bet_cn, line, price, book.get("title", "?"),
-                        missing_str, consensus_str,
-                        prob * 100, edge * 100, stake,
-                        ou_note,
-                    )
-
-                    existing = daily_picks[g_date].get(game_id)
-                    if existing is None or edge > existing["edge"]:
-                        daily_picks[g_date][game_id] = {
-                            "edge":        edge,
-                            "prob":        prob,
-                            "price":       price,
-                            "kelly_stake": stake,
-                            "msg":         msg,
-                            "tier":        tier,
-                            "matchup":     "%s @ %s" % (away_cn, home_cn),
-                            "start_time":  c_time_tw.strftime("%m/%d %H:%M"),
-                            "bet":         "%s %+.1f" % (bet_cn, line),
-                            "book":        book.get("title", "?"),
-                            "missing":     missing_str,
-                            "consensus":   consensus_str,
-                            "ou_note":     ou_note,
-                        }
-
-                    if edge > 0.12 and is_official_run and g_date == today_s:
-                        existing_h = history.get(game_id)
-                        if existing_h is None or edge > existing_h.get("edge", 0):
-                            history[game_id] = {
-                                "date":        g_date,
-                                "bet":         "%s %+.1f" % (TEAM_CN.get(name, name), line),
-                                "book":        book.get("title", "?"),
-                                "price":       price,
-                                "prob":        round(prob, 4),
-                                "edge":        round(edge, 4),
-                                "kelly_stake": stake,
-                                "result":      existing_h.get("result", "pending") if existing_h else "pending",
-                            }
-
-    total_rec, wins, win_rate, profit = calc_performance(history, league="regular")
-    regular_history_count = sum(1 for r in history.values() if r.get("league", "regular") == "regular")
+
+def load_snapshot(path):
+    with open(path, encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError("unsupported snapshot version %r" % snapshot.get("version"))
+    snapshot["leagues"] = {name: thaw_inputs(inputs) for name, inputs in snapshot["leagues"].items()}
+    return snapshot
+
+
+def build_report(snapshot, fraction=KELLY_FRACTION, bankroll=None, leagues=None):
+    """Score a snapshot into a Report: the notification text and the
+    sections it renders from (see render_report), the dashboard payload,
+    and the history/analytics to persist. No I/O -- the snapshot
+    dict (history included) is updated in place. None when there is
+    nothing to report. `leagues` (name -> League, default LEAGUES) lets a
+    caller score with adjusted league configs without touching the
+    module's own."""
+    leagues = LEAGUES if leagues is None else leagues
+    now_utc = datetime.strptime(snapshot["taken_at"], "%Y-%m-%dT%H:%M:%SZ")
+    now_tw  = now_utc + timedelta(hours=8)
+    today_s = now_tw.strftime("%Y-%m-%d")
+    is_official_run = snapshot.get("official", False)
+    seed    = snapshot_seed(snapshot)
+
+    with span("build_slates"):
+        slates = [
+            leagues[name].build_slate(inputs)
+            for name, inputs in snapshot["leagues"].items() if name in leagues
+        ]
+    games       = [g for sl in slates for g in sl.games]
+    data_source = "即時數據" if slates and slates[0].live else "靜態備用"
+    history     = snapshot["history"]
+    archives    = snapshot.get("archives") or new_archive_index()
+    with span("update_analytics"):
+        analytics = update_analytics(snapshot.get("analytics"), history, archives)
+        calibration = update_calibration(analytics)
+    summer_league = snapshot["summer_league"]
+    record_summer_history(history, summer_league, is_official_run)
+
+    if not games and not summer_league.get("available"):
+        log.info("No regular-season games and no Summer League data; nothing to report")
+        return None
+
+    with span("score_games"):
+        daily_picks = {}
+        for sl in slates:
+            if sl.games:
+                group_by_date(score_slate(
+                    sl.league, sl.games, sl.model, now_utc,
+                    calibration=calibration.get(sl.league.name), seed=seed,
+                ), daily_picks)
+        nba = snapshot["leagues"].get(NBA.name) or {}
+        if nba.get("props") and nba.get("games"):
+            with span("score_props"):
+                group_by_date(score_props(
+                    PROPS, nba["games"], nba["props"], nba.get("injuries", {}), now_utc,
+                    calibration=calibration.get(PROPS.name), seed=seed,
+                ), daily_picks)
+
+    # Stakes are sized per day's slate as one portfolio (see
+    # allocate_portfolio) once every pick is known, rather than per outcome
+    # inside the loop above.
+    bankroll = current_bankroll(analytics) if bankroll is None else bankroll
+    for date, picks_by_game in daily_picks.items():
+        slate  = list(picks_by_game.values())
+        with span("allocate_portfolio"):
+            stakes = allocate_portfolio(slate, bankroll, fraction)
+        for p, stake in zip(slate, stakes):
+            p.kelly_stake = stake
+
+            if p.edge > p.league.history_edge and is_official_run and date == today_s:
+                existing_h = history.get(p.game_id)
+                if existing_h is None or p.edge > existing_h.get("edge", 0):
+                    history[p.game_id] = {
+                        "date":        date,
+                        "bet":         p.bet,
+                        "book":        p.book,
+                        "region":      p.region,
+                        "price":       p.price,
+                        "prob":        round(p.prob, 4),
+                        "raw_prob":    round(p.raw_prob, 4),
+                        "edge":        round(p.edge, 4),
+                        "kelly_stake": stake,
+                        "result":      existing_h.get("result", "pending") if existing_h else "pending",
+                        "market":      p.market,
+                        "league":      p.league_tag,
+                    }
+
+    total_rec, wins, win_rate, profit = calc_performance(analytics, league="regular")
+    regular_history_count = archived_recorded(archives, "regular") + sum(
+        1 for r in history.values() if r.get("league", "regular") == "regular"
+    )
     small_sample_note = "（樣本數 < %d 場，統計僅供參考，不代表長期表現）\n" % MIN_HISTORY_SAMPLE
     perf_msg = (
         "\n📊 **歷史績效報告** (僅統計💎頂級)\n"
@@ -1287,41 +4672,58 @@ def run():
     ) % (regular_history_count, total_rec, win_rate, profit)
     if total_rec < MIN_HISTORY_SAMPLE:
         perf_msg += small_sample_note
+    perf = [{"kind": "text", "league": "regular", "text": perf_msg}]
 
-    summer_total, summer_wins, summer_win_rate, _ = calc_performance(history, league="summer")
-    if summer_total or any(r.get("league") == "summer" for r in history.values()):
-        summer_recorded = sum(1 for r in history.values() if r.get("league") == "summer")
-        perf_msg += (
+    extra = [leagues[n] for n in snapshot["leagues"] if n in leagues and n != "regular"] + [PROPS]
+    for lg in extra:
+        recorded = archived_recorded(archives, lg.name) + sum(1 for r in history.values() if r.get("league") == lg.name)
+        if not recorded:
+            continue
+        lg_total, _, lg_win_rate, lg_profit = calc_performance(analytics, league=lg.name)
+        perf.append({"kind": "text", "league": lg.name, "text": (
+            "\n📊 **%s 歷史績效**\n"
+            "總推薦: %d 場 | 已結算: %d 場 | 勝率: %.1f%% | 損益: %+.1f 元\n"
+        ) % (lg.label, recorded, lg_total, lg_win_rate, lg_profit)})
+
+    summer_total, summer_wins, summer_win_rate, _ = calc_performance(analytics, league="summer")
+    summer_recorded = archived_recorded(archives, "summer") + sum(
+        1 for r in history.values() if r.get("league") == "summer"
+    )
+    if summer_recorded:
+        summer_msg = (
             "\n🏖️ **夏季聯賽歷史績效** (Edge ≥ 6%% 推薦，無 Kelly 資金配置)\n"
             "總推薦: %d 場 | 已結算: %d 場 | 勝率: %.1f%%\n"
         ) % (summer_recorded, summer_total, summer_win_rate)
         if summer_total < MIN_HISTORY_SAMPLE:
-            perf_msg += small_sample_note
+            summer_msg += small_sample_note
+        perf.append({"kind": "text", "league": "summer", "text": summer_msg})
 
     total_picks = sum(len(v) for v in daily_picks.values())
-    avg_edge    = (
-        sum(p["edge"] for d in daily_picks.values() for p in d.values()) / total_picks
-        if total_picks else 0
-    )
-
-    output = "🏀 NBA %s | 更新: %s | 資料: %s | 推薦: %d 場 | 平均Edge: %+.1f%%\n" % (
-        VERSION, now_tw.strftime("%m/%d %H:%M"), data_source, total_picks, avg_edge * 100
-    )
-
-    if is_official_run:
-        output += "📌 正式記錄版本\n"
-    else:
-        output += "🔧 測試版本（不寫入回測）\n"
-
-    if not daily_picks:
-        output += "\n今日無符合條件之推薦。\n"
-    else:
-        for date in sorted(daily_picks):
-            label = "📅 今日賽事" if date == today_s else ("⏭ 預告 %s" % date)
-            output += "\n%s\n" % label
-            for p in sorted(daily_picks[date].values(), key=lambda x: x["edge"], reverse=True):
-                output += p["msg"]
-            output += "-" * 30 + "\n"
+    sections = [{
+        "kind":        "header",
+        "version":     VERSION,
+        "updated":     now_tw.strftime("%m/%d %H:%M"),
+        "data_source": data_source,
+        "official":    is_official_run,
+    }, {
+        "kind": "slate",
+        "days": [
+            {
+                "label": "📅 今日賽事" if date == today_s else ("⏭ 預告 %s" % date),
+                "picks": [
+                    {"league": p.league_tag, "tier": p.tier, "edge": p.edge, "text": format_pick_msg(p)}
+                    for p in sorted(daily_picks[date].values(), key=lambda x: x.edge, reverse=True)
+                ],
+            }
+            for date in sorted(daily_picks)
+        ],
+    }]
+
+    with span("shop_lines"):
+        line_shopping = shop_lines(games, now_utc=now_utc)
+    sections.append({"kind": "text", "text": format_line_shopping_section(line_shopping)})
+    count("picks", total_picks)
+    count("games_scored", len(games))
 
     summer_league["performance"] = {
         "total_recommendations": summer_total,
@@ -1330,26 +4732,691 @@ def run():
         "min_sample":            MIN_HISTORY_SAMPLE,
     }
 
-    output += perf_msg
-    output += format_summer_league_section(summer_league)
+    sections.extend(perf)
+    sections.append({"kind": "text", "league": "summer", "text": format_summer_league_section(summer_league)})
+    output = render_report(sections)
+
+    with span("build_site_payload"):
+        site = build_site_payload(
+            now_tw=now_tw, data_source=data_source, is_official_run=is_official_run,
+            daily_picks=daily_picks, today_s=today_s,
+            total_rec=total_rec, wins=wins, win_rate=win_rate, profit=profit,
+            summer_league=summer_league, history=history,
+            line_shopping=line_shopping, analytics=analytics, archives=archives, sim_seed=seed,
+        )
+    return Report(output, sections, site, history, analytics, archives, is_official_run)
+
+
+def run():
+    with span("run"):
+        _run()
+    if METRICS_ENABLED:
+        write_run_report()
+
+
+def _run():
+    sinks = build_sinks()
+    if not ODDS_API_KEY or not sinks:
+        log.error("Missing env vars")
+        return
+
+    report = build_report(take_snapshot())
+    if report is None:
+        return
 
-    if is_official_run:
-        save_history(history)
+    archived = {}
+    if report.official:
+        with span("compact_history"):
+            files, archived = archive_closed_seasons(report.history, report.analytics, report.archives)
+        with span("save_history"):
+            save_history(report.history, report.analytics, files)
         log.info("History saved (official run, regular top tier + summer edge >= 6%)")
     else:
         log.info("History NOT saved (test run)")
 
-    export_site_data(
-        now_tw=now_tw, data_source=data_source, is_official_run=is_official_run,
-        daily_picks=daily_picks, today_s=today_s,
-        total_rec=total_rec, wins=wins, win_rate=win_rate, profit=profit,
-        summer_league=summer_league, history=history,
+    # Seasons archived just now get their dashboard shard written from the
+    # records in hand; older ones are only fetched from the gist when their
+    # shard is missing from the site directory.
+    for season in missing_archive_shards(archive_listing(report.archives, archived)):
+        records = load_archive(season)
+        if records:
+            archived[season] = records
+    if archived:
+        report.site["history"]  = build_history_pages(report.history)
+        report.site["archives"] = archive_listing(report.archives, archived)
+
+    with span("export_site_data"):
+        write_site_data(report.site)
+
+    log.info("Notifying %d sink(s), length: %d", len(sinks), len(report.output))
+    with span("notify"):
+        notify(report.sections, sinks)
+    log.info("Done")
+
+
+# ── Live mode ────────────────────────────────────────────────────────────────
+# score_slate skips every game that has tipped off. `python nba_bot.py live`
+# follows them instead: each tick reads the ESPN NBA scoreboard (score,
+# period, clock) and, less often, the Odds API board, which carries in-play
+# lines for games in progress. The final margin is modelled as the current
+# margin plus the pregame expectation scaled by the share of regulation
+# left, with the league's full-game spread shrinking by the square root of
+# that share; each live line is blended with the live market consensus as
+# pregame scoring does and priced with a closed-form normal CDF, so a tick
+# over every live outcome costs microseconds and the poll interval is set
+# by the APIs, not the model.
+LIVE_POLL_SECONDS       = 5
+LIVE_ODDS_SECONDS       = 30      # Odds API requests cost quota; scores refresh every tick
+# Period markets (ODDS_PERIOD_MARKETS) cost one request per game in play, so
+# live mode only refreshes them when asked to, on their own slower clock.
+LIVE_PERIOD_ODDS_SECONDS = int(os.getenv("NBA_LIVE_PERIOD_ODDS", "0"))
+LIVE_PERIOD_SECONDS     = 720.0
+LIVE_OT_SECONDS         = 300.0
+LIVE_REGULATION_SECONDS = 4 * LIVE_PERIOD_SECONDS
+LIVE_MIN_SECONDS        = 60      # the last minute moves faster than anyone can bet it
+LIVE_MIN_PRICE          = 1.5
+LIVE_MAX_PRICE          = 3.0
+
+LiveScore = namedtuple("LiveScore", "home away home_score away_score period clock state")
+
+
+def project_espn_live(ev):
+    comp = (ev.get("competitions") or [{}])[0]
+    competitors = comp.get("competitors", [])
+    if len(competitors) != 2:
+        return None
+    home   = next((c for c in competitors if c.get("homeAway") == "home"), competitors[0])
+    away   = next((c for c in competitors if c.get("homeAway") == "away"), competitors[1])
+    status = ev.get("status") or comp.get("status") or {}
+    try:
+        return LiveScore(
+            normalize_team((home.get("team") or {}).get("displayName", "")),
+            normalize_team((away.get("team") or {}).get("displayName", "")),
+            int(home.get("score", 0) or 0), int(away.get("score", 0) or 0),
+            int(status.get("period") or 0), float(status.get("clock") or 0.0),
+            (status.get("type") or {}).get("state", ""),
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_live_scores():
+    """In-progress NBA games from the ESPN scoreboard."""
+    events = safe_stream(
+        "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard",
+        project_espn_live, array_key="events", retries=2, timeout=5,
     )
+    return [e for e in events or [] if e and e.state == "in"]
 
-    log.info("Sending to Discord, length: %d", len(output))
-    chunked_send(output, WEBHOOK)
-    log.info("Done")
 
+def seconds_remaining(period, clock):
+    """Game seconds left: the rest of regulation, or of the current overtime."""
+    if period <= 4:
+        return (4 - max(period, 1)) * LIVE_PERIOD_SECONDS + clock
+    return min(clock, LIVE_OT_SECONDS)
 
-if __name__ == "__main__":
+
+def pregame_margin(league, model, game):
+    """Expected home margin before tip-off: the model blended with the
+    pregame spread consensus, or the model alone without one."""
+    modelled = model(game)
+    if modelled is None:
+        return None
+    consensus = game.consensus("spreads", game.home)
+    if consensus is None:
+        return modelled[0]
+    return modelled[0] * league.model_weight + (-consensus) * league.market_weight
+
+
+def evaluate_live(scores, games, pregame, league=None):
+    """Every live spread/moneyline outcome of every game in progress, priced
+    against the remaining-time model: a list of dicts (best edge first)."""
+    league = league or NBA
+    live   = {(s.home, s.away): s for s in scores}
+    cands  = []
+    for g in games:
+        s   = live.get((g.home, g.away))
+        pre = pregame.get(g.id)
+        if s is None or pre is None:
+            continue
+        left = seconds_remaining(s.period, s.clock)
+        if left < LIVE_MIN_SECONDS:
+            continue
+        share = min(left / LIVE_REGULATION_SECONDS, 1.0)
+        mu    = (s.home_score - s.away_score) + pre * share
+        sigma = league.std * math.sqrt(share)
+        for o in g.outcomes:
+            if o.market not in league.markets or not (LIVE_MIN_PRICE < (o.price or 0) <= LIVE_MAX_PRICE):
+                continue
+            if o.market == "spreads":
+                if o.point is None:
+                    continue
+                line = o.point
+            else:
+                line = 0.0
+            side_mu   = mu if o.side == g.home else -mu
+            consensus = g.consensus("spreads", o.side)
+            blended   = side_mu if consensus is None else (
+                side_mu * league.model_weight + (-consensus) * league.market_weight
+            )
+            cands.append((g, s, o, cover_probability(blended, line, sigma), sigma, left))
+
+    rows = []
+    for g, s, o, prob, sigma, left in cands:
+        edge = prob - 1 / o.price
+        rows.append({
+            "game_id": g.id, "home": g.home, "away": g.away,
+            "home_score": s.home_score, "away_score": s.away_score,
+            "period": s.period, "clock": s.clock, "seconds_left": left,
+            "market": o.market, "side": o.side, "point": o.point, "price": o.price, "book": o.book,
+            "prob": prob, "edge": edge, "tier": pick_tier(edge),
+        })
+    rows.sort(key=lambda r: -r["edge"])
+    count("live_outcomes", len(rows))
+    return rows
+
+
+def _live_clock(period, clock):
+    label = ("Q%d" % period) if period <= 4 else ("OT%d" % (period - 4))
+    return "%s %d:%02d" % (label, int(clock) // 60, int(clock) % 60)
+
+
+def format_live_msg(r):
+    team = TEAM_CN.get(r["side"], r["side"])
+    bet  = ("%s %s" % (team, MARKET_ZH["h2h"])) if r["market"] == "h2h" else ("%s %+.1f" % (team, r["point"]))
+    return (
+        "**[🔴 即時] %s @ %s** %s %d-%d\n"
+        "投注: `%s` @ **%.2f** (%s)\n"
+        "> 勝率: %.1f%% | Edge: %+.1f%%\n"
+    ) % (
+        TEAM_CN.get(r["away"], r["away"]), TEAM_CN.get(r["home"], r["home"]),
+        _live_clock(r["period"], r["clock"]), r["away_score"], r["home_score"],
+        bet, r["price"], r["book"], r["prob"] * 100, r["edge"] * 100,
+    )
+
+
+class LiveSession:
+    """State of one `live` run: the pregame model (built once, from the same
+    inputs a regular run fetches), each game's pregame expectation, the
+    latest odds board and the live edges already flagged.
+
+    Odds polls fetch only the bulk board. Period markets are per-event
+    requests, so they are refreshed only when period_seconds is set (and
+    ODDS_PERIOD_MARKETS lists some), for games in play, and carried over
+    onto each fresh board in between."""
+
+    def __init__(self, league=None, odds_seconds=LIVE_ODDS_SECONDS, now_utc=None,
+                 period_seconds=LIVE_PERIOD_ODDS_SECONDS):
+        self.league  = league or NBA
+        now_utc      = now_utc or datetime.utcnow()
+        inputs       = self.league.fetch_inputs(now_utc)
+        self.model   = self.league.build_slate(inputs).model
+        self.pregame = {}
+        self.games   = []
+        self.flagged = set()
+        self.odds_seconds   = odds_seconds
+        self.odds_at        = None
+        self.period_seconds = period_seconds
+        self.period_at      = now_utc
+        self.period_odds    = {
+            g.id: [o for o in g.outcomes if split_market_key(o.market)[1]] for g in inputs["games"]
+        }
+        self._set_games(inputs["games"], now_utc)
+
+    def _set_games(self, games, now_utc):
+        self.games   = games
+        self.odds_at = now_utc
+        for g in games:
+            if not any(split_market_key(o.market)[1] for o in g.outcomes):
+                g.add_outcomes(self.period_odds.get(g.id, []))
+            # Keep refreshing the expectation until tip-off, then freeze it:
+            # once a game is live its consensus is an in-play line.
+            if g.commence > now_utc or g.id not in self.pregame:
+                self.pregame[g.id] = pregame_margin(self.league, self.model, g)
+
+    def tick(self, now_utc=None):
+        """One poll: (every evaluated live outcome, the ones newly clearing
+        the edge threshold)."""
+        now_utc = now_utc or datetime.utcnow()
+        odds_due = self.odds_at is None or (now_utc - self.odds_at).total_seconds() >= self.odds_seconds
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            scores = pool.submit(fetch_live_scores)
+            games  = pool.submit(self.league.fetch_live_board) if odds_due else None
+            scores = scores.result()
+            if games is not None:
+                fresh = games.result()
+                if fresh:
+                    self._set_games(fresh, now_utc)
+        if self._period_due(now_utc):
+            self._refresh_periods(now_utc)
+        rows = evaluate_live(scores, self.games, self.pregame, self.league)
+        new, seen = [], set()
+        for r in rows:
+            # Best book first (rows are sorted by edge); one flag per game a tick.
+            key = (r["game_id"], r["market"], r["side"], r["point"])
+            if r["edge"] < self.league.edge_threshold or r["game_id"] in seen:
+                continue
+            seen.add(r["game_id"])
+            if key not in self.flagged:
+                self.flagged.add(key)
+                new.append(r)
+        return rows, new
+
+    def _period_due(self, now_utc):
+        return bool(self.period_seconds and ODDS_PERIOD_MARKETS) and (
+            (now_utc - self.period_at).total_seconds() >= self.period_seconds)
+
+    def _refresh_periods(self, now_utc):
+        """Re-fetch period markets for the games in play, one request each."""
+        self.period_at = now_utc
+        for g in self.games:
+            if not g.id or g.commence > now_utc:
+                continue
+            fresh = fetch_event_odds(g, ODDS_PERIOD_MARKETS, self.league.sport_key)
+            if not fresh:
+                continue
+            g.outcomes = [o for o in g.outcomes if not split_market_key(o.market)[1]]
+            g.add_outcomes(fresh)
+            self.period_odds[g.id] = fresh
+
+
+def run_live(interval=LIVE_POLL_SECONDS, odds_seconds=LIVE_ODDS_SECONDS, ticks=None, sinks=None,
+             period_seconds=LIVE_PERIOD_ODDS_SECONDS):
+    """Poll until interrupted (or for `ticks` polls), printing each new live
+    edge and sending it to `sinks` as a one-day slate section."""
+    session = LiveSession(odds_seconds=odds_seconds, period_seconds=period_seconds)
+    n = 0
+    while ticks is None or n < ticks:
+        t0 = time.perf_counter()
+        rows, new = session.tick()
+        took = (time.perf_counter() - t0) * 1000
+        log.info("Live tick %d: %d outcomes in play, %d new edges, %.0f ms", n + 1, len(rows), len(new), took)
+        for r in new:
+            print(format_live_msg(r))
+        if new and sinks:
+            notify([{"kind": "slate", "days": [{
+                "label": "🔴 即時盤口",
+                "picks": [{"league": session.league.name, "tier": r["tier"], "edge": r["edge"],
+                           "text": format_live_msg(r)} for r in new],
+            }]}], sinks)
+        n += 1
+        if ticks is None or n < ticks:
+            time.sleep(max(0.0, interval - took / 1000))
+
+
+# ── API server ───────────────────────────────────────────────────────────────
+# `python nba_bot.py serve` keeps the latest report in memory and answers
+# read-only JSON on a local port, so a dashboard or script can poll it
+# instead of waiting for the Actions commit of docs/data:
+#   /api/status          run metadata and refresh times
+#   /api/picks           picks, filterable by ?date=&tier=&league=
+#   /api/history         hot history rows, same filters (date may be a prefix)
+#   /api/performance     headline numbers, analytics, archived seasons
+#   /api/summer          the summer-league analysis
+#   /api/line-shopping   best lines, arbitrage and middles
+# A background thread re-takes the snapshot every refresh interval and
+# swaps in a fresh set of views; it never saves history or notifies.
+# Bodies are serialized once per path and filter set and carry an ETag,
+# so repeat requests are a dict lookup (or a 304).
+API_REFRESH_SECONDS = int(os.getenv("NBA_API_REFRESH", "300"))
+API_FILTERS         = ("date", "tier", "league")
+API_CACHE_MAX       = 1024   # cached bodies per refresh; odd filter values past this are built per request
+
+
+def _api_rows(rows, date=None, tier=None, league=None):
+    out = []
+    for r in rows:
+        if date and not r.get("date", "").startswith(date):
+            continue
+        if league and r.get("league", "regular") != league:
+            continue
+        if tier and tier not in (r.get("tier") or pick_tier(r.get("edge", 0) / 100)):
+            continue
+        out.append(r)
+    return out
+
+
+class ApiViews:
+    """The JSON bodies for one report. Built per (path, filters) on first
+    request and reused until the next refresh replaces the whole object;
+    the unfiltered and per-date/tier/league pick views are built up front."""
+
+    def __init__(self, report, refreshed_at, refresh_seconds=None):
+        site = report.site
+        self.lists = {
+            "/api/picks": [
+                dict(p, date=day["date"])
+                for day in site["regular_season"]["days"] for p in day["picks"]
+            ],
+            "/api/history":       [row for page in reversed(site["history"]) for row in reversed(page)],
+            "/api/line-shopping": site.get("line_shopping", []),
+        }
+        self.documents = {
+            "/api/status": {
+                "version":      site.get("version"),
+                "generated_at": site.get("generated_at"),
+                "refreshed_at": refreshed_at.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "refresh_seconds": refresh_seconds,
+                "data_source":  site.get("data_source"),
+                "run_type":     site.get("run_type"),
+                "total_picks":  site["regular_season"]["total_picks"],
+                "avg_edge":     site["regular_season"]["avg_edge"],
+            },
+            "/api/performance": {
+                "performance": site.get("performance", {}),
+                "analytics":   site.get("analytics", {}),
+                "archives":    [{k: v for k, v in a.items() if k != "rows"} for a in site.get("archives", [])],
+            },
+            "/api/summer": site.get("summer_league", {}),
+        }
+        self._bodies = {}
+        self._lock   = threading.Lock()
+        picks = self.lists["/api/picks"]
+        for date in {None} | {p["date"] for p in picks}:
+            for tier in {None} | {p["tier"] for p in picks}:
+                for league in {None} | {p["league"] for p in picks}:
+                    self.get("/api/picks", (date, tier, league))
+
+    def get(self, path, filters=(None, None, None)):
+        """(etag, body bytes) for a path and (date, tier, league), or None
+        for an unknown path."""
+        key  = (path,) + tuple(filters)
+        body = self._bodies.get(key)
+        if body is None:
+            if path in self.lists:
+                rows = _api_rows(self.lists[path], *filters)
+                doc  = {"count": len(rows), "items": rows}
+            elif path in self.documents:
+                doc = self.documents[path]
+            else:
+                return None
+            raw  = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            body = ('"%s"' % hashlib.sha256(raw).hexdigest()[:16], raw)
+            with self._lock:
+                if len(self._bodies) < API_CACHE_MAX:
+                    self._bodies[key] = body
+        return body
+
+
+class ApiServer:
+    """In-memory state behind `serve`: the current ApiViews and the loop
+    that rebuilds them. `snapshot_path` serves one saved snapshot and never
+    refreshes."""
+
+    def __init__(self, refresh_seconds=API_REFRESH_SECONDS, snapshot_path=None):
+        self.refresh_seconds = refresh_seconds
+        self.snapshot_path   = snapshot_path
+        self.views = None
+        self.stop  = threading.Event()
+
+    def refresh(self):
+        now_utc = datetime.utcnow()
+        try:
+            snapshot = load_snapshot(self.snapshot_path) if self.snapshot_path else take_snapshot(now_utc)
+            report   = build_report(snapshot)
+        except Exception as e:
+            log.error("API refresh failed; keeping the previous views: %s", e)
+            return False
+        if report is None:
+            log.info("API refresh: nothing to report; keeping the previous views")
+            return False
+        self.views = ApiViews(report, now_utc, None if self.snapshot_path else self.refresh_seconds)
+        count("api_refreshes")
+        log.info("API views refreshed (%d picks)", len(self.views.lists["/api/picks"]))
+        return True
+
+    def refresh_forever(self):
+        self.refresh()
+        if self.snapshot_path:
+            return
+        while not self.stop.wait(self.refresh_seconds):
+            self.refresh()
+
+
+def serve_api(api, host="127.0.0.1", port=8080):
+    """Start the HTTP server for an ApiServer on a daemon thread; returns
+    the server (its address is server.server_address)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            views = api.views
+            if views is None:
+                return self._reply(503, b'{"error":"warming up"}', {"Retry-After": "5"})
+            found = views.get(parts.path.rstrip("/") or "/", tuple(query.get(f, [None])[0] for f in API_FILTERS))
+            if found is None:
+                return self._reply(404, b'{"error":"not found"}')
+            etag, body = found
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if self.headers.get("If-None-Match") == etag:
+                return self._reply(304, b"", headers)
+            self._reply(200, body, headers)
+
+        def _reply(self, status, body, headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            log.debug("api: " + fmt, *args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="api", daemon=True).start()
+    return server
+
+
+# ── Command line ─────────────────────────────────────────────────────────────
+#   python nba_bot.py                       full run (what the workflow calls)
+#   python nba_bot.py fetch [-o PATH]        write a snapshot of every input
+#   python nba_bot.py score SNAPSHOT [-o R]  re-score it offline, print the report
+#   python nba_bot.py send REPORT            send a saved report to every notify sink
+#   python nba_bot.py export REPORT          write a saved report's site data
+#   python nba_bot.py settle [--dry-run]     grade pending history from finals
+#   python nba_bot.py compact [--dry-run]    archive closed seasons out of the history
+#   python nba_bot.py serve [--port N]       local read-only JSON API (see ApiServer)
+#   python nba_bot.py live [--interval S]    follow games in progress for live edges
+#   python nba_bot.py bench [...]            the bench suite (bench/suite.py)
+SNAPSHOT_DIR = "snapshots"
+
+
+def _cmd_run(args):
     run()
+
+
+def _cmd_fetch(args):
+    now_utc = datetime.utcnow()
+    path    = args.out or os.path.join(SNAPSHOT_DIR, now_utc.strftime("snapshot_%Y%m%d_%H%M.json"))
+    save_snapshot(take_snapshot(now_utc), path)
+    print(path)
+
+
+def _cmd_score(args):
+    global SIMS, SIM_WORKERS
+    if args.sims:
+        SIMS = args.sims
+    if args.workers:
+        SIM_WORKERS = args.workers
+    snapshot = load_snapshot(args.snapshot)
+    if args.seed is not None:
+        snapshot["seed"] = args.seed
+    # Overrides go on per-invocation copies, never on LEAGUES itself, so
+    # nothing else in the process inherits them.
+    leagues = {}
+    for name, league in LEAGUES.items():
+        league = leagues[name] = copy.copy(league)
+        if args.edge is not None:
+            league.edge_threshold = args.edge
+        if args.model_weight is not None:
+            league.model_weight  = args.model_weight
+            league.market_weight = 1 - args.model_weight
+    report = build_report(snapshot, fraction=args.kelly, bankroll=args.bankroll, leagues=leagues)
+    if report is None:
+        return 1
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"output": report.output, "sections": report.sections, "site": report.site}, f, ensure_ascii=False)
+        log.info("Report written: %s", args.out)
+    print(report.output)
+
+
+def _load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _cmd_send(args):
+    sinks = build_sinks()
+    if not sinks:
+        log.error("Missing env vars")
+        return 1
+    report = _load_report(args.report)
+    # Reports saved before sections existed carry only the text.
+    sections = report.get("sections") or [{"kind": "text", "text": report["output"]}]
+    results  = notify(sections, sinks)
+    return 0 if all(results.values()) else 1
+
+
+def _cmd_export(args):
+    write_site_data(_load_report(args.report)["site"], args.site_dir)
+
+
+def _cmd_settle(args):
+    history = load_history()
+    settled = settle_history(history, collect_finals(history))
+    pending = sum(1 for r in history.values() if r.get("result") == "pending")
+    print("settled %d, still pending %d" % (settled, pending))
+    if settled and not args.dry_run:
+        save_history(history, update_analytics(load_analytics(), history, load_archive_index()))
+
+
+def _cmd_compact(args):
+    history   = load_history()
+    archives  = load_archive_index()
+    analytics = update_analytics(load_analytics(), history, archives)
+    files, archived = archive_closed_seasons(history, analytics, archives)
+    for season, records in sorted(archived.items()):
+        print("season %s: %d entries archived" % (season_label(season), len(records)))
+    print("hot history: %d entries" % len(history))
+    if files and not args.dry_run:
+        save_history(history, analytics, files)
+
+
+def _cmd_serve(args):
+    if not args.snapshot and not ODDS_API_KEY:
+        log.error("Missing env vars")
+        return 1
+    api    = ApiServer(args.refresh, args.snapshot)
+    server = serve_api(api, args.host, args.port)
+    print("Serving on http://%s:%d/api/status (Ctrl-C to stop)" % server.server_address[:2])
+    try:
+        api.refresh_forever()
+        while not api.stop.wait(3600):
+            pass
+    except KeyboardInterrupt:
+        api.stop.set()
+        server.shutdown()
+
+
+def _cmd_live(args):
+    if not ODDS_API_KEY:
+        log.error("Missing env vars")
+        return 1
+    try:
+        run_live(args.interval, args.odds_interval, args.ticks, build_sinks() if args.notify else None,
+                 args.period_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def _cmd_bench(args):
+    from bench import suite
+    return suite.main(args.passthrough)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="nba_bot.py", description="NBA odds bot %s" % VERSION)
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("run", help="full run: fetch, score, save history, export, send")
+
+    p = sub.add_parser("fetch", help="write a snapshot of every run input")
+    p.add_argument("-o", "--out", help="snapshot path (default %s/snapshot_<UTC time>.json)" % SNAPSHOT_DIR)
+
+    p = sub.add_parser("score", help="re-score a snapshot offline and print the report")
+    p.add_argument("snapshot")
+    p.add_argument("-o", "--out", help="also write the report (text + site payload) here")
+    p.add_argument("--edge", type=float, help="edge threshold for every league in the snapshot")
+    p.add_argument("--model-weight", type=float, help="model weight (market weight is 1 - this)")
+    p.add_argument("--kelly", type=float, default=KELLY_FRACTION, help="Kelly fraction")
+    p.add_argument("--bankroll", type=float, help="bankroll (default: from the snapshot's history)")
+    p.add_argument("--sims", type=int, help="simulation draws (default %d)" % SIMS)
+    p.add_argument("--seed", type=int, help="override the snapshot's simulation run seed")
+    p.add_argument("--workers", type=int, help="simulation worker processes (default %d)" % SIM_WORKERS)
+
+    p = sub.add_parser("send", help="send a saved report to every notify sink")
+    p.add_argument("report")
+
+    p = sub.add_parser("export", help="write a saved report's dashboard data")
+    p.add_argument("report")
+    p.add_argument("--site-dir", help="default %s" % SITE_DATA_DIR)
+
+    p = sub.add_parser("settle", help="grade pending history entries from final scores")
+    p.add_argument("--dry-run", action="store_true", help="report only, don't save the gist")
+
+    p = sub.add_parser("compact", help="move closed seasons' settled entries into season archives")
+    p.add_argument("--dry-run", action="store_true", help="report only, don't save the gist")
+
+    p = sub.add_parser("serve", help="serve the latest report as a local read-only JSON API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--refresh", type=int, default=API_REFRESH_SECONDS, help="seconds between refreshes")
+    p.add_argument("--snapshot", help="serve this saved snapshot instead of fetching (no refresh)")
+
+    p = sub.add_parser("live", help="poll games in progress and flag live edges")
+    p.add_argument("--interval", type=float, default=LIVE_POLL_SECONDS, help="seconds between score polls")
+    p.add_argument("--odds-interval", type=float, default=LIVE_ODDS_SECONDS, help="seconds between odds polls")
+    p.add_argument("--period-interval", type=float, default=LIVE_PERIOD_ODDS_SECONDS,
+                   help="seconds between period-market refreshes, one request per game in play (default %d = off)"
+                   % LIVE_PERIOD_ODDS_SECONDS)
+    p.add_argument("--ticks", type=int, help="stop after this many polls")
+    p.add_argument("--notify", action="store_true", help="also send new edges to the notify sinks")
+
+    sub.add_parser("bench", help="run the bench suite (arguments pass through)", add_help=False)
+
+    args, args.passthrough = parser.parse_known_args(argv)
+    if args.passthrough and args.command != "bench":
+        parser.error("unrecognized arguments: %s" % " ".join(args.passthrough))
+    handler = {
+        None:      _cmd_run,
+        "run":     _cmd_run,
+        "fetch":   _cmd_fetch,
+        "score":   _cmd_score,
+        "send":    _cmd_send,
+        "export":  _cmd_export,
+        "settle":  _cmd_settle,
+        "compact": _cmd_compact,
+        "serve":   _cmd_serve,
+        "live":    _cmd_live,
+        "bench":   _cmd_bench,
+    }[args.command]
+    return handler(args) or 0
+
+
+if __name__ == "__main__":
+    # bench/suite.py (and anything else) importing nba_bot should get this
+    # module, not a second copy of it.
+    sys.modules.setdefault("nba_bot", sys.modules[__name__])
+    sys.exit(main())
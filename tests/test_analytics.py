@@ -0,0 +1,72 @@
+import random
+
+import nba_bot
+
+
+def make_history(n, seed=0):
+    rnd     = random.Random(seed)
+    history = {}
+    for i in range(n):
+        price = rnd.choice((1.8, 1.91, 2.05))
+        history["g%d" % i] = {
+            "date":        "2026-%02d-%02d" % (1 + i % 3, 1 + i % 28),
+            "bet":         "x +3.5",
+            "book":        rnd.choice(("DraftKings", "FanDuel", "BetMGM")),
+            "price":       price,
+            "prob":        0.6,
+            "edge":        rnd.uniform(0.06, 0.25),
+            "kelly_stake": round(rnd.uniform(5, 40), 1),
+            "result":      rnd.choice(("win", "loss")),
+            "league":      rnd.choice(("regular", "regular", "wnba")),
+        }
+    return history
+
+
+def rounded(value):
+    """Floats rounded so sums folded in a different order compare equal."""
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, dict):
+        return {k: rounded(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [rounded(v) for v in value]
+    return value
+
+
+def test_incremental_fold_matches_rebuild():
+    history = make_history(300)
+    ids     = sorted(history, key=lambda gid: history[gid]["date"])
+    staged  = {gid: dict(history[gid], result="pending") for gid in ids}
+
+    state = None
+    for chunk in (ids[:100], ids[100:220], ids[220:]):
+        for gid in chunk:
+            staged[gid]["result"] = history[gid]["result"]
+        state = nba_bot.update_analytics(state, staged)
+
+    assert rounded(state) == rounded(nba_bot.update_analytics(None, history))
+
+
+def test_late_settlement_matches_rebuild():
+    history = make_history(200, seed=1)
+    late    = sorted(history, key=lambda gid: history[gid]["date"])[:15]
+    staged  = {gid: dict(r, result="pending") if gid in late else dict(r) for gid, r in history.items()}
+
+    state = nba_bot.update_analytics(None, staged)
+    for gid in late:
+        staged[gid]["result"] = history[gid]["result"]
+    state = nba_bot.update_analytics(state, staged)
+
+    full = nba_bot.update_analytics(None, history)
+    assert rounded(state) == rounded(full)
+    for league, ls in state["leagues"].items():
+        # The drawdown curve is replayed, not just appended to.
+        assert round(ls["max_dd"], 6) == round(full["leagues"][league]["max_dd"], 6)
+
+
+def test_changed_result_triggers_rebuild():
+    history = make_history(120, seed=2)
+    state   = nba_bot.update_analytics(None, history)
+    gid     = next(iter(history))
+    history[gid]["result"] = "loss" if history[gid]["result"] == "win" else "win"
+    assert rounded(nba_bot.update_analytics(state, history)) == rounded(nba_bot.update_analytics(None, history))
@@ -0,0 +1,59 @@
+import json
+
+import nba_bot
+
+from tests.test_analytics import rounded
+
+OLD = nba_bot.SEASON_YEAR - 1
+
+
+def season_history():
+    """Settled picks from last season and this one, plus one of last
+    season's still pending."""
+    history = {}
+    for i in range(40):
+        old  = i % 2 == 0
+        year = OLD + 1 if old else nba_bot.SEASON_YEAR
+        date = "%d-%02d-%02d" % (year, 2 if old else 11, 1 + i % 28)
+        history["湖人@塞爾提克_%d" % i] = {
+            "date": date, "bet": "湖人 +3.5", "book": "b", "price": 1.91, "prob": 0.6,
+            "edge": 0.1, "kelly_stake": 20.0, "result": ("win", "loss")[i % 3 == 0],
+            "league": ("regular", "wnba")[i % 5 == 0],
+        }
+    history["pending"] = dict(history["湖人@塞爾提克_0"], result="pending")
+    return history
+
+
+def test_archive_round_trips_through_gzip_base64():
+    records = season_history()
+    encoded = nba_bot.encode_archive(records)
+    payload = json.loads(encoded)
+    assert payload["encoding"] == "gzip+base64"
+    assert payload["entries"] == len(records)
+    assert nba_bot.decode_archive(payload) == records
+    # Byte-identical for the same records, so an unchanged season isn't re-uploaded as a diff.
+    assert nba_bot.encode_archive(dict(reversed(list(records.items())))) == encoded
+
+
+def test_compaction_moves_closed_season_and_keeps_totals():
+    history   = season_history()
+    full      = nba_bot.update_analytics(None, history)
+    analytics = nba_bot.update_analytics(None, history)
+    index     = nba_bot.new_archive_index()
+
+    assert nba_bot.closed_seasons(history) == [OLD]
+    moved = nba_bot.compact_history(history, analytics, index, [OLD])
+
+    assert set(moved) == {OLD}
+    assert all(nba_bot.history_season(r) == OLD for r in moved[OLD].values())
+    assert "pending" in history
+    assert all(nba_bot.history_season(r) != OLD or r["result"] == "pending" for r in history.values())
+    assert not set(moved[OLD]) & set(analytics["settled"])
+
+    # Folding forward from the compacted state, and rebuilding from the
+    # archive index plus what's left, both give the pre-compaction totals.
+    assert rounded(nba_bot.update_analytics(analytics, history, index)["leagues"]) == rounded(full["leagues"])
+    assert rounded(nba_bot.update_analytics(None, history, index)["leagues"]) == rounded(full["leagues"])
+
+    restored = nba_bot.decode_archive(json.loads(nba_bot.encode_archive(moved[OLD])))
+    assert dict(history, **restored) == season_history()
@@ -0,0 +1,65 @@
+import random
+
+import nba_bot
+
+
+def settled_history(n, seed=0, league="regular"):
+    """`n` settled picks whose raw probabilities overstate how often they
+    actually cover, the way the real history does."""
+    rnd     = random.Random(seed)
+    history = {}
+    for i in range(n):
+        raw   = rnd.uniform(0.45, 0.80)
+        price = rnd.choice((1.8, 1.91, 2.0, 2.2))
+        history["g%d" % i] = {
+            "date":        "2026-01-%02d" % (1 + i % 28),
+            "bet":         "x +3.5",
+            "book":        "b",
+            "price":       price,
+            "prob":        raw,
+            "raw_prob":    raw,
+            "edge":        raw - 1 / price,
+            "kelly_stake": 20.0,
+            "result":      "win" if rnd.random() < raw - 0.08 else "loss",
+            "league":      league,
+        }
+    return history
+
+
+def test_passes_through_below_min_settled():
+    n     = nba_bot.CALIBRATION_MIN_SETTLED - 1
+    state = nba_bot.update_analytics(None, settled_history(n))
+    assert nba_bot.fit_calibration(state["leagues"]["regular"]) is None
+    tables = nba_bot.update_calibration(state)
+    assert "regular" not in tables
+    probs = [0.52, 0.61, 0.74]
+    assert nba_bot.calibrate(tables.get("regular"), probs, [0.5, 0.5, 0.5]) == probs
+
+
+def test_tables_are_monotone():
+    state  = nba_bot.update_analytics(None, settled_history(600))
+    tables = nba_bot.update_calibration(state)["regular"]
+    assert set(tables) == set(nba_bot.CALIBRATION_TIERS)
+    for table in tables.values():
+        assert len(table) == nba_bot.CALIBRATION_GRID[2]
+        assert all(0.0 <= v <= 1.0 for v in table)
+        assert all(b >= a for a, b in zip(table, table[1:]))
+
+
+def test_calibrated_probability_is_monotone_within_a_tier():
+    state  = nba_bot.update_analytics(None, settled_history(600))
+    tables = nba_bot.update_calibration(state)["regular"]
+    probs  = [0.30 + 0.005 * i for i in range(120)]
+    # A constant raw edge keeps every probability in the same tier.
+    out = nba_bot.calibrate(tables, probs, [p - 0.15 for p in probs])
+    assert all(b >= a - 1e-12 for a, b in zip(out, out[1:]))
+    # Picks that cover less often than claimed are pulled down.
+    assert sum(out) < sum(probs)
+
+
+def test_refits_only_when_settled_count_moves():
+    state = nba_bot.update_analytics(None, settled_history(200))
+    nba_bot.update_calibration(state)
+    tables = state["calibration"]["tables"]["regular"]
+    state["leagues"]["regular"]["calib"] = {}   # a refit now would drop the tables
+    assert nba_bot.update_calibration(state)["regular"] == tables
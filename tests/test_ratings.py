@@ -0,0 +1,74 @@
+import random
+from datetime import date, timedelta
+
+import nba_bot
+
+TEAMS = ["Boston Celtics", "Los Angeles Lakers", "Denver Nuggets",
+         "Miami Heat", "Phoenix Suns", "Chicago Bulls"]
+
+
+def synthetic_season(n_rounds=6, seed=0):
+    """Round-robin GameRows from known offense/defense strengths, with noise."""
+    rnd      = random.Random(seed)
+    strength = {t: (rnd.uniform(-6, 6), rnd.uniform(-6, 6)) for t in TEAMS}
+    day      = date(2026, 11, 1)
+    games    = []
+    for _ in range(n_rounds):
+        for i, home in enumerate(TEAMS):
+            for away in TEAMS[i + 1:]:
+                h, a = strength[home], strength[away]
+                hs = round(112 + 1.5 + h[0] - a[1] + rnd.gauss(0, 6))
+                vs = round(112 - 1.5 + a[0] - h[1] + rnd.gauss(0, 6))
+                games.append(nba_bot.GameRow(day.isoformat(), "Final", home, away, hs, vs))
+                day += timedelta(days=1)
+    return games
+
+
+def direct_solve(solver):
+    """The normal equations solved densely by Gaussian elimination, with the
+    matrix read column by column from the solver's own operator."""
+    n = 2 + 2 * len(solver.teams)
+    cols = [solver._matvec([1.0 if j == i else 0.0 for j in range(n)]) for i in range(n)]
+    a = [[cols[j][i] for j in range(n)] + [solver.atb.get(i, 0.0)] for i in range(n)]
+    for c in range(n):
+        pivot = max(range(c, n), key=lambda r: abs(a[r][c]))
+        a[c], a[pivot] = a[pivot], a[c]
+        for r in range(n):
+            if r != c:
+                f = a[r][c] / a[c][c]
+                a[r] = [x - f * y for x, y in zip(a[r], a[c])]
+    return [a[i][n] / a[i][i] for i in range(n)]
+
+
+def test_cg_matches_direct_solve():
+    solver = nba_bot.RatingSolver(half_life_days=0)
+    nba_bot.ratings_from_games(synthetic_season(), solver)
+    for cg, exact in zip(solver.solution, direct_solve(solver)):
+        assert abs(cg - exact) < 1e-4
+
+
+def test_recovers_home_court_and_ranking():
+    ratings = nba_bot.ratings_from_games(synthetic_season(n_rounds=20, seed=1), nba_bot.RatingSolver(half_life_days=0))
+    assert set(ratings) == set(TEAMS)
+    assert 1.5 < ratings.home_court < 4.5
+    assert 108 < ratings.mean_points < 116
+
+
+def test_incremental_matches_one_shot():
+    games = synthetic_season(seed=2)
+    once  = nba_bot.ratings_from_games(games, nba_bot.RatingSolver(half_life_days=30))
+    inc   = nba_bot.RatingSolver(half_life_days=30)
+    nba_bot.ratings_from_games(games[:40], inc)
+    polled = nba_bot.ratings_from_games(games, inc)
+    assert abs(polled.home_court - once.home_court) < 0.02
+    for team in TEAMS:
+        assert abs(polled[team].off - once[team].off) < 0.02
+        assert abs(polled[team].defense - once[team].defense) < 0.02
+
+
+def test_neutral_site_has_no_home_court():
+    solver = nba_bot.RatingSolver(half_life_days=0, neutral_site=True)
+    ratings = nba_bot.ratings_from_games(synthetic_season(seed=3), solver)
+    assert ratings.home_court == 0.0
+    for cg, exact in zip(solver.solution, direct_solve(solver)):
+        assert abs(cg - exact) < 1e-4